@@ -1,179 +1,244 @@
-import string # for ascii_lowercase
-import subprocess # for pip install
-import os # for clear terminal
+import os # for file paths
 import sys # for exit
-import json # for json file handling
-import hashlib # for password hashing
+import atexit # for closing storage on exit
 from datetime import datetime # for time calculations
 import getpass # for password input
-import configparser # for config file handling
-import pandas as pd # for dataframes
-try:
-    from wonderwords import RandomWord # pip install wonderwords
-except ImportError:
-    print("wonderwords not installed, installing now...")
-    subprocess.run(["pip", "install", "wonderwords"])
-    print("...wonderwords installed")
+from hangman_config import load_settings # config.ini handling
+from hangman_engine import HangmanGame, get_wrong_max, get_word_difficulty, PLAYING, GUESS_REPEATED, GUESS_INVALID # game rules
+from hangman_words import WordPool, WordPoolExhaustedError, WordPrefetcher # length bucketed word pool, background word drawing
+from hangman_dictionary import MappedDictionary, MappedWordPool # memory mapped word files
+from hangman_replay import GuessEventLog, encode_game_record, guess_events_file_name # compact guess by guess game records
+from hangman_storage import open_storage, PersistenceWorker # json / sqlite storage backends, write-behind saving
+import hangman_players # player stats aggregates
+from hangman_credentials import CredentialService # salted password hashing on worker threads
+from hangman_leaderboard import Leaderboard, WindowedLeaderboards, leaderboard_file_name, windows_file_name # cached leaderboards
+from hangman_render import ScreenRenderer, get_game_lines # redraws only the changed lines
+import hangman_profile # timing spans and counters, on when debug is set
 
 #=======================================
 # Configuration
 #=======================================
 program_location = os.path.dirname(os.path.abspath(__file__))
 config_file = os.path.join(program_location, "config.ini")
-config = configparser.ConfigParser()
-
-if not os.path.exists(config_file):
-    config["Word Settings"] = {
-        "easy word length": "8",         
-        "normal word length": "10",
-        "hard word length": "15"
-    }
-    config["Score Multipliers"] = {
-        "add points per correct letter": "100",
-        "sub points per wrong letter": "50",
-        "allowed seconds per letter": "5",
-        "add/sub points per second to finish": "5",
-        "add points for winning": "500"
-    }
-    config["Password Settings"] = {
-        "min password length": "8",
-        "incorrect password attempts": "3"
-    }
-    config["Game Settings"] = {
-        "clear_screen": "True",
-        "show_word": "True",
-        "debug": "False"
-    }
-    with open(config_file, "w") as file:
-        config.write(file)
-    print("Config file created, please update the settings in the config file and run the program again")
-else:
-    config.read(config_file)
-    print("Config file found, loading settings...")
-
-# config["Word Settings"]
-length_of_easy_word = int(config["Word Settings"]["easy word length"])
-length_of_normal_word = int(config["Word Settings"]["normal word length"])
-length_of_hard_word = int(config["Word Settings"]["hard word length"])
-# config["Score Multipliers"]
-correct_letters_multiplier = int(config["Score Multipliers"]["add points per correct letter"])
-wrong_letter_multiplier = int(config["Score Multipliers"]["sub points per wrong letter"])
-grace_period_multiplier = int(config["Score Multipliers"]["allowed seconds per letter"])
-time_points_multiplier = int(config["Score Multipliers"]["add/sub points per second to finish"])
-win_multiplier = int(config["Score Multipliers"]["add points for winning"])
-# config["Password Settings"]
-min_password_length = int(config["Password Settings"]["min password length"])
-incorrect_password_attempts = int(config["Password Settings"]["incorrect password attempts"])
-# config["Game Settings"]
-clear_screen = config["Game Settings"].getboolean("clear_screen")
-show_word = config["Game Settings"].getboolean("show_word")
-debug = config["Game Settings"].getboolean("debug")
+# typed settings, loaded by load_configuration() when the game starts so importing this module reads no files
+settings = None
+config_created = False
+
+def load_configuration():
+    """
+    Loads config.ini into the settings globals, writing a default one first if it is missing.
+
+    Args: None as it sets global variables.
+
+    Returns: None
+    """
+    global settings, config_created, difficulty_word_length, word_selection, dictionary_file, score_settings
+    global min_password_length, incorrect_password_attempts, credential_settings
+    global clear_screen, show_word, debug, leaderboard_size, profile_file, profile_format, storage_settings, storage_backend
+    settings, config_created = load_settings(config_file) # typed settings, cached until config.ini changes
+
+    # config["Word Settings"]
+    difficulty_word_length = settings["difficulty_word_length"]
+    word_selection = settings["word_selection"] # "length" or "hardness"
+    dictionary_file = settings["dictionary_file"] # word file to draw from, "" for wonderwords
+    # config["Score Multipliers"]
+    score_settings = settings["score_settings"]
+    # config["Password Settings"]
+    min_password_length = settings["min_password_length"]
+    incorrect_password_attempts = settings["incorrect_password_attempts"]
+    credential_settings = settings["credential_settings"]
+    # config["Game Settings"]
+    clear_screen = settings["clear_screen"]
+    show_word = settings["show_word"]
+    debug = settings["debug"]
+    leaderboard_size = settings["leaderboard_size"]
+    profile_file = settings["profile_file"]
+    profile_format = settings["profile_format"]
+    # config["Storage Settings"]
+    storage_settings = settings["storage_settings"]
+    storage_backend = storage_settings["backend"]
 
 # Global Variables
 #=======================================
-# file name for the game stats json file
-file_name = "hangman_stats.json"
-# file name for the player credentials and stats json file
-player_file_name = "player_stats.json"
-# difficulty map
-difficulty_word_length = {
-    ("1", "Easy"): length_of_easy_word, 
-    ("2", "Normal"): length_of_normal_word, 
-    ("3", "Hard"): length_of_hard_word}
+# file name for the per player word pool draw cursors
+word_pool_cursor_file_name = "word_pool_cursors.json"
+# storage backend set under [Storage Settings], opened once per session by get_storage()
+storage = None
+# dictionary bucketed by word length, loaded once per session by load_word_pool()
+word_pool = None
+# background saving of finished games, started by get_persistence()
+persistence = None
+# next word of each difficulty drawn in the background, started by get_word_prefetcher()
+word_prefetcher = None
+# guess by guess records of finished games, opened by get_guess_event_log()
+guess_event_log = None
+# password hashing workers, started by get_credentials()
+credentials = None
+# ranked players, loaded once per session by load_leaderboard()
+leaderboard = None
+# day, week and per difficulty boards, loaded once per session by load_windowed_leaderboards()
+windowed_leaderboards = None
+# word hardness index, opened on the first draw by load_hardness_index() when word selection = hardness
+hardness_index = None
+# terminal renderer, created on first use by get_renderer()
+renderer = None
+# hint engine over the word pool, built the first time a hint is asked for by load_solver()
+solver = None
 
 #=======================================
 # Functions
 #=======================================
+def get_renderer():
+    """
+    Creates the terminal renderer once per session.
+    Escape sequences are only used if clear_screen is on and stdout is a terminal.
+
+    Args: None as it uses global variables.
+
+    Returns: ScreenRenderer: The renderer.
+    """
+    global renderer
+    if renderer is None:
+        renderer = ScreenRenderer(sys.stdout, ansi=False if clear_screen == False else None)
+    return renderer
+
 def clear_terminal():
-    if clear_screen == True:
-        if os.name == 'nt':  # Windows
-            os.system('cls')
-        else:
-            os.system('clear') # Linux / MacOS
+    get_renderer().clear()
 
 def check_data_directory_and_append_filename(file_name):
     """
     Make that the 'data' directory exists in the same location as the script.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(script_dir, 'data')
+    data_dir = os.path.join(program_location, 'data') # __file__ is gone by the time atexit runs
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
     abs_file_path = os.path.join(data_dir, file_name)
     return abs_file_path
 
-def load_statistics_from_json(file_name):
+def get_storage():
     """
-    Load data from a json file in the data directory.
+    Opens the storage backend once per session, it is closed on exit.
 
-    Args:
-    file_name (str): The name of the JSON file.
+    Args: None as it uses global variables.
 
-    Returns:
-    list: The list of json entries as dicsts.
+    Returns: JsonStorage or SqliteStorage: The open storage.
     """
-    # get absolute path to data directory and file name
-    file_path = check_data_directory_and_append_filename(file_name)
-    # Load current data from the file if it exists
-    if os.path.exists(file_path):
-        with open(file_path, mode='r') as file:
-            try:
-                json_file = json.load(file)
-            except json.JSONDecodeError:
-                json_file = []
-                return json_file  # If file is corrupted or empty, reset to an empty list
-    else:
-        json_file = []
-    return json_file
+    global storage
+    if storage is None:
+        with hangman_profile.span("storage.open"):
+            storage = open_storage(storage_settings, os.path.dirname(check_data_directory_and_append_filename("")))
+        atexit.register(storage.close)
+    return storage
 
-def save_statistics_to_json(file_name, statistics):
+def get_credentials():
     """
-    Save game stats to a json file in the data directory.
-    If the file already exists and contains data, append the new entry to the data.
+    Starts the password hashing workers once per session.
 
-    Args:
-    file_name (str): The name of the JSON file.
-    statistics (dict): The new game statistics entry to save.
+    Args: None as it uses global variables.
+
+    Returns: CredentialService: The password hashing service.
     """
-    # get absolute path to data directory and file name
-    file_path = check_data_directory_and_append_filename(file_name)
+    global credentials
+    if credentials is None:
+        credentials = CredentialService(credential_settings)
+        atexit.register(credentials.close)
+    return credentials
 
-    json_file = load_statistics_from_json(file_path)
-    
-    if json_file != []:
-        # add stats to the list
-        json_file.append(statistics)
-    else:
-        json_file = [statistics]
-    
-    # Save the list back to the file
-    with open(file_path, mode='w') as file:
-        json.dump(json_file, file, indent=4)
+def get_persistence():
+    """
+    Starts the write-behind worker that saves finished games once per session.
+    It has its own storage and everything queued is saved before the program exits.
 
-def check_player_exists(player_name):
+    Args: None as it uses global variables.
+
+    Returns: PersistenceWorker: The worker.
     """
-    Check if a player exists in the player stats file.
+    global persistence
+    if persistence is None:
+        data_dir = os.path.dirname(check_data_directory_and_append_filename(""))
+        persistence = PersistenceWorker(lambda: open_storage(storage_settings, data_dir))
+        atexit.register(persistence.close)
+    return persistence
 
-    Args: player_name (str): The player's name.
+def get_guess_event_log():
+    """
+    Opens the guess event file once per session, it is closed on exit.
 
-    Returns: bool: True if the player exists.
+    Args: None as it uses global variables.
+
+    Returns: GuessEventLog: The event file.
     """
-    player_stats = load_statistics_from_json(player_file_name)
-    for stats in player_stats:
-        if stats["player_name"] == player_name:
-            return True
-    return False
+    global guess_event_log
+    if guess_event_log is None:
+        guess_event_log = GuessEventLog(check_data_directory_and_append_filename(guess_events_file_name))
+        atexit.register(guess_event_log.close)
+    return guess_event_log
+
+def load_leaderboard():
+    """
+    Loads the saved leaderboard once per session, it is saved on exit.
+    Only the games recorded since it was saved are read, it is rebuilt from the
+    player stats if the file is missing, unreadable or from another backend.
+
+    Args: None as it uses global variables.
+
+    Returns: Leaderboard: The leaderboard.
+    """
+    global leaderboard
+    if leaderboard is None:
+        leaderboard_file_path = check_data_directory_and_append_filename(leaderboard_file_name)
+        with hangman_profile.span("leaderboard.load"):
+            leaderboard = Leaderboard.open(leaderboard_file_path, get_storage(), storage_backend)
+        atexit.register(save_leaderboard, leaderboard_file_path)
+    return leaderboard
+
+def save_leaderboard(leaderboard_file_path):
+    """
+    Saves the leaderboard on exit, once the games waiting to be saved are in the storage.
 
-def hash_password_md5(password):
+    Args: leaderboard_file_path (str): The absolute path to the leaderboard file.
     """
-    Hash a password using MD5.
+    if persistence is not None:
+        persistence.flush()
+    with hangman_profile.span("leaderboard.save"):
+        leaderboard.save(leaderboard_file_path, get_storage())
 
-    Args: password (str): The password to hash.
+def load_windowed_leaderboards():
+    """
+    Loads the saved day, week and per difficulty boards once per session, they are saved on exit.
+
+    Args: None as it uses global variables.
+
+    Returns: WindowedLeaderboards: The boards.
+    """
+    global windowed_leaderboards
+    if windowed_leaderboards is None:
+        windows_file_path = check_data_directory_and_append_filename(windows_file_name)
+        with hangman_profile.span("leaderboard_windows.load"):
+            windowed_leaderboards = WindowedLeaderboards.open(windows_file_path, get_storage(), storage_backend)
+        atexit.register(save_windowed_leaderboards, windows_file_path)
+    return windowed_leaderboards
 
-    Returns: str: The hashed password.
+def save_windowed_leaderboards(windows_file_path):
     """
-    hashed_password = hashlib.md5(password.encode()).hexdigest()
-    return hashed_password
+    Saves the day, week and per difficulty boards on exit, once the games waiting to be saved are in the storage.
+
+    Args: windows_file_path (str): The absolute path to the boards file.
+    """
+    if persistence is not None:
+        persistence.flush()
+    with hangman_profile.span("leaderboard_windows.save"):
+        windowed_leaderboards.save(windows_file_path, get_storage())
+
+def check_player_exists(player_name):
+    """
+    Check if a player exists in the player stats file.
+
+    Args: player_name (str): The player's name.
+
+    Returns: bool: True if the player exists.
+    """
+    return get_storage().get_player(player_name) is not None
 
 def new_player_stats(player_name, player_password):
     """
@@ -186,32 +251,9 @@ def new_player_stats(player_name, player_password):
     if player_password == "":
         password = ""
     else:
-        password = hash_password_md5(player_password)
-    player_stats = {
-        "player_name":player_name,
-        "player_password": password,
-        "easy_games":0,
-        "easy_wins":0,
-        "easy_highest_score":0,
-        "easy_average_score":0,
-        "easy_average_time":0,
-        "normal_games":0,
-        "normal_wins":0,
-        "normal_highest_score":0,
-        "normal_average_score":0,
-        "normal_average_time":0,
-        "hard_games":0,
-        "hard_wins":0,
-        "hard_highest_score":0,
-        "hard_average_score":0,
-        "hard_average_time":0,
-        "total_games":0,
-        "total_wins":0,
-        "total_score":0,
-        "average_score":0,
-        "average_time":0
-    } 
-    return player_stats
+        with hangman_profile.span("credentials.hash"):
+            password = get_credentials().hash_password(player_password).result()
+    return hangman_players.new_player_stats(player_name, password, [key[1] for key in difficulty_word_length])
 
 def update_player_stats(player_name, game_stats):
     """
@@ -221,198 +263,132 @@ def update_player_stats(player_name, game_stats):
     player_name (str): The player's name.
     game_stats (dict): The new game statistics entry to update the player stats with.
     """
-    # 
-    player_stats = load_statistics_from_json(player_file_name)
     print(f"Updating Player Stats for {player_name}...")
-    # loop through the player stats and update the stats for the player
-    for stats in player_stats:
-        # check if player exists in the player stats file
-        if stats["player_name"] == player_name:
-            stats["total_games"] += 1
-            stats["total_score"] += game_stats["total_score"]
-            stats["average_time"] = round((float(stats["average_time"]) * (stats["total_games"] - 1) + float(game_stats["time_taken"])) / stats["total_games"], 2)
-            stats["average_score"] = stats["total_score"] / stats["total_games"]
-            if game_stats["win_bool"] == True:
-                stats["total_wins"] += 1
-                if game_stats["word_difficulty"] == "Easy":
-                    stats["easy_games"] += 1
-                    stats["easy_wins"] += 1
-                    stats["easy_highest_score"] = game_stats["total_score"] if stats["easy_highest_score"] < game_stats["total_score"] else stats["easy_highest_score"]
-                    stats["easy_average_score"] = (stats["easy_average_score"] * (stats["easy_games"] - 1) + game_stats["total_score"]) / stats["easy_games"]
-                    stats["easy_average_time"] = (stats["easy_average_time"] * (stats["easy_games"] - 1) + game_stats["time_taken"]) / stats["easy_games"]
-                elif game_stats["word_difficulty"] == "Normal":
-                    stats["normal_games"] += 1
-                    stats["normal_wins"] += 1
-                    stats["normal_highest_score"] = game_stats["total_score"] if stats["normal_highest_score"] < game_stats["total_score"] else stats["normal_highest_score"]
-                    stats["normal_average_score"] = (stats["normal_average_score"] * (stats["normal_games"] - 1) + game_stats["total_score"]) / stats["normal_games"]
-                    stats["normal_average_time"] = (stats["normal_average_time"] * (stats["normal_games"] - 1) + game_stats["time_taken"]) / stats["normal_games"]
-                elif game_stats["word_difficulty"] == "Hard":
-                    stats["hard_games"] += 1
-                    stats["hard_wins"] += 1
-                    stats["hard_highest_score"] = game_stats["total_score"] if stats["hard_highest_score"] < game_stats["total_score"] else stats["hard_highest_score"]
-                    stats["hard_average_score"] = (stats["hard_average_score"] * (stats["hard_games"] - 1) + game_stats["total_score"]) / stats["hard_games"]
-                    stats["hard_average_time"] = (stats["hard_average_time"] * (stats["hard_games"] - 1) + game_stats["time_taken"]) / stats["hard_games"]
-            else:
-                if game_stats["word_difficulty"] == "Easy":
-                    stats["easy_games"] += 1
-                elif game_stats["word_difficulty"] == "Normal":
-                    stats["normal_games"] += 1
-                elif game_stats["word_difficulty"] == "Hard":
-                    stats["hard_games"] += 1
-
-    # Save the updated player stats back to the file
-    try:
-        player_file_path = check_data_directory_and_append_filename(player_file_name)
-        with open(player_file_path, mode='w') as file:
-            json.dump(player_stats, file, indent=4)
-        print("Player Stats Updated!")
-    except Exception as e:
-        print(f"Error saving player stats: {e}")
-
-def check_word_not_used_for_player(word, player_name):
-    """
-    Check if the player has already played the word.
-
-    Args: word (str): The word to check, player_name (str): The player's name.
-
-    Returns: bool: True if the player has not played the word.
-    """
-    # Load the game stats from the json file
-    game_stats = load_statistics_from_json(file_name)
-    # Check if the player has already played the word
-    for stats in game_stats:
-        if stats["player_name"] == player_name and stats["hangman_word"] == word:
-            return False
-    return True
-
-def get_word(word_count, player_name):
-    """
-    Gets a random word from the wonderwords library.
+    # the game is logged and added to the player's stats in the background, in one locked commit
+    # with any other games waiting, so the player doesn't wait for the disk.
+    # The leaderboards are opened first, opening them catches up from the log, which may already have the game
+    with hangman_profile.span("update_player_stats"):
+        all_time_leaderboard = load_leaderboard()
+        windowed_boards = load_windowed_leaderboards()
+        get_persistence().submit_game(game_stats)
+        all_time_leaderboard.add_game(game_stats)
+        windowed_boards.add_game(game_stats)
+    print("Player Stats Updated!")
+
+def load_word_pool():
+    """
+    Loads the word pool once per session, from the word file set with 'dictionary file'
+    mapped with mmap, or from the wonderwords dictionary if no file is set.
 
-    Args: word_count (int): The length of the word to get.
+    Args: None as it uses global variables.
 
-    Returns: word (str): The random word.
+    Returns: WordPool: The word pool.
     """
-    print("Getting Word...")
-    word = RandomWord().word(word_min_length=(word_count), word_max_length=(word_count))
-    # Check if the word has already been used by the player
-    if check_word_not_used_for_player(word, player_name) == False:
-        # Get a new word if the player has already played the word
-        print("Word already used by player, getting new word...")
-        get_word(word_count, player_name)
-    # Return the word if it has not been used by the player or has repeat letters
-    else:
-        print("New Word Generated!")
-        return word
+    global word_pool
+    if word_pool is None:
+        cursor_file_path = check_data_directory_and_append_filename(word_pool_cursor_file_name)
+        if dictionary_file:
+            # relative paths are from the program folder, the index is saved in the data folder
+            try:
+                with hangman_profile.span("word_pool.load"):
+                    dictionary = MappedDictionary(os.path.join(program_location, dictionary_file), os.path.dirname(cursor_file_path))
+            except OSError as e:
+                sys.exit(f"Could not open the dictionary file: {e}")
+            atexit.register(dictionary.close)
+            word_pool = MappedWordPool(dictionary, cursor_file_path)
+        else:
+            try:
+                from wonderwords import RandomWord # pip install wonderwords, only imported once a word is needed
+            except ImportError:
+                sys.exit("wonderwords is not installed, run 'pip install wonderwords' and start the game again")
+            with hangman_profile.span("word_pool.load"):
+                word_pool = WordPool(RandomWord().filter(), cursor_file_path)
+        atexit.register(word_pool.save_cursors)
+    return word_pool
 
-def display_hangman_correct():
+def load_hardness_index():
     """
-    Displays the hangman word with the correct letters filled in.
+    Opens the word hardness index once per session, when 'word selection' is set to hardness.
 
     Args: None as it uses global variables.
 
-    Returns: hidden_hangman (list): The hangman word with the correct letters filled in.
-    """
-    for i, letter in enumerate(hangman_list): # loops over the hangman list
-        if letter in right_letters: # hangman letters in right letter list
-            hidden_hangman[i] = letter
-    return hidden_hangman
+    Returns: HardnessIndex or None: The index, None if it hasn't been built or is from another dictionary, words are then picked by length.
+    """
+    global hardness_index, word_selection
+    if hardness_index is None and word_selection == "hardness":
+        from hangman_hardness import HardnessIndex, get_dictionary_hash, hardness_index_file_name # imports numpy, only when word selection = hardness
+        # checked against the word pool so an index built from an older dictionary isn't used
+        dictionary_hash = get_dictionary_hash(word for bucket in load_word_pool().buckets.values() for word in bucket)
+        try:
+            hardness_index = HardnessIndex(check_data_directory_and_append_filename(hardness_index_file_name), dictionary_hash)
+            atexit.register(hardness_index.close)
+        except OSError:
+            print("No word hardness index, run 'python hangman_hardness.py build', picking words by length")
+            word_selection = "length"
+        except ValueError as e:
+            print(f"{e}, picking words by length")
+            word_selection = "length"
+    return hardness_index
+
+def fetch_word(word_count, player_name, is_used):
+    """
+    Gets the player's next unplayed word without using it up, from the word pool by length, or from
+    the difficulty's tier of the hardness index when 'word selection' is set to hardness.
+    Called on the prefetch thread, which loads the dictionary the first time.
 
-def calc_elapsed_time(start_time, end_time):
-    """
-    Calculates the time taken to complete the game.
+    Args:
+    word_count (int): The word length of the selected difficulty.
+    player_name (str): The player's name.
+    is_used (callable): Checks if the player has played a word, using the prefetch thread's storage.
 
-    Args: end_time (datetime) - The end time of the game, start_time (datetime) - The start time of the game.
+    Returns: word (str): The random word.
 
-    Returns: ellapsed_time_seconds (float(round 2 places)): The time taken to complete the game in seconds.
+    Raises: WordPoolExhaustedError: If the player has played every word of that length or tier.
     """
-    elapsed_time = end_time - start_time
-    elapsed_time_seconds = elapsed_time.total_seconds()
-    return round(elapsed_time_seconds, 2)
+    index = load_hardness_index()
+    if index is not None:
+        # difficulties in config order are the tiers, easiest first
+        difficulty_names = [key[1] for key in difficulty_word_length]
+        tier = difficulty_names.index(get_word_difficulty(word_count, difficulty_word_length))
+        return index.draw(tier, len(difficulty_names), is_used=is_used, player_name=player_name)
+    return load_word_pool().peek(word_count, player_name, is_used=is_used)
 
-def calc_score(name, loss, wrong_letters, hidden_hangman, hangman_word, elapsed_time):
+def get_word_prefetcher():
     """
-    calculates the score of the game based on: 
-    # + points for correct letters guessed (per letter in hidden_hangman)
-    # - points for wrong letters (per leeter in wrong_letters)
-    # - points for time taken after grace period
+    Starts the background thread that gets each difficulty's next word ready once per session.
+    It has its own storage for the used word check.
 
-    Args: 
-        wrong_letters (list): list of wrong letters
-        hidden_hangman (list): the hangman word with correct letters filled in
-        hangman_word (str): the word to guess
-        elapsed_time (float): the time taken to complete the game
+    Args: None as it uses global variables.
 
-    returns: list: dictionary of the score data, string: formatted score summary
+    Returns: WordPrefetcher: The prefetcher.
     """
+    global word_prefetcher
+    if word_prefetcher is None:
+        data_dir = os.path.dirname(check_data_directory_and_append_filename(""))
+        word_prefetcher = WordPrefetcher(fetch_word, lambda: open_storage(storage_settings, data_dir))
+        atexit.register(word_prefetcher.close)
+    return word_prefetcher
 
+def get_word(word_count, player_name):
+    """
+    Takes the player's next unplayed word, usually already fetched in the background,
+    and starts fetching the next word of the same length for the next game.
 
-    grace_period = len(hangman_word) * grace_period_multiplier # grace period in seconds
-
-    # if player is faster than grace period
-    if round(elapsed_time) < grace_period: # round to an integer
-        time_score = (grace_period - round(elapsed_time)) * time_points_multiplier
-        time_string = f"\t+{time_score} pts for faster than grace period.\n"
-
-    # if player is slower than grace period
-    elif round(elapsed_time) > grace_period:
-        time_score = -(round(elapsed_time) - grace_period) * time_points_multiplier
-        time_string = f"\t{time_score} pts for slower than grace period.\n"
-
-    # if player is average
-    else:
-        time_score = 0
-        time_string = f"\t{time_score} pts for being an average guesser.\n"
-    print(f"time_score: {time_score}\n Calculated by:\t(round time:{round(elapsed_time)} - {grace_period}) * 5")
-
-    # BASIC CALCULATIONS
-    correct_letters_score = (len(hidden_hangman) - hidden_hangman.count("_")) * correct_letters_multiplier # number of correct guessed letters calculated
-    wrong_letters_score = len(wrong_letters) * wrong_letter_multiplier # number of wrong letters calculated
-
-    # TOTAL SCORE TRACKING
-    total_score = 0 # start with 0 points
-    total_score += correct_letters_score # add correct letter score
-    total_score -= wrong_letters_score # subtract wrong letter score
-    total_score += time_score # add time score
+    Args: word_count (int): The word length of the selected difficulty, player_name (str): The player's name.
 
+    Returns: word (str): The random word.
 
-    if loss == True:
-        win = False
-        finished = "Lost"
-    else:
-        total_score += win_multiplier
-        win = True
-        finished = "Won"
-
-    score_summarised = (
-                        f"YOU {finished}!\nHangman word was: {hangman_word.upper()}\n"
-                        f"Score Summarised:\n"
-                        f"{"#"*20}\n"
-                        f"\t  0 pts baseline\n"
-                        "Additional Scores:\n"
-                        f"\t+ {correct_letters_score} pts (+{correct_letters_multiplier} pts per correct letter in '{hangman_word}')\n"
-                        f"\t{('+ ' + str(win_multiplier) + ' pts for winning') if win else '0 pts for losing'}\n"
-                        "Penalties:\n"
-                        f"\t- {wrong_letters_score} pts (-{wrong_letter_multiplier} per wrong letters, \'{",".join(wrong_letters)}\')\n"
-                        "Time Penalties/Bonuses:\n"
-                        f"{time_string}"
-                        "Total Score:\n"
-                        f"\t= {total_score} pts\n"
-                        f"{"#"*20}\n"
-                        )
-    return ({
-        "player_name":name,
-        "win_bool":win,
-        "total_score":total_score, 
-        "game_time":game_open_time,
-        "hangman_word":hangman_word,
-        "guessed_word":"".join(hidden_hangman),
-        "word_difficulty": (lambda word_length: [key[1] for key, value in difficulty_word_length.items() if value == word_length][0])(word_length),
-        "score_wrong_letters":wrong_letters_score,
-        "total_wrong_letters":len(wrong_letters),
-        "time_taken":elapsed_time,
-        "score_time_taken":time_score
-            }, score_summarised)
+    Raises: WordPoolExhaustedError: If the player has played every word of that length or tier.
+    """
+    print("Getting Word...")
+    with hangman_profile.span("get_word"):
+        prefetcher = get_word_prefetcher()
+        word = prefetcher.take(player_name, word_count)
+        if hardness_index is None:
+            word_pool.take(word_count, player_name, word) # move the player's cursor past it
+        prefetcher.prefetch(player_name, [word_count])
+    print("New Word Generated!")
+    return word
 
 def select_difficulty():
     """
@@ -440,24 +416,6 @@ def select_difficulty():
     print("Invalid Selection, try again")
     select_difficulty()
     
-def get_wrong_max():
-    """
-    Gets the maximum number of wrong guesses allowed.
-    Easy Words: 1 more than the word length
-    Normal Words: 1 less than the word length
-    Hard Words: 4 less than the word length
-    
-    Args: None
-    
-    Returns: int: The maximum number of wrong guesses allowed.
-    """
-    if word_length == length_of_easy_word:
-        return length_of_easy_word + 1
-    elif word_length == length_of_normal_word:
-        return length_of_normal_word - 1
-    elif word_length == length_of_hard_word:
-        return length_of_normal_word - 4
-
 def get_player_name():
     """
     Gets the player's name.
@@ -485,30 +443,18 @@ def create_password():
     """
     # Check if players password has been updated
     #=======================================
-    special_chars = ["#", "=", "-"]
-    password = getpass.getpass("\nEnter your password\n"
-                     "Requirements:\n"
-                    f"\t# {min_password_length} or more characters\n"
-                    "\t# min 1 upper case\n"
-                    "\t# min 1 lower case\n"
-                    f"\t# 1 special character ({",".join(special_chars)})): ")
-    if len(password) >= min_password_length:
-        if any(char.isupper() for char in password):
-            if any(char.islower() for char in password):
-                if any(char in special_chars for char in password):
-                    return password
-                else:
-                    print(f"Invalid Password, must have at least 1 special character ({",".join(special_chars)})")
-                    create_password()
-            else:
-                print("Invalid Password, must have at least 1 lower case letter")
-                create_password()
-        else:
-            print("Invalid Password, must have at least 1 upper case letter")
-            create_password()
-    else:
-        print(f"Invalid Password, must be {min_password_length} or more characters")
-        create_password()
+    special_chars = hangman_players.password_special_chars
+    while True:
+        password = getpass.getpass("\nEnter your password\n"
+                         "Requirements:\n"
+                        f"\t# {min_password_length} or more characters\n"
+                        "\t# min 1 upper case\n"
+                        "\t# min 1 lower case\n"
+                        f"\t# 1 special character ({",".join(special_chars)})): ")
+        password_problem = hangman_players.get_password_problem(password, min_password_length)
+        if password_problem is None:
+            return password
+        print(password_problem)
 
 def player_login(player_name):
     """
@@ -518,22 +464,26 @@ def player_login(player_name):
 
     Returns: bool: True if the player is logged in.
     """
-    player_stats = load_statistics_from_json(player_file_name)
+    stats = get_storage().get_player(player_name)
 
     incorrect_password_count = 0
     while incorrect_password_count < incorrect_password_attempts:
-        for stats in player_stats:
-            if stats["player_name"] == player_name:
-                # if no password set
-                if stats["player_password"] == "":
-                    return True
-                # if password set
-                if stats["player_password"] == hash_password_md5(getpass.getpass("Password: ")):
-                    return True
-                # if password incorrect
-                else:
-                    incorrect_password_count += 1
-                    print(f"Incorrect Password, {incorrect_password_attempts - incorrect_password_count} attempts left")
+        # if no password set
+        if stats["player_password"] == "":
+            return True
+        # if password set
+        password_check = get_credentials().check_password(stats, getpass.getpass("Password: "))
+        with hangman_profile.span("credentials.check"):
+            password_right, new_password_hash = password_check.result()
+        if password_right:
+            # passwords saved by older versions or with a lower cost are hashed again with the current settings
+            if new_password_hash is not None:
+                get_storage().set_player_password(player_name, new_password_hash)
+            return True
+        # if password incorrect
+        else:
+            incorrect_password_count += 1
+            print(f"Incorrect Password, {incorrect_password_attempts - incorrect_password_count} attempts left")
     
     print("Too many incorrect password attempts, exiting")
     sys.exit()
@@ -554,153 +504,189 @@ def check_ready():
 
 def get_all_time_leaderboard():
     """
-    Gets the all-time leaderboard.
+    Prints the all-time leaderboard.
 
-    Args: None
-
-    Returns: leaderboard (list): The all-time leaderboard.
-    """
-    player_stats = load_statistics_from_json(player_file_name)
-    leaderboard = []
-    for stats in player_stats:
-        leaderboard.append({
-            "player_name":stats["player_name"],
-            "win_ratio":round((stats["total_wins"] / stats["total_games"]) * 100, 2),
-            "total_score":stats["total_score"],
-            "total_wins":stats["total_wins"],
-            "total_games":stats["total_games"],
-            "average_score":stats["average_score"],
-            "average_time":stats["average_time"]
-        })
-    leaderboard = sorted(leaderboard, key=lambda x: x["total_score"], reverse=True)
+    Args: None as it uses global variables.
+    """
     print("All Time Leaderboard:")
     print("-"*20)
-    df = pd.DataFrame(leaderboard)
+    with hangman_profile.span("leaderboard.render"):
+        table = load_leaderboard().render(leaderboard_size)
+    print(table)
 
-    print(df)
+def get_weekly_leaderboard(difficulty):
+    """
+    Prints the leaderboard of the last week's games of a difficulty.
 
-# Game Runtime Variables
-#=======================================
-# Welcome Message
-print(f"{"="*20}\nWelcome to Hangman\n{"="*20}")
-play_name = get_player_name()
-# Check if player exists 
-if check_player_exists(play_name) == False:
-    print("Hi new player, lets build your profile")
-    want_password = input("Do you want to set a password? (yes) or Enter to skip: ")
-
-    if want_password.lower() == "yes":
-        new_password = create_password()
-        new_player = new_player_stats(play_name, new_password) # create new player stats with password
-        save_statistics_to_json(player_file_name, new_player) # save new player stats to json
+    Args: difficulty (str): The difficulty name.
+    """
+    print(f"\nThis Week's {difficulty} Leaderboard:")
+    print("-"*20)
+    with hangman_profile.span("leaderboard_windows.render"):
+        table = load_windowed_leaderboards().render("week", difficulty, "score", leaderboard_size)
+    print(table)
 
-    else:
-        new_player = new_player_stats(play_name, "") # create new player stats without password
-        save_statistics_to_json(player_file_name, new_player)  # save new player stats to json
-
-else:
-    print("Welcome back, lets play!")
-    player_login(play_name)
-
-play_again = True
-while play_again == True:
-    # These start here to store time data when program first runs
-    date_time_now = datetime.now()
-    game_open_time = date_time_now.strftime("%d/%m/%y-%H:%M:%S")
-    #=======================================
-    # Global intergers
-    #=======================================
-    word_length = select_difficulty() # get word length
-    check_ready() # pause before game starts
-    hangman_word = get_word(word_length, play_name) # get random word
-    wrong_max = get_wrong_max() # get max wrong guesses
-    # Empty lists to store current game values
-    right_letters = []
-    wrong_letters = []
-    # Lists of runtime Game Data
-    hangman_list = [i for i in hangman_word]
-    alphabet_list = list(string.ascii_lowercase) # list of all alphabet letters
-    hidden_hangman = ["_" for _ in hangman_list] # list of "_" to represent hidden letters
-    # Runtime Game booleans
-    lost = False
+def load_solver(word_length):
+    """
+    Builds the hint engine over the word pool dictionary once per session.
+    Words drawn by hardness can be any length, so a length that isn't a difficulty's is added the first time it is asked for.
+
+    Args: word_length (int): The length of the word the hint is for.
+
+    Returns: HangmanSolver: The hint engine.
+    """
+    global solver
+    buckets = load_word_pool().buckets
+    if solver is None:
+        from hangman_solver import HangmanSolver # imports numpy, only when the first hint is asked for
+        # only the difficulties' lengths, a mapped dictionary reads just those words
+        solver = HangmanSolver({length: list(buckets[length]) for length in set(difficulty_word_length.values()) if length in buckets})
+    if word_length not in solver.tables and word_length in buckets:
+        solver.add_words(word_length, list(buckets[word_length]))
+    return solver
+
+def get_hint(game):
+    """
+    Gets a hint message with the letter most likely to be in the word.
+
+    Args: game (HangmanGame): The game in progress.
+
+    Returns: str: The hint message.
+    """
+    try:
+        letter = load_solver(len(game.hangman_word)).suggest(game.hidden_hangman, game.wrong_letters)
+    except ImportError as e:
+        return f"No hints available: {e}"
+    return f"Hint: try '{letter}'"
+
+def play_game(player_name, word_length, hangman_word, game_open_time):
+    """
+    Plays one game of Hangman in the terminal.
+
+    Args:
+    player_name (str): The player's name.
+    word_length (int): The length of the word to guess.
+    hangman_word (str): The word to guess.
+    game_open_time (str): When the game was started.
+
+    Returns: HangmanGame: The finished game.
+    """
+    game = HangmanGame(hangman_word, get_wrong_max(word_length, difficulty_word_length), score_settings,
+                       player_name, get_word_difficulty(word_length, difficulty_word_length), game_open_time)
+    message = "" # shown above the board on the next turn
     # Main Game Loop
-    start_time = datetime.now() # start timer before main loop (JIC something hangs :/)
     #=======================================
-    while True:
-        # Check Win / Lose Conditions
-        #=======================================     
-        if "_" not in hidden_hangman: # WIN CONDITION
-            clear_terminal()
-            elapsed_time = calc_elapsed_time(start_time, datetime.now())
-            break
-
-        if len(wrong_letters) == wrong_max: # LOSE CONDITION
-            clear_terminal()
-            elapsed_time = calc_elapsed_time(start_time, datetime.now())
-            lost = True
-            break
-
-        # Game Display Per Turn
+    while game.status == PLAYING:
+        # Game Display Per Turn, only the lines that changed are redrawn
         #=======================================
-        # Game Display
-        clear_terminal()
-        print(f"Wrong letters so far: {", ".join(wrong_letters)}\nYou have {str(wrong_max - len(wrong_letters))} tries left.")
-        print(f"Letters remaining: {alphabet_list}")
-        print(f"Current Hangman: {display_hangman_correct()}")
-        print(f"Current Game Time: {calc_elapsed_time(start_time, datetime.now())} seconds")
-        print("="*20)
-        # Debugging
-        if show_word == True:
-            print("Here is the word to guess: (for testing purposes)", hangman_word)
-        # get user input, expected 1 letter or "exit"
-        answer = input("\nType Hangman Letter:\n: ") 
+        with hangman_profile.span("render"):
+            get_renderer().render(get_game_lines(game, message, show_word))
+        # get user input, expected 1 letter or "?" for a hint
+        answer = input("\nType Hangman Letter (or '?' for a hint):\n: ")
         # answer processing
         #=======================================
-        if len(answer) == 1:
-            if answer in wrong_letters or answer in right_letters:
-                clear_terminal()
-                print("already tried, try again")
-            elif answer in hangman_list:
-                clear_terminal()
-                right_letters.append(answer)
-                alphabet_list.remove(answer)
-                display_hangman_correct() 
-            else:
-                clear_terminal()
-                wrong_letters.append(answer)
-                alphabet_list.remove(answer)
+        if answer == "?":
+            message = get_hint(game)
+            continue
+        result = game.guess(answer)
+        if result == GUESS_REPEATED:
+            message = "already tried, try again"
+        elif result == GUESS_INVALID:
+            message = "Invalid Input, try again"
         else:
-            print("Invalid Input, try again")
+            message = ""
+    clear_terminal()
+    return game
 
-    # End Game (print score and save to json)
-    #=======================================
-    # Save Score
-    print("Saving Game Score...")
-    game_stats = calc_score(play_name, lost, wrong_letters, hidden_hangman, hangman_word, elapsed_time)[0]
-    save_statistics_to_json(file_name, game_stats)
+def main():
+    """
+    Runs the Hangman game in the terminal.
 
-    # Update Player Stats
-    print("Updating Player Stats...")
-    update_player_stats(play_name, game_stats)
+    Args: None
 
-    # Display score
-    print(calc_score(play_name, lost, wrong_letters, hidden_hangman, hangman_word, elapsed_time)[1])
+    Returns: None
+    """
+    load_configuration()
+    if config_created == True:
+        print("Config file created, please update the settings in the config file and run the program again")
+    else:
+        print("Config file found, loading settings...")
+    if debug == True:
+        # the summary is printed on exit, relative profile file paths are from the program folder
+        hangman_profile.enable(os.path.join(program_location, profile_file) if profile_file else "", profile_format)
+    # Welcome Message
+    print(f"{'='*20}\nWelcome to Hangman\n{'='*20}")
+    play_name = get_player_name()
+    # Check if player exists 
+    if check_player_exists(play_name) == False:
+        print("Hi new player, lets build your profile")
+        want_password = input("Do you want to set a password? (yes) or Enter to skip: ")
+
+        if want_password.lower() == "yes":
+            new_password = create_password()
+            new_player = new_player_stats(play_name, new_password) # create new player stats with password
+            get_storage().add_player(new_player) # save new player stats
 
-    # Display Leaderboard
-    get_all_time_leaderboard()
+        else:
+            new_player = new_player_stats(play_name, "") # create new player stats without password
+            get_storage().add_player(new_player)  # save new player stats
 
-    # Play Again
-    #=======================================
-    print("\n======================================")
-    play_again = input("Play Again? (yes) or Enter to exit: ")
-    if play_again.lower() == "yes":
-        play_again = True
     else:
-        play_again = False
-        print("Goodbye!")
-        sys.exit()
-
+        print("Welcome back, lets play!")
+        player_login(play_name)
+    # every difficulty's first word is got ready while the player picks one
+    get_word_prefetcher().prefetch(play_name, difficulty_word_length.values())
+
+    play_again = True
+    while play_again == True:
+        # These start here to store time data when program first runs
+        game_open_time = datetime.now().strftime("%d/%m/%y-%H:%M:%S")
+        word_length = select_difficulty() # get word length
+        try:
+            hangman_word = get_word(word_length, play_name) # get random word
+        except WordPoolExhaustedError as e:
+            input(f"{e}, hit 'Enter/Return' to pick another difficulty: ")
+            continue
+        check_ready() # pause before game starts
+        game = play_game(play_name, word_length, hangman_word, game_open_time)
+
+        # End Game (print score and save to json)
+        #=======================================
+        with hangman_profile.span("end_of_game"):
+            # Save Score
+            print("Saving Game Score...")
+            with hangman_profile.span("score"):
+                game_stats, score_summarised = game.score()
+            if debug == True:
+                print(f"time_score: {game_stats['score_time_taken']}\n Calculated by:\t(round time:{round(game_stats['time_taken'])} - grace period) * {score_settings['time_points_multiplier']}")
+
+            # Update Player Stats
+            print("Updating Player Stats...")
+            update_player_stats(play_name, game_stats)
+            if storage_settings["record_guesses"] == True:
+                with hangman_profile.span("record_guesses"):
+                    get_guess_event_log().append(encode_game_record(game, game_stats))
+
+            # Display score
+            print(score_summarised)
+
+            # Display Leaderboard
+            get_all_time_leaderboard()
+            get_weekly_leaderboard(game_stats["word_difficulty"])
+
+        # Play Again
+        #=======================================
+        print("\n======================================")
+        play_again = input("Play Again? (yes) or Enter to exit: ")
+        if play_again.lower() == "yes":
+            play_again = True
+        else:
+            play_again = False
+            print("Goodbye!")
+            sys.exit()
 
+if __name__ == "__main__":
+    main()
 
 """
 Issues:
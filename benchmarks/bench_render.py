@@ -0,0 +1,134 @@
+"""
+Render benchmark for the Hangman board.
+
+Plays games with guesses in letter frequency order and draws the board every
+turn to an in-memory terminal, timing each turn and counting the bytes written
+by the diff renderer against clearing and reprinting the whole board. The cost
+of forking 'clear' like the game used to do is timed separately.
+
+Usage:
+    python benchmarks/bench_render.py --games 1000
+"""
+import argparse # for command line arguments
+import io # for the in-memory terminal
+import json # for json output
+import os # for the project path
+import random # for the synthetic words
+import shutil # for finding clear
+import string # for ascii_lowercase
+import subprocess # for timing clear
+import sys # for the project path
+import time # for timing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hangman_engine import HangmanGame, PLAYING, GUESS_INVALID # game rules
+from hangman_render import ScreenRenderer, get_game_lines, clear_screen_sequence # terminal rendering
+from hangman_solver import letter_frequency_order # letters from most to least common
+
+score_settings = {
+    "correct_letters_multiplier": 100,
+    "wrong_letter_multiplier": 50,
+    "grace_period_multiplier": 5,
+    "time_points_multiplier": 5,
+    "win_multiplier": 500
+}
+
+class FakeClock:
+    """
+    A game clock moving on 1.5 seconds each time it is read, so the time line changes every turn.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.5
+        return self.now
+
+class FullRedraw:
+    """
+    Clears the screen and prints every line each turn, what the game did before the diff renderer.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_written = 0
+
+    def render(self, lines):
+        text = clear_screen_sequence + "\n".join(lines) + "\n"
+        self.stream.write(text)
+        self.stream.flush()
+        self.bytes_written += len(text.encode())
+
+def play_rendered_games(renderer, words, word_length):
+    """
+    Plays a game per word, rendering the board before every guess.
+
+    Args: renderer: The renderer to draw with, words (list): The words to play, word_length (int): The word length.
+
+    Returns: tuple: (turns (int), total render time in seconds (float)).
+    """
+    turns = 0
+    render_time = 0.0
+    for word in words:
+        game = HangmanGame(word, word_length - 1, score_settings, clock=FakeClock())
+        letters = iter(letter_frequency_order)
+        message = ""
+        while game.status == PLAYING:
+            lines = get_game_lines(game, message)
+            start_time = time.perf_counter()
+            renderer.render(lines)
+            render_time += time.perf_counter() - start_time
+            turns += 1
+            message = "" if game.guess(next(letters)) != GUESS_INVALID else "Invalid Input, try again"
+    return turns, render_time
+
+def time_clear_command(runs):
+    """
+    Times forking 'clear' like os.system('clear').
+
+    Args: runs (int): The number of times to run it.
+
+    Returns: float: The average time in milliseconds, None if clear isn't installed.
+    """
+    if runs == 0 or shutil.which("clear") is None:
+        return None
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run(["clear"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=dict(os.environ, TERM=os.environ.get("TERM", "xterm")))
+    return (time.perf_counter() - start_time) / runs * 1000
+
+def main():
+    """
+    Runs the benchmark from the command line and prints the report.
+    """
+    parser = argparse.ArgumentParser(description="Time drawing the Hangman board each turn.")
+    parser.add_argument("--games", type=int, default=1000, help="games to play")
+    parser.add_argument("--word-length", type=int, default=10, help="length of the synthetic words")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic words")
+    parser.add_argument("--clear-runs", type=int, default=50, help="times to fork 'clear', 0 to skip")
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(args.word_length)) for _ in range(args.games)]
+    report = {"games": args.games}
+    for name, renderer in (("diff", ScreenRenderer(io.StringIO(), ansi=True)), ("full_redraw", FullRedraw(io.StringIO()))):
+        turns, render_time = play_rendered_games(renderer, words, args.word_length)
+        report[name] = {
+            "turns": turns,
+            "us_per_turn": round(render_time / turns * 1e6, 2),
+            "bytes_per_turn": round(renderer.bytes_written / turns, 1)
+        }
+    clear_ms = time_clear_command(args.clear_runs)
+    report["fork_clear_ms"] = None if clear_ms is None else round(clear_ms, 3)
+    if args.json:
+        print(json.dumps(report, indent=4))
+        return
+    print(f"Rendered {report['diff']['turns']} turns over {args.games} games")
+    print("-"*20)
+    for name in ("diff", "full_redraw"):
+        print(f"\t{name}: {report[name]['us_per_turn']} us and {report[name]['bytes_per_turn']} bytes per turn")
+    if clear_ms is not None:
+        print(f"\tos.system('clear') used to add {report['fork_clear_ms']} ms per clear on top of the full redraw")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Startup benchmark for Hangman.py.
+
+Starts the game in a new process and times how long it takes for the name
+prompt to appear, the time a player waits before they can type anything.
+The first run fills the settings cache and the OS file cache, so it is
+reported separately from the warm runs.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 20 --target-ms 100
+"""
+import argparse # for command line arguments
+import json # for json output
+import os # for file paths
+import statistics # for the median
+import subprocess # for starting the game
+import sys # for the python executable
+import time # for timing
+
+program_location = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+game_file = os.path.join(program_location, "Hangman.py")
+# text printed by the first prompt of the game
+first_prompt = b"Enter your name"
+
+def time_to_first_prompt():
+    """
+    Starts the game and waits for the name prompt.
+
+    Returns: float: The time to the prompt in milliseconds.
+    """
+    start_time = time.perf_counter()
+    process = subprocess.Popen([sys.executable, game_file], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b""
+    try:
+        while first_prompt not in output:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError(f"Hangman.py exited before the first prompt:\n{output.decode(errors='replace')}")
+            output += chunk
+        return (time.perf_counter() - start_time) * 1000
+    finally:
+        process.kill()
+        process.wait()
+        process.stdout.close()
+        process.stdin.close()
+
+def get_slowest_imports(limit):
+    """
+    Gets the modules imported by Hangman.py that take the longest to import, from python -X importtime.
+
+    Args: limit (int): The number of modules to get.
+
+    Returns: list: (module name, cumulative import time in ms) tuples, slowest first.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import Hangman"], cwd=program_location,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        # modules are indented 2 spaces per level, keep the ones Hangman.py imports directly
+        # as the modules they import are already counted in their time
+        if cumulative.strip().isdigit() and module.startswith("   ") and not module.startswith("     "):
+            imports.append((module.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+
+def main():
+    """
+    Runs the benchmark from the command line and prints the report.
+    """
+    parser = argparse.ArgumentParser(description="Time the Hangman startup to the first prompt.")
+    parser.add_argument("--runs", type=int, default=20, help="warm runs to time")
+    parser.add_argument("--target-ms", type=float, default=100, help="target time to the first prompt")
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    args = parser.parse_args()
+
+    cold_ms = time_to_first_prompt()
+    warm_ms = sorted(time_to_first_prompt() for _ in range(args.runs))
+    report = {
+        "cold_ms": round(cold_ms, 2),
+        "median_ms": round(statistics.median(warm_ms), 2),
+        "min_ms": round(warm_ms[0], 2),
+        "max_ms": round(warm_ms[-1], 2),
+        "target_ms": args.target_ms,
+        "passed": statistics.median(warm_ms) <= args.target_ms,
+        "slowest_imports_ms": dict((module, round(ms, 2)) for module, ms in get_slowest_imports(5))
+    }
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print(f"Time to first prompt over {args.runs} runs")
+        print("-"*20)
+        print(f"\tcold: {report['cold_ms']} ms")
+        print(f"\twarm: median {report['median_ms']} ms (min {report['min_ms']} / max {report['max_ms']})")
+        print(f"\ttarget: {args.target_ms} ms, {'PASSED' if report['passed'] else 'FAILED'}")
+        print("Slowest imports:")
+        for module, ms in report["slowest_imports_ms"].items():
+            print(f"\t{module}: {ms} ms")
+    sys.exit(0 if report["passed"] else 1)
+
+if __name__ == "__main__":
+    main()
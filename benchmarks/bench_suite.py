@@ -0,0 +1,418 @@
+"""
+Storage, word selection and scoring benchmark suite for Hangman.
+
+Builds synthetic game histories in a temporary data directory, from a few
+thousand games up to a million, and times the code behind each step of a game
+as the history grows: loading and saving the game stats, the "already played"
+check, drawing a word, recording a finished game, the all time leaderboard and
+scoring. The peak memory of each step is measured with tracemalloc in a
+separate run so it doesn't slow down the timings. Everything is generated
+locally, no word list download or wonderwords is needed.
+
+Results are written as json with the python version and git commit, so runs
+from two versions of the game can be compared with --compare.
+
+Usage:
+    python benchmarks/bench_suite.py --scales 1000:100,100000:10000 --output results.json
+    python benchmarks/bench_suite.py --scales 1000000:100000 --backends json
+    python benchmarks/bench_suite.py --compare old_results.json
+"""
+import argparse # for command line arguments
+import configparser # for the default settings
+import datetime # for the report time
+import gc # for timing without garbage collection pauses
+import json # for json file handling
+import os # for file paths
+import platform # for the machine details
+import random # for the synthetic histories
+import shutil # for removing the data directories
+import string # for ascii_lowercase
+import subprocess # for the git commit
+import sys # for the project path
+import tempfile # for the data directories
+import time # for timing
+import tracemalloc # for peak memory
+
+program_location = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, program_location)
+from hangman_config import default_config, get_settings # default settings
+from hangman_engine import calc_score # game rules
+from hangman_leaderboard import Leaderboard, leaderboard_file_name # all time leaderboard
+from hangman_players import new_player_stats, add_game_to_player_stats # player stats aggregates
+from hangman_storage import (open_storage, append_statistics_to_log, load_statistics_from_json, save_statistics_to_json,
+                             legacy_file_name, player_dir_name, get_player_file_name) # storage backends
+from hangman_words import WordPool # word pool
+
+# "games:players" pairs run by default, 1000000:100000 is the largest history the suite is meant for
+default_scales = "1000:100,10000:1000,100000:10000"
+# synthetic dictionary words per word length
+dictionary_words_per_length = 20000
+# changes bigger than this are flagged by --compare
+regression_threshold = 0.10
+
+#=======================================
+# Synthetic Data
+#=======================================
+def get_default_settings():
+    """
+    Gets the settings of a new config.ini without reading or writing one.
+
+    Returns: dict: The settings, see hangman_config.get_settings.
+    """
+    config = configparser.ConfigParser()
+    config.read_dict(default_config)
+    return get_settings(config)
+
+def make_dictionary(rng, word_lengths):
+    """
+    Makes random words for each word length.
+
+    Args: rng (random.Random): The random generator, word_lengths (iterable): The word lengths.
+
+    Returns: dict: {word length: list of words}.
+    """
+    return {length: ["".join(rng.choices(string.ascii_lowercase, k=length)) for _ in range(dictionary_words_per_length)]
+            for length in word_lengths}
+
+def make_game(rng, player_name, dictionary, difficulties, score_settings):
+    """
+    Makes a finished game entry with calc_score, like the game saves.
+
+    Args:
+    rng (random.Random): The random generator.
+    player_name (str): The player's name.
+    dictionary (dict): {word length: list of words}.
+    difficulties (list): (difficulty name, word length) pairs.
+    score_settings (dict): The score multipliers.
+
+    Returns: dict: The game statistics entry.
+    """
+    word_difficulty, word_length = rng.choice(difficulties)
+    hangman_word = rng.choice(dictionary[word_length])
+    loss = rng.random() < 0.4
+    found = rng.randint(0, word_length - 1) if loss else word_length
+    hidden_hangman = list(hangman_word[:found]) + ["_"] * (word_length - found)
+    wrong_letters = rng.sample(string.ascii_lowercase, rng.randint(0, word_length - 1))
+    return calc_score(player_name, loss, wrong_letters, hidden_hangman, hangman_word, round(rng.uniform(5, 120), 2),
+                      score_settings, "01/01/24-12:00:00", word_difficulty)[0]
+
+def make_history(rng, games, players, dictionary, difficulties, score_settings):
+    """
+    Makes a game history and the player stats it adds up to.
+
+    Args:
+    rng (random.Random): The random generator.
+    games (int): The number of games.
+    players (int): The number of players.
+    dictionary (dict): {word length: list of words}.
+    difficulties (list): (difficulty name, word length) pairs.
+    score_settings (dict): The score multipliers.
+
+    Returns: tuple: (list) the game statistics entries, (dict) player name: player stats.
+    """
+    difficulty_names = [name for name, _ in difficulties]
+    player_stats = {f"player_{number:06d}": new_player_stats(f"player_{number:06d}", "", difficulty_names) for number in range(players)}
+    player_names = list(player_stats)
+    history = []
+    for _ in range(games):
+        game_stats = make_game(rng, rng.choice(player_names), dictionary, difficulties, score_settings)
+        add_game_to_player_stats(player_stats[game_stats["player_name"]], game_stats)
+        history.append(game_stats)
+    return history, player_stats
+
+def write_history(data_dir, backend, storage_settings, history, player_stats):
+    """
+    Writes a history to a new data directory in the layout the game uses.
+    The json files are written directly without fsync, the backend's own writes are timed later.
+
+    Args:
+    data_dir (str): The data directory.
+    backend (str): "json" or "sqlite".
+    storage_settings (dict): The storage settings.
+    history (list): The game statistics entries.
+    player_stats (dict): Player name: player stats.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    if backend == "json":
+        player_dir = os.path.join(data_dir, player_dir_name)
+        os.makedirs(player_dir, exist_ok=True)
+        for stats in player_stats.values():
+            with open(os.path.join(player_dir, get_player_file_name(stats["player_name"])), mode='w') as file:
+                json.dump(stats, file, indent=4)
+        for start in range(0, len(history), 10000):
+            append_statistics_to_log(os.path.join(data_dir, "hangman_stats.jsonl"), history[start:start + 10000], fsync=False)
+        return
+    storage = open_storage(storage_settings, data_dir, backend)
+    storage.add_players(player_stats.values())
+    for start in range(0, len(history), 10000):
+        storage.add_games(history[start:start + 10000])
+    storage.close()
+
+#=======================================
+# Measuring
+#=======================================
+def measure(function, repeat=1, setup=None):
+    """
+    Times a function and measures its peak memory in a separate run.
+
+    Args:
+    function (callable): The code to measure, called with the result of setup.
+    repeat (int): The number of timed calls, the time reported is the average.
+    setup (callable): Optional untimed call before each run, e.g. opening a fresh storage.
+
+    Returns: dict: {"calls", "seconds" (average per call), "peak_kb"}.
+    """
+    total_time = 0.0
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            argument = setup() if setup is not None else None
+            start_time = time.perf_counter()
+            function(argument)
+            total_time += time.perf_counter() - start_time
+    finally:
+        gc.enable()
+    argument = setup() if setup is not None else None
+    tracemalloc.start()
+    try:
+        function(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"calls": repeat, "seconds": total_time / repeat, "peak_kb": round(peak / 1024, 1)}
+
+def consume(iterable):
+    """
+    Reads every item of an iterable, so lazy loaders do their work.
+
+    Args: iterable (iterable): The items.
+
+    Returns: int: The number of items.
+    """
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+#=======================================
+# Benchmarks
+#=======================================
+def bench_calc_score(rng, dictionary, difficulties, score_settings, calls):
+    """
+    Times calc_score, it doesn't depend on the history so it is run once.
+
+    Returns: list: The results.
+    """
+    games = [make_game(rng, "player", dictionary, difficulties, score_settings) for _ in range(calls)]
+    arguments = [("player", not game["win_bool"], ["q"] * game["total_wrong_letters"], list(game["guessed_word"]), game["hangman_word"],
+                  game["time_taken"], score_settings, game["game_time"], game["word_difficulty"]) for game in games]
+    result = measure(lambda _: [calc_score(*game_arguments) for game_arguments in arguments])
+    result.update(calls=calls, seconds=result["seconds"] / calls)
+    return [dict(benchmark="calc_score", variant="per call", backend="", games=0, players=0, **result)]
+
+def bench_scale(rng, work_dir, backend, games, players, dictionary, difficulties, settings, args):
+    """
+    Builds one history and times every step against it.
+
+    Args:
+    rng (random.Random): The random generator.
+    work_dir (str): The directory to build the data directories in.
+    backend (str): "json" or "sqlite".
+    games (int): The number of games in the history.
+    players (int): The number of players in the history.
+    dictionary (dict): {word length: list of words}.
+    difficulties (list): (difficulty name, word length) pairs.
+    settings (dict): The default settings.
+    args (argparse.Namespace): The command line arguments.
+
+    Returns: list: The results.
+    """
+    storage_settings = dict(settings["storage_settings"], backend=backend)
+    score_settings = settings["score_settings"]
+    data_dir = os.path.join(work_dir, f"{backend}_{games}_{players}")
+    history, player_stats = make_history(rng, games, players, dictionary, difficulties, score_settings)
+    write_history(data_dir, backend, storage_settings, history, player_stats)
+    player_names = list(player_stats)
+    results = []
+
+    def add_result(benchmark, variant, result):
+        results.append(dict(benchmark=benchmark, variant=variant, backend=backend, games=games, players=players, **result))
+        print(f"\t{benchmark} ({variant}): {result['seconds'] * 1000:.3f} ms, peak {result['peak_kb']} KB")
+
+    def fresh_storage():
+        return open_storage(storage_settings, data_dir)
+
+    # load_statistics_from_json / save_statistics_to_json
+    add_result("load_statistics_from_json", "every game", measure(lambda storage: consume(storage.iter_games()), setup=fresh_storage))
+    if backend == "json":
+        log_file_path = os.path.join(data_dir, "hangman_stats.jsonl")
+        add_result("save_statistics_to_json", "log append", measure(
+            lambda _: save_statistics_to_json(log_file_path, make_game(rng, rng.choice(player_names), dictionary, difficulties, score_settings)),
+            repeat=args.calls))
+        if games <= args.legacy_max_games:
+            # the single json list the game used before the log, rewritten on every save
+            legacy_file_path = os.path.join(work_dir, f"legacy_{games}", legacy_file_name)
+            os.makedirs(os.path.dirname(legacy_file_path), exist_ok=True)
+            with open(legacy_file_path, mode='w') as file:
+                json.dump(history, file, indent=4)
+            add_result("load_statistics_from_json", "legacy json list", measure(lambda _: load_statistics_from_json(legacy_file_path)))
+            add_result("save_statistics_to_json", "legacy json list", measure(
+                lambda _: save_statistics_to_json(legacy_file_path, history[0])))
+            shutil.rmtree(os.path.dirname(legacy_file_path))
+
+    # check_word_not_used_for_player
+    if backend == "json":
+        index_file_path = fresh_storage().index_file_path
+        def storage_without_index():
+            if os.path.exists(index_file_path):
+                os.remove(index_file_path)
+            return fresh_storage()
+        add_result("check_word_not_used_for_player", "first check, index rebuilt", measure(
+            lambda storage: storage.word_used(player_names[0], "word"), setup=storage_without_index))
+        add_result("check_word_not_used_for_player", "first check, index loaded", measure(
+            lambda storage: storage.word_used(player_names[0], "word"), setup=fresh_storage))
+    storage = fresh_storage()
+    storage.word_used(player_names[0], "word") # loads the used word index, timed above
+    checks = [(rng.choice(player_names), rng.choice(history)["hangman_word"]) for _ in range(args.calls)]
+    result = measure(lambda _: [storage.word_used(player_name, word) for player_name, word in checks])
+    add_result("check_word_not_used_for_player", "per check", dict(result, calls=args.calls, seconds=result["seconds"] / args.calls))
+
+    # get_word
+    cursor_file_path = os.path.join(data_dir, "word_pool_cursors.json")
+    add_result("load_word_pool", "synthetic dictionary", measure(
+        lambda _: WordPool([word for words in dictionary.values() for word in words], cursor_file_path)))
+    draws = [(rng.choice(difficulties)[1], rng.choice(player_names)) for _ in range(args.calls)]
+    def draw_words(word_pool):
+        for word_length, player_name in draws:
+            word_pool.draw(word_length, player_name, is_used=lambda word: storage.word_used(player_name, word))
+    # a player's first draw of a session shuffles their order of the bucket, later draws only move the cursor
+    word_pool = WordPool([word for words in dictionary.values() for word in words], cursor_file_path)
+    result = measure(draw_words, setup=lambda: WordPool([word for words in dictionary.values() for word in words], cursor_file_path))
+    add_result("get_word", "first draw of a session", dict(result, calls=args.calls, seconds=result["seconds"] / args.calls))
+    draw_words(word_pool)
+    result = measure(draw_words, setup=lambda: word_pool)
+    add_result("get_word", "later draws", dict(result, calls=args.calls, seconds=result["seconds"] / args.calls))
+
+    # get_all_time_leaderboard
+    leaderboard_file_path = os.path.join(data_dir, leaderboard_file_name)
+    add_result("get_all_time_leaderboard", "built from player stats", measure(
+        lambda storage: Leaderboard.build(storage.iter_players(), backend), setup=fresh_storage))
+    leaderboard = Leaderboard.build(storage.iter_players(), backend)
+    leaderboard.save(leaderboard_file_path, storage)
+    add_result("get_all_time_leaderboard", "loaded from file", measure(lambda _: Leaderboard.load(leaderboard_file_path, backend)))
+    add_result("get_all_time_leaderboard", "opened from checkpoint", measure(lambda _: Leaderboard.open(leaderboard_file_path, storage, backend)))
+    add_result("get_all_time_leaderboard", "render top 10", measure(lambda _: leaderboard.render(10), repeat=args.calls))
+
+    # update_player_stats: the commit the persistence worker makes for one game, then the leaderboard update
+    def record_game(_):
+        game_stats = make_game(rng, rng.choice(player_names), dictionary, difficulties, score_settings)
+        storage.record_games([game_stats])
+        leaderboard.add_game(game_stats)
+    add_result("update_player_stats", "one game per commit", measure(record_game, repeat=args.calls))
+    # the games recorded above are read from the log after the checkpoint, the rest of the history isn't
+    add_result("get_all_time_leaderboard", "opened, games recorded since the checkpoint", measure(
+        lambda _: Leaderboard.open(leaderboard_file_path, storage, backend)))
+    storage.close()
+    if not args.keep_data:
+        shutil.rmtree(data_dir)
+    return results
+
+#=======================================
+# Reports
+#=======================================
+def get_git_commit():
+    """
+    Gets the commit the game is at.
+
+    Returns: str: The commit hash, "" if it isn't a git checkout.
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=program_location, capture_output=True, text=True)
+    except OSError:
+        return ""
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+def get_result_key(result):
+    return (result["benchmark"], result["variant"], result["backend"], result["games"], result["players"])
+
+def compare_reports(old_report, new_report, threshold=regression_threshold):
+    """
+    Prints the change in time and peak memory of every benchmark in both reports.
+
+    Args: old_report (dict): The report to compare against, new_report (dict): The latest report, threshold (float): The change to flag.
+
+    Returns: int: The number of benchmarks that got slower by more than the regression threshold.
+    """
+    old_results = {get_result_key(result): result for result in old_report["results"]}
+    regressions = 0
+    print(f"Compared with {old_report['git_commit'][:10] or 'unknown commit'} from {old_report['time']}")
+    print("-"*20)
+    for result in new_report["results"]:
+        old_result = old_results.get(get_result_key(result))
+        if old_result is None or old_result["seconds"] == 0:
+            continue
+        time_change = result["seconds"] / old_result["seconds"] - 1
+        memory_change = result["peak_kb"] - old_result["peak_kb"]
+        flag = ""
+        if time_change > threshold:
+            flag = " SLOWER"
+            regressions += 1
+        elif time_change < -threshold:
+            flag = " faster"
+        print(f"\t{result['benchmark']} ({result['variant']}, {result['backend'] or '-'}, {result['games']}:{result['players']}): "
+              f"{time_change:+.1%} time, {memory_change:+.1f} KB peak{flag}")
+    return regressions
+
+def main():
+    """
+    Runs the suite from the command line and writes the report.
+    """
+    parser = argparse.ArgumentParser(description="Time the Hangman storage, word selection and scoring against synthetic histories.")
+    parser.add_argument("--scales", default=default_scales, help="comma separated games:players histories to build")
+    parser.add_argument("--backends", default="json,sqlite", help="comma separated storage backends to run")
+    parser.add_argument("--calls", type=int, default=200, help="calls timed for the per call benchmarks")
+    parser.add_argument("--legacy-max-games", type=int, default=100000, help="largest history to time the old single json file with")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--work-dir", default=None, help="directory to build the histories in, a temp directory by default")
+    parser.add_argument("--keep-data", action="store_true", help="keep the histories after the run")
+    parser.add_argument("--output", default="bench_suite_results.json", help="file to write the results to")
+    parser.add_argument("--compare", default=None, help="results file from another version to compare with")
+    parser.add_argument("--threshold", type=float, default=regression_threshold, help="time change flagged by --compare, 0.1 is 10%%")
+    args = parser.parse_args()
+
+    scales = [tuple(int(number) for number in scale.split(":")) for scale in args.scales.split(",")]
+    backends = args.backends.split(",")
+    settings = get_default_settings()
+    difficulties = [(key[1], word_length) for key, word_length in settings["difficulty_word_length"].items()]
+    rng = random.Random(args.seed)
+    dictionary = make_dictionary(rng, sorted({word_length for _, word_length in difficulties}))
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="hangman_bench_")
+    results = bench_calc_score(rng, dictionary, difficulties, settings["score_settings"], args.calls)
+    try:
+        for games, players in scales:
+            for backend in backends:
+                print(f"{backend}: {games} games, {players} players")
+                results += bench_scale(rng, work_dir, backend, games, players, dictionary, difficulties, settings, args)
+    finally:
+        if args.work_dir is None and not args.keep_data:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": vars(args),
+        "results": results
+    }
+    with open(args.output, mode='w') as file:
+        json.dump(report, file, indent=4)
+    print(f"Results saved to {args.output}")
+    if args.compare is not None:
+        with open(args.compare, mode='r') as file:
+            old_report = json.load(file)
+        sys.exit(1 if compare_reports(old_report, report, args.threshold) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Columnar game archive for the Hangman game.
+
+Every finished game is appended to one binary file per field in data/archive/.
+Player names, words and difficulties are written once to dictionary files and
+the columns hold their numbers. archive.json records how many games and
+dictionary entries are complete, so an append cut short by a crash is ignored
+and written over by the next one. Appending only needs the standard library,
+the stats report memory maps the columns with NumPy and works out every
+aggregate with array operations instead of parsing a json entry per game.
+
+The archive is a copy of the game stats kept for reports, if it is lost or
+falls behind (e.g. after a migration) rebuild it from the storage.
+
+Usage:
+    python hangman_archive.py stats
+    python hangman_archive.py stats --player bob --json
+    python hangman_archive.py rebuild
+"""
+import array # for writing the columns without numpy
+import json # for the dictionary files and the report
+import os # for file paths
+try:
+    import numpy as np # pip install numpy, only needed to read the archive
+except ImportError:
+    np = None
+from hangman_engine import get_game_timestamp # game_time to seconds since 1970
+from hangman_storage import lock_data_directory, write_json_file # locked atomic writes
+
+# directory in the data directory the archive is kept in
+archive_dir_name = "archive"
+# file recording the complete games and dictionary entries
+meta_file_name = "archive.json"
+# (column, array typecode) of every column, numpy reads the typecodes the same way
+archive_columns = [
+    ("player", "i"),
+    ("word", "i"),
+    ("difficulty", "B"),
+    ("word_length", "B"),
+    ("win", "B"),
+    ("total_score", "i"),
+    ("time_taken", "d"),
+    ("total_wrong_letters", "B"),
+    ("score_wrong_letters", "i"),
+    ("score_time_taken", "i"),
+    ("game_time", "q") # seconds since 1970, 0 if unknown
+]
+# dictionary encoded column: the file of the names its numbers stand for
+dictionary_files = {"player": "players.jsonl", "word": "words.jsonl", "difficulty": "difficulties.jsonl"}
+class GameArchive:
+    """
+    Game statistics stored column by column.
+
+    Args: archive_dir (str): The directory the archive files are kept in.
+    """
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.meta_file_path = os.path.join(archive_dir, meta_file_name)
+        self.dictionaries = {column: {} for column in dictionary_files} # column: {name: number}
+        self.dictionary_offsets = {column: 0 for column in dictionary_files} # bytes of each dictionary file read so far
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def get_column_path(self, column):
+        return os.path.join(self.archive_dir, f"{column}.col")
+
+    def read_meta(self):
+        """
+        Reads the number of complete games and dictionary entries.
+
+        Returns: dict: {"rows": int, "dictionary_bytes": {column: int}}.
+        """
+        try:
+            with open(self.meta_file_path, mode='r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"rows": 0, "dictionary_bytes": {column: 0 for column in dictionary_files}}
+
+    def read_dictionary(self, column, start, end):
+        """
+        Reads names from a dictionary file.
+
+        Args: column (str): The dictionary encoded column, start (int): The byte to read from, end (int): The byte to read to.
+
+        Returns: list: The names, in number order.
+        """
+        if end <= start:
+            return []
+        with open(os.path.join(self.archive_dir, dictionary_files[column]), mode='rb') as file:
+            file.seek(start)
+            return [json.loads(line) for line in file.read(end - start).splitlines()]
+
+    def load_new_dictionary_entries(self, meta):
+        """
+        Adds the dictionary entries written by other processes since the last append.
+        """
+        for column, end in meta["dictionary_bytes"].items():
+            if end < self.dictionary_offsets[column]: # the archive was rebuilt
+                self.dictionaries[column] = {}
+                self.dictionary_offsets[column] = 0
+            names = self.dictionaries[column]
+            for name in self.read_dictionary(column, self.dictionary_offsets[column], end):
+                names[name] = len(names)
+            self.dictionary_offsets[column] = end
+
+    def append(self, games):
+        """
+        Appends finished games, holding the archive lock so several processes can append at once.
+
+        Args: games (list): The game statistics entries.
+        """
+        with lock_data_directory(self.archive_dir):
+            self.write_games(games)
+
+    def write_games(self, games):
+        meta = self.read_meta()
+        self.load_new_dictionary_entries(meta)
+        try:
+            self.write_columns(games, meta)
+        except BaseException:
+            # names numbered in memory may not have been written, read the dictionaries again next time
+            self.dictionaries = {column: {} for column in dictionary_files}
+            self.dictionary_offsets = {column: 0 for column in dictionary_files}
+            raise
+
+    def write_columns(self, games, meta):
+        new_names = {column: [] for column in dictionary_files}
+        columns = {column: array.array(typecode) for column, typecode in archive_columns}
+        for game_stats in games:
+            for column, name in (("player", game_stats["player_name"]), ("word", game_stats["hangman_word"]), ("difficulty", game_stats["word_difficulty"])):
+                names = self.dictionaries[column]
+                if name not in names:
+                    names[name] = len(names)
+                    new_names[column].append(name)
+                columns[column].append(names[name])
+            columns["word_length"].append(len(game_stats["hangman_word"]))
+            columns["win"].append(1 if game_stats["win_bool"] == True else 0)
+            columns["total_score"].append(game_stats["total_score"])
+            columns["time_taken"].append(game_stats["time_taken"])
+            columns["total_wrong_letters"].append(game_stats.get("total_wrong_letters", 0))
+            columns["score_wrong_letters"].append(game_stats.get("score_wrong_letters", 0))
+            columns["score_time_taken"].append(game_stats.get("score_time_taken", 0))
+            columns["game_time"].append(get_game_timestamp(game_stats.get("game_time")))
+        # anything after the recorded sizes is left over from an append that didn't finish, it is written over
+        for column, names in new_names.items():
+            if names:
+                with open(os.path.join(self.archive_dir, dictionary_files[column]), mode='ab') as file:
+                    file.truncate(meta["dictionary_bytes"][column])
+                    file.write("".join(json.dumps(name) + "\n" for name in names).encode())
+                    self.dictionary_offsets[column] = meta["dictionary_bytes"][column] = file.tell()
+        for column, values in columns.items():
+            with open(self.get_column_path(column), mode='ab') as file:
+                file.truncate(meta["rows"] * values.itemsize)
+                file.write(values.tobytes())
+        meta["rows"] += len(games)
+        write_json_file(self.meta_file_path, meta) # the games only count once this is written
+
+    def rebuild(self, games, batch_size=10000):
+        """
+        Replaces the archive with the games from the storage.
+        Games recorded while it runs wait for the archive lock and are added after.
+
+        Args: games (iterable): Every game statistics entry, e.g. storage.iter_games(), batch_size (int): Games written per batch.
+
+        Returns: int: The number of games archived.
+        """
+        count = 0
+        with lock_data_directory(self.archive_dir):
+            for file_name in [f"{column}.col" for column, _ in archive_columns] + list(dictionary_files.values()) + [meta_file_name]:
+                file_path = os.path.join(self.archive_dir, file_name)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            self.dictionaries = {column: {} for column in dictionary_files}
+            self.dictionary_offsets = {column: 0 for column in dictionary_files}
+            batch = []
+            for game_stats in games:
+                batch.append(game_stats)
+                if len(batch) == batch_size:
+                    self.write_games(batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                self.write_games(batch)
+                count += len(batch)
+        return count
+
+    def load(self):
+        """
+        Memory maps the columns, only the games recorded in archive.json are included.
+
+        Returns: dict: Column: numpy array.
+
+        Raises: ImportError: If numpy isn't installed.
+        """
+        if np is None:
+            raise ImportError("numpy is not installed, run 'pip install numpy' to read the game archive")
+        rows = self.read_meta()["rows"]
+        # a column cut short by a crash limits every column to the games it has
+        for column, typecode in archive_columns:
+            column_path = self.get_column_path(column)
+            column_size = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+            rows = min(rows, column_size // np.dtype(typecode).itemsize)
+        columns = {}
+        for column, typecode in archive_columns:
+            if rows == 0:
+                columns[column] = np.zeros(0, dtype=typecode)
+            else:
+                columns[column] = np.memmap(self.get_column_path(column), dtype=typecode, mode='r', shape=(rows,))
+        return columns
+
+    def read_names(self, column):
+        """
+        Reads every name of a dictionary encoded column.
+
+        Args: column (str): The dictionary encoded column, e.g. "difficulty".
+
+        Returns: list: The names, the name of number n at index n.
+        """
+        return self.read_dictionary(column, 0, self.read_meta()["dictionary_bytes"][column])
+
+    def get_number(self, column, name):
+        """
+        Gets the number a name is stored as, without decoding the whole dictionary.
+
+        Args: column (str): The dictionary encoded column, e.g. "player", name (str): The name.
+
+        Returns: int: The number, -1 if the name isn't in the archive.
+        """
+        end = self.read_meta()["dictionary_bytes"][column]
+        if end == 0:
+            return -1
+        with open(os.path.join(self.archive_dir, dictionary_files[column]), mode='rb') as file:
+            lines = file.read(end).split(b"\n")
+        try:
+            return lines.index(json.dumps(name).encode())
+        except ValueError:
+            return -1
+
+#=======================================
+# Reports
+#=======================================
+def get_group_stats(group_numbers, columns):
+    """
+    Totals the games of each group, e.g. each difficulty, with bincount.
+
+    Args: group_numbers (numpy.ndarray): The group of each game, columns (dict): The archive columns.
+
+    Returns: dict: {group number: {games, win_ratio, average_score, average_time, average_wrong_letters}}.
+    """
+    games = np.bincount(group_numbers)
+    totals = {column: np.bincount(group_numbers, weights=columns[column])
+              for column in ("win", "total_score", "time_taken", "total_wrong_letters")}
+    group_stats = {}
+    for group in np.flatnonzero(games):
+        group_stats[int(group)] = {
+            "games": int(games[group]),
+            "win_ratio": round(float(totals["win"][group] / games[group] * 100), 2),
+            "average_score": round(float(totals["total_score"][group] / games[group]), 2),
+            "average_time": round(float(totals["time_taken"][group] / games[group]), 2),
+            "average_wrong_letters": round(float(totals["total_wrong_letters"][group] / games[group]), 2)
+        }
+    return group_stats
+
+def get_archive_stats(archive, player_name=None, histogram_bins=10):
+    """
+    Works out the score distribution, win rate by word length and averages by difficulty.
+
+    Args:
+    archive (GameArchive): The archive.
+    player_name (str): Optional player to report on, everyone by default.
+    histogram_bins (int): The number of score ranges in the histogram.
+
+    Returns: dict: The report, {"games": 0} if there are no games.
+
+    Raises: ImportError: If numpy isn't installed.
+    """
+    columns = archive.load()
+    if player_name is not None:
+        mask = columns["player"] == archive.get_number("player", player_name)
+        columns = {column: values[mask] for column, values in columns.items()}
+    games = len(columns["win"])
+    if games == 0:
+        return {"games": 0}
+    difficulty_names = archive.read_names("difficulty")
+    scores = columns["total_score"]
+    counts, edges = np.histogram(scores, bins=histogram_bins)
+    percentiles = np.percentile(scores, [10, 50, 90])
+    return {
+        "games": games,
+        "players": int(np.count_nonzero(np.bincount(columns["player"]))),
+        "words": int(np.count_nonzero(np.bincount(columns["word"]))),
+        "win_ratio": round(float(np.count_nonzero(columns["win"]) / games * 100), 2),
+        "score": {
+            "mean": round(float(scores.mean()), 2),
+            "stdev": round(float(scores.std()), 2),
+            "min": int(scores.min()),
+            "p10": round(float(percentiles[0]), 2),
+            "median": round(float(percentiles[1]), 2),
+            "p90": round(float(percentiles[2]), 2),
+            "max": int(scores.max()),
+            "histogram": [[round(float(edges[bin]), 1), round(float(edges[bin + 1]), 1), int(counts[bin])] for bin in range(len(counts))]
+        },
+        "by_word_length": {str(word_length): stats for word_length, stats in get_group_stats(columns["word_length"], columns).items()},
+        "by_difficulty": {difficulty_names[number]: stats for number, stats in get_group_stats(columns["difficulty"], columns).items()}
+    }
+
+def format_archive_stats(report):
+    """
+    Formats an archive report as plain text.
+
+    Args: report (dict): The report, see get_archive_stats.
+
+    Returns: str: The report.
+    """
+    if report["games"] == 0:
+        return "No games archived yet"
+    score = report["score"]
+    lines = [
+        f"{report['games']} games by {report['players']} players over {report['words']} words, {report['win_ratio']}% won",
+        "-"*20,
+        "Score:",
+        f"\tmean {score['mean']} (stdev {score['stdev']})",
+        f"\tmin {score['min']} / p10 {score['p10']} / median {score['median']} / p90 {score['p90']} / max {score['max']}"
+    ]
+    largest_count = max(count for _, _, count in score["histogram"]) or 1
+    for low, high, count in score["histogram"]:
+        lines.append(f"\t{low:>9} to {high:>9}: {count:>9} {'#' * round(count / largest_count * 30)}".rstrip())
+    lines.append("Win rate by word length:")
+    for word_length, stats in report["by_word_length"].items():
+        lines.append(f"\t{word_length:>2} letters: {stats['win_ratio']}% of {stats['games']} games")
+    lines.append("By difficulty:")
+    for difficulty, stats in report["by_difficulty"].items():
+        lines.append(f"\t{difficulty}: {stats['games']} games, {stats['win_ratio']}% won, average score {stats['average_score']}, "
+                     f"average time {stats['average_time']}s, average wrong letters {stats['average_wrong_letters']}")
+    return "\n".join(lines)
+
+def main():
+    """
+    Runs the archive tools from the command line.
+    """
+    import argparse # for command line arguments
+    import sys # for exit
+    import time # for timing the report
+    from hangman_config import load_settings, program_location # config.ini handling
+    from hangman_storage import open_storage # json / sqlite storage backends
+    parser = argparse.ArgumentParser(description="Hangman game archive tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="report on every archived game")
+    stats_parser.add_argument("--player", default=None, help="only report on one player's games")
+    stats_parser.add_argument("--json", action="store_true", help="print the report as json")
+    subparsers.add_parser("rebuild", help="archive every game in the storage again")
+    args = parser.parse_args()
+
+    data_dir = os.path.join(program_location, "data")
+    archive = GameArchive(os.path.join(data_dir, archive_dir_name))
+    if args.command == "rebuild":
+        settings, _ = load_settings()
+        storage = open_storage(settings["storage_settings"], data_dir)
+        print("Archiving every game in the storage...")
+        games = archive.rebuild(storage.iter_games())
+        storage.close()
+        print(f"...{games} games archived!")
+        return
+    start_time = time.perf_counter()
+    try:
+        report = get_archive_stats(archive, args.player)
+    except ImportError as e:
+        sys.exit(str(e))
+    report_time = time.perf_counter() - start_time
+    if args.json:
+        print(json.dumps(report, indent=4))
+        return
+    print(format_archive_stats(report))
+    print(f"Report worked out in {report_time * 1000:.1f} ms")
+    if report["games"] == 0 and args.player is None:
+        print("Games played before the archive was added can be archived with 'python hangman_archive.py rebuild'")
+
+if __name__ == "__main__":
+    main()
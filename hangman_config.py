@@ -0,0 +1,200 @@
+"""
+Config file handling for the Hangman game.
+
+Kept free of side effects on import so the engine, tools and front ends can
+all read the same settings from config.ini. load_settings() caches the typed
+settings as json keyed on the config file's size and modified time, so a
+normal start doesn't need configparser at all.
+"""
+import json # for the settings cache
+import os # for file paths
+
+program_location = os.path.dirname(os.path.abspath(__file__))
+config_file = os.path.join(program_location, "config.ini")
+# typed settings saved by load_settings(), rebuilt whenever config.ini changes
+settings_cache_file = os.path.join(program_location, "data", "settings_cache.json")
+# bumped when get_settings() changes, so caches saved by older versions are rebuilt
+settings_cache_version = 8
+
+# settings written to a new config file
+default_config = {
+    "Word Settings": {
+        "easy word length": "8",
+        "normal word length": "10",
+        "hard word length": "15",
+        "word selection": "length",
+        "dictionary file": ""
+    },
+    "Score Multipliers": {
+        "add points per correct letter": "100",
+        "sub points per wrong letter": "50",
+        "allowed seconds per letter": "5",
+        "add/sub points per second to finish": "5",
+        "add points for winning": "500"
+    },
+    "Password Settings": {
+        "min password length": "8",
+        "incorrect password attempts": "3",
+        "password hash": "scrypt",
+        "scrypt cost": "16384",
+        "pbkdf2 iterations": "600000",
+        "hash workers": "2",
+        "session minutes": "30"
+    },
+    "Game Settings": {
+        "clear_screen": "True",
+        "show_word": "True",
+        "debug": "False",
+        "leaderboard size": "10",
+        "profile file": "",
+        "profile format": "json"
+    },
+    "Storage Settings": {
+        "backend": "json",
+        "sqlite file": "hangman.db",
+        "fsync every n games": "1",
+        "checkpoint every n games": "100",
+        "archive games": "True",
+        "record guesses": "True"
+    }
+}
+
+def load_config(config_file=config_file):
+    """
+    Loads the config file, creating it with the default settings if it does not exist.
+
+    Args: config_file (str): The absolute path to the config file.
+
+    Returns: tuple: (configparser.ConfigParser) the config, (bool) True if the config file was created.
+    """
+    import configparser # for config file handling, only needed when the settings cache is out of date
+    config = configparser.ConfigParser()
+    if not os.path.exists(config_file):
+        config.read_dict(default_config)
+        with open(config_file, "w") as file:
+            config.write(file)
+        return config, True
+    config.read(config_file)
+    return config, False
+
+def get_difficulty_word_length(config):
+    """
+    Gets the difficulty map from the config.
+
+    Args: config (configparser.ConfigParser): The config.
+
+    Returns: dict: {(menu number, difficulty name): word length}.
+    """
+    return {
+        ("1", "Easy"): int(config["Word Settings"]["easy word length"]),
+        ("2", "Normal"): int(config["Word Settings"]["normal word length"]),
+        ("3", "Hard"): int(config["Word Settings"]["hard word length"])}
+
+def get_score_settings(config):
+    """
+    Gets the score multipliers from the config.
+
+    Args: config (configparser.ConfigParser): The config.
+
+    Returns: dict: The score multipliers used by hangman_engine.calc_score.
+    """
+    return {
+        "correct_letters_multiplier": int(config["Score Multipliers"]["add points per correct letter"]),
+        "wrong_letter_multiplier": int(config["Score Multipliers"]["sub points per wrong letter"]),
+        "grace_period_multiplier": int(config["Score Multipliers"]["allowed seconds per letter"]),
+        "time_points_multiplier": int(config["Score Multipliers"]["add/sub points per second to finish"]),
+        "win_multiplier": int(config["Score Multipliers"]["add points for winning"])
+    }
+
+def get_storage_settings(config):
+    """
+    Gets the storage settings from the config, older config files without them get the defaults.
+
+    Args: config (configparser.ConfigParser): The config.
+
+    Returns: dict: The storage settings used by hangman_storage.open_storage.
+    """
+    return {
+        "backend": config.get("Storage Settings", "backend", fallback="json"),
+        "sqlite_file": config.get("Storage Settings", "sqlite file", fallback="hangman.db"),
+        "fsync_every_n_games": config.getint("Storage Settings", "fsync every n games", fallback=1),
+        "checkpoint_every_n_games": config.getint("Storage Settings", "checkpoint every n games", fallback=100),
+        "archive_games": config.getboolean("Storage Settings", "archive games", fallback=True),
+        "record_guesses": config.getboolean("Storage Settings", "record guesses", fallback=True)
+    }
+
+def get_credential_settings(config):
+    """
+    Gets the password hash and session settings from the config, older config files without them get the defaults.
+
+    Args: config (configparser.ConfigParser): The config.
+
+    Returns: dict: The settings used by hangman_credentials.CredentialService.
+    """
+    return {
+        "password_hash": config.get("Password Settings", "password hash", fallback="scrypt"),
+        "scrypt_cost": config.getint("Password Settings", "scrypt cost", fallback=16384),
+        "pbkdf2_iterations": config.getint("Password Settings", "pbkdf2 iterations", fallback=600000),
+        "hash_workers": config.getint("Password Settings", "hash workers", fallback=2),
+        "session_minutes": config.getfloat("Password Settings", "session minutes", fallback=30)
+    }
+
+def get_settings(config):
+    """
+    Gets every setting from the config with its type.
+
+    Args: config (configparser.ConfigParser): The config.
+
+    Returns: dict: The settings.
+    """
+    return {
+        "difficulty_word_length": get_difficulty_word_length(config),
+        "word_selection": config.get("Word Settings", "word selection", fallback="length"),
+        "dictionary_file": config.get("Word Settings", "dictionary file", fallback=""),
+        "score_settings": get_score_settings(config),
+        "min_password_length": int(config["Password Settings"]["min password length"]),
+        "incorrect_password_attempts": int(config["Password Settings"]["incorrect password attempts"]),
+        "credential_settings": get_credential_settings(config),
+        "clear_screen": config["Game Settings"].getboolean("clear_screen"),
+        "show_word": config["Game Settings"].getboolean("show_word"),
+        "debug": config["Game Settings"].getboolean("debug"),
+        "leaderboard_size": config.getint("Game Settings", "leaderboard size", fallback=10),
+        "profile_file": config.get("Game Settings", "profile file", fallback=""),
+        "profile_format": config.get("Game Settings", "profile format", fallback="json"),
+        "storage_settings": get_storage_settings(config)
+    }
+
+def load_settings(config_file=config_file, cache_file=settings_cache_file):
+    """
+    Loads the typed settings from the cache, or from the config file if it has changed since the cache was saved.
+    The config file is created with the default settings if it does not exist.
+
+    Args: config_file (str): The absolute path to the config file, cache_file (str): The absolute path to the settings cache.
+
+    Returns: tuple: (dict) the settings, see get_settings, (bool) True if the config file was created.
+    """
+    try:
+        config_stat = os.stat(config_file)
+        with open(cache_file, mode='r') as file:
+            cache = json.load(file)
+        if cache["version"] == settings_cache_version and cache["config_file"] == config_file and cache["size"] == config_stat.st_size and cache["mtime_ns"] == config_stat.st_mtime_ns:
+            settings = cache["settings"]
+            # json has no tuple keys, the difficulty map is saved as [menu number, difficulty name, word length] lists
+            settings["difficulty_word_length"] = {(number, name): word_length for number, name, word_length in settings["difficulty_word_length"]}
+            return settings, False
+    except (OSError, ValueError, KeyError, TypeError):
+        pass # no config file yet, or the cache is missing, unreadable, out of date or from an older version
+    config, created = load_config(config_file)
+    settings = get_settings(config)
+    config_stat = os.stat(config_file)
+    cached_settings = dict(settings, difficulty_word_length=[[number, name, word_length] for (number, name), word_length in settings["difficulty_word_length"].items()])
+    from hangman_storage import get_temp_file_path # temp name unique to the process, only needed when the cache is written
+    temp_file_path = get_temp_file_path(cache_file)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file_path, mode='w') as file:
+            json.dump({"version": settings_cache_version, "config_file": config_file, "size": config_stat.st_size, "mtime_ns": config_stat.st_mtime_ns, "settings": cached_settings}, file)
+        os.replace(temp_file_path, cache_file)
+    except OSError:
+        pass # the settings are still usable, they'll just be parsed again next time
+    return settings, created
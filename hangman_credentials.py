@@ -0,0 +1,228 @@
+"""
+Password hashing and login sessions for the Hangman game.
+
+Passwords are hashed with a salted key derivation function, scrypt or PBKDF2
+set under [Password Settings] with its cost. Saved hashes say how they were
+made, "scrypt$n$r$p$salt$hash" or "pbkdf2_sha256$iterations$salt$hash", so
+the cost can be raised without breaking older hashes. Hashes saved by older
+versions of the game are plain MD5, they and any hash made with other settings
+are rehashed the next time the player logs in with the right password.
+
+A KDF is slow on purpose, so CredentialService hashes and checks passwords on
+a pool of worker threads (hashlib lets go of the GIL while it works) and the
+game or the server's event loop carries on. After a login it hands out a
+session token, checking a token is a dictionary lookup, so logging in again
+with it doesn't pay for the KDF again.
+"""
+import concurrent.futures # for the hashing workers
+import hashlib # for scrypt, PBKDF2 and the old MD5 hashes
+import hmac # for comparing hashes in constant time
+import secrets # for salts and session tokens
+import threading # for the session lock
+import time # for session expiry
+
+# password hash algorithms that can be set under [Password Settings]
+password_hash_algorithms = ("scrypt", "pbkdf2")
+# scrypt block size and parallelism, the cost is set with 'scrypt cost'
+scrypt_block_size = 8
+scrypt_parallelism = 1
+# bytes of salt and of derived key in a hash
+salt_size = 16
+key_size = 32
+
+#=======================================
+# Hashing
+#=======================================
+def get_hash_algorithm(credential_settings):
+    """
+    Gets the algorithm to hash new passwords with, PBKDF2 if this Python's OpenSSL has no scrypt.
+
+    Args: credential_settings (dict): The password hash settings, see hangman_config.get_credential_settings.
+
+    Returns: str: "scrypt" or "pbkdf2".
+    """
+    algorithm = credential_settings["password_hash"]
+    if algorithm not in password_hash_algorithms:
+        raise ValueError(f"Unknown password hash '{algorithm}', expected 'scrypt' or 'pbkdf2'")
+    if algorithm == "scrypt" and not hasattr(hashlib, "scrypt"):
+        return "pbkdf2"
+    return algorithm
+
+def derive_scrypt(password, salt, cost, block_size=scrypt_block_size, parallelism=scrypt_parallelism, length=key_size):
+    """
+    Derives a key from a password with scrypt, it uses 128 * block_size * cost bytes of memory.
+
+    Returns: bytes: The key.
+    """
+    return hashlib.scrypt(password.encode(), salt=salt, n=cost, r=block_size, p=parallelism,
+                          maxmem=256 * block_size * cost, dklen=length)
+
+def derive_pbkdf2(password, salt, iterations, length=key_size):
+    """
+    Derives a key from a password with PBKDF2-HMAC-SHA256.
+
+    Returns: bytes: The key.
+    """
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, dklen=length)
+
+def hash_password(password, credential_settings):
+    """
+    Hashes a password with a new random salt.
+
+    Args: password (str): The password, credential_settings (dict): The password hash settings.
+
+    Returns: str: The hash to save, with its algorithm, cost and salt.
+    """
+    salt = secrets.token_bytes(salt_size)
+    if get_hash_algorithm(credential_settings) == "scrypt":
+        cost = credential_settings["scrypt_cost"]
+        return f"scrypt${cost}${scrypt_block_size}${scrypt_parallelism}${salt.hex()}${derive_scrypt(password, salt, cost).hex()}"
+    iterations = credential_settings["pbkdf2_iterations"]
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${derive_pbkdf2(password, salt, iterations).hex()}"
+
+def hash_password_md5(password):
+    """
+    Hash a password using MD5, how passwords were saved by older versions of the game.
+
+    Args: password (str): The password to hash.
+
+    Returns: str: The hashed password.
+    """
+    return hashlib.md5(password.encode()).hexdigest()
+
+def verify_password(password, password_hash):
+    """
+    Checks a password against a saved hash of any version.
+
+    Args: password (str): The password entered, password_hash (str): The saved hash.
+
+    Returns: bool: True if the password is right.
+    """
+    parts = password_hash.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            key = derive_scrypt(password, bytes.fromhex(parts[4]), int(parts[1]), int(parts[2]), int(parts[3]), len(parts[5]) // 2)
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            key = derive_pbkdf2(password, bytes.fromhex(parts[2]), int(parts[1]), len(parts[3]) // 2)
+        elif len(parts) == 1:
+            return hmac.compare_digest(hash_password_md5(password), password_hash)
+        else:
+            return False
+    except (ValueError, OverflowError):
+        return False # damaged hash
+    return hmac.compare_digest(key.hex(), parts[-1])
+
+def needs_rehash(password_hash, credential_settings):
+    """
+    Checks if a saved hash was made with other settings, e.g. an old MD5 hash or a lower cost.
+
+    Args: password_hash (str): The saved hash, credential_settings (dict): The password hash settings.
+
+    Returns: bool: True if the hash should be replaced after the next right password.
+    """
+    parts = password_hash.split("$")
+    if get_hash_algorithm(credential_settings) == "scrypt":
+        return parts[:4] != ["scrypt", str(credential_settings["scrypt_cost"]), str(scrypt_block_size), str(scrypt_parallelism)]
+    return parts[:2] != ["pbkdf2_sha256", str(credential_settings["pbkdf2_iterations"])]
+
+def check_and_rehash(password, password_hash, credential_settings):
+    """
+    Checks a password and makes a new hash if the saved one is out of date.
+
+    Args: password (str): The password entered, password_hash (str): The saved hash, credential_settings (dict): The password hash settings.
+
+    Returns: tuple: (bool) True if the password is right, (str) the new hash to save, None if it is up to date or the password is wrong.
+    """
+    if not verify_password(password, password_hash):
+        return False, None
+    if needs_rehash(password_hash, credential_settings):
+        return True, hash_password(password, credential_settings)
+    return True, None
+
+#=======================================
+# Service
+#=======================================
+class CredentialService:
+    """
+    Hashes and checks passwords on worker threads and keeps the login sessions.
+    Hashing methods return a concurrent.futures.Future, wait on it with .result(),
+    or with asyncio.wrap_future() on an event loop.
+
+    Args: credential_settings (dict): The password hash and session settings, see hangman_config.get_credential_settings.
+    """
+    def __init__(self, credential_settings):
+        get_hash_algorithm(credential_settings) # raises ValueError for an unknown algorithm straight away
+        self.credential_settings = credential_settings
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=credential_settings["hash_workers"], thread_name_prefix="hangman-credentials")
+        self.sessions = {} # session token: (player name, expiry time)
+        self.session_lock = threading.Lock()
+
+    def hash_password(self, password):
+        """
+        Hashes a new password on a worker thread.
+
+        Returns: concurrent.futures.Future: The hash to save.
+        """
+        return self.executor.submit(hash_password, password, self.credential_settings)
+
+    def check_password(self, player_stats, password):
+        """
+        Checks a password against the player's saved password on a worker thread.
+
+        Args: player_stats (dict): The player stats, password (str): The password entered.
+
+        Returns: concurrent.futures.Future: (bool) True if the password is right or the player has no password,
+        (str) the new hash to save if the saved one is out of date, else None.
+        """
+        if player_stats["player_password"] == "":
+            future = concurrent.futures.Future()
+            future.set_result((True, None))
+            return future
+        return self.executor.submit(check_and_rehash, password, player_stats["player_password"], self.credential_settings)
+
+    # Sessions
+    #=======================================
+    def start_session(self, player_name):
+        """
+        Starts a login session for a player who has logged in.
+
+        Args: player_name (str): The player's name.
+
+        Returns: str: The session token.
+        """
+        token = secrets.token_urlsafe(24)
+        now = time.monotonic()
+        with self.session_lock:
+            for expired_token in [session_token for session_token, (_, expiry_time) in self.sessions.items() if expiry_time < now]:
+                del self.sessions[expired_token]
+            self.sessions[token] = (player_name, now + self.credential_settings["session_minutes"] * 60)
+        return token
+
+    def check_session(self, player_name, token):
+        """
+        Checks a session token, expired tokens are dropped.
+
+        Args: player_name (str): The player's name, token (str): The session token.
+
+        Returns: bool: True if the token is the player's and hasn't expired.
+        """
+        with self.session_lock:
+            session = self.sessions.get(token)
+            if session is None:
+                return False
+            if session[1] < time.monotonic():
+                del self.sessions[token]
+                return False
+        return session[0] == player_name
+
+    def end_session(self, token):
+        """
+        Ends a login session, e.g. when the player's password is changed.
+
+        Args: token (str): The session token.
+        """
+        with self.session_lock:
+            self.sessions.pop(token, None)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
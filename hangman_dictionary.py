@@ -0,0 +1,256 @@
+"""
+Memory mapped word files for the Hangman game.
+
+A word file is a plain text file, one word per line, set with 'dictionary file'
+under [Word Settings] in place of wonderwords. The file is mapped with mmap
+and never loaded into Python objects. The first time a file is used an index
+of it is built and saved in the data directory: the byte offset of every a-z
+word, grouped by word length, with a table of where each length starts. A
+word of a length is then one seek into the index and one into the file, so
+startup time and memory don't grow with the dictionary. The index is built
+again when the file's size or modified time changes.
+
+MappedWordPool draws from the mapped words like WordPool, through each
+player's own order of a length with a saved cursor. The order is a seeded
+permutation worked out one place at a time rather than a shuffled list, so it
+costs no memory however many words there are.
+"""
+import array # for the word offsets while building
+import collections.abc # for the word sequences
+import hashlib # for the index file name and the permutation rounds
+import mmap # for reading the word file and the index
+import os # for file paths
+import struct # for the index file layout
+import sys # for the byte order
+from hangman_storage import get_temp_file_path # temp name unique to the process and thread
+from hangman_words import WordPool # length bucketed word pool
+
+# extension of the index files in the data directory
+index_file_extension = ".dictindex"
+# first bytes of an index file, changed if the layout changes
+index_magic = b"HANGDIC1"
+# magic, size and modified time of the word file, number of word lengths, number of words
+index_header = struct.Struct("<8sQqII")
+# word length, place of its first word, number of its words
+length_entry = struct.Struct("<III")
+# rounds of the permutation, 4 make it look random
+permutation_rounds = 4
+
+#=======================================
+# Index
+#=======================================
+def get_index_file_path(dictionary_path, index_dir):
+    """
+    Gets where a word file's index is saved, each word file gets its own so switching back doesn't build it again.
+
+    Args: dictionary_path (str): The path to the word file, index_dir (str): The directory the index is saved in.
+
+    Returns: str: The absolute path to the index file.
+    """
+    dictionary_path = os.path.abspath(dictionary_path)
+    name = os.path.splitext(os.path.basename(dictionary_path))[0]
+    path_hash = hashlib.sha1(dictionary_path.encode()).hexdigest()[:8]
+    return os.path.join(index_dir, f"{name}.{path_hash}{index_file_extension}")
+
+def build_dictionary_index(dictionary_path, index_file_path):
+    """
+    Reads a word file once and saves the offset of every a-z word grouped by length, file order within a length.
+    Lines that aren't a single plain a-z word after trimming spaces are skipped, upper case is kept in the file and lowered when read.
+    Repeated words are kept, the used word check skips them once played.
+    Layout: header, length entries (sorted by length), word offsets (uint64).
+
+    Args: dictionary_path (str): The path to the word file, index_file_path (str): The absolute path to save the index to.
+
+    Raises: OSError: If the word file can't be read.
+    """
+    offsets_by_length = {} # word length: array of word offsets
+    file_stat = os.stat(dictionary_path)
+    with open(dictionary_path, mode='rb') as file:
+        if file_stat.st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as word_map:
+                line_start = 0
+                for line in iter(word_map.readline, b""):
+                    word = line.strip()
+                    if word.isalpha(): # bytes.isalpha is a-z and A-Z only
+                        offsets = offsets_by_length.get(len(word))
+                        if offsets is None:
+                            offsets = offsets_by_length[len(word)] = array.array("Q")
+                        offsets.append(line_start + len(line) - len(line.lstrip()))
+                    line_start += len(line)
+    os.makedirs(os.path.dirname(index_file_path), exist_ok=True)
+    temp_file_path = get_temp_file_path(index_file_path)
+    with open(temp_file_path, mode='wb') as file:
+        file.write(index_header.pack(index_magic, file_stat.st_size, file_stat.st_mtime_ns, len(offsets_by_length),
+                                     sum(len(offsets) for offsets in offsets_by_length.values())))
+        first_word = 0
+        for word_length in sorted(offsets_by_length):
+            file.write(length_entry.pack(word_length, first_word, len(offsets_by_length[word_length])))
+            first_word += len(offsets_by_length[word_length])
+        for word_length in sorted(offsets_by_length):
+            offsets = offsets_by_length[word_length]
+            if sys.byteorder == "big":
+                offsets.byteswap() # the index is little endian
+            offsets.tofile(file)
+    os.replace(temp_file_path, index_file_path)
+
+class MappedBucket(collections.abc.Sequence):
+    """
+    The words of one length of a MappedDictionary, read from the file as they are asked for.
+
+    Args: dictionary (MappedDictionary): The dictionary, word_length (int): The word length, first_word (int): The index place of its first word, word_count (int): The number of its words.
+    """
+    def __init__(self, dictionary, word_length, first_word, word_count):
+        self.dictionary = dictionary
+        self.word_length = word_length
+        self.first_word = first_word
+        self.word_count = word_count
+
+    def __len__(self):
+        return self.word_count
+
+    def __getitem__(self, number):
+        if not -self.word_count <= number < self.word_count:
+            raise IndexError("word number out of range")
+        return self.dictionary.read_word(self.first_word + number % self.word_count, self.word_length)
+
+class MappedDictionary:
+    """
+    A word file read through mmap with a saved index of its words by length.
+
+    Args:
+    dictionary_path (str): The path to the word file, one word per line.
+    index_dir (str): The directory the index is saved in, the data directory.
+
+    Raises: OSError: If the word file can't be read.
+    """
+    def __init__(self, dictionary_path, index_dir):
+        self.dictionary_path = dictionary_path
+        self.index_file_path = get_index_file_path(dictionary_path, index_dir)
+        self.word_map = None # empty word files can't be mapped
+        self.index_map = None
+        self.open_index()
+        if os.path.getsize(dictionary_path) > 0:
+            with open(dictionary_path, mode='rb') as file:
+                self.word_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def open_index(self):
+        """
+        Maps the saved index, building it first if it is missing, damaged or from an older version of the word file.
+        """
+        file_stat = os.stat(self.dictionary_path)
+        for attempt in range(2):
+            if attempt == 1 or not os.path.exists(self.index_file_path):
+                print(f"Building word index for {self.dictionary_path}...")
+                build_dictionary_index(self.dictionary_path, self.index_file_path)
+            with open(self.index_file_path, mode='rb') as file:
+                if os.fstat(file.fileno()).st_size < index_header.size:
+                    continue # damaged, built again
+                index_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, size, modified_time, length_count, self.word_total = index_header.unpack_from(index_map)
+            self.offsets_start = index_header.size + length_count * length_entry.size
+            if (magic == index_magic and (size, modified_time) == (file_stat.st_size, file_stat.st_mtime_ns)
+                    and len(index_map) == self.offsets_start + self.word_total * 8):
+                self.index_map = index_map
+                self.buckets = {} # word length: MappedBucket
+                for entry in range(length_count):
+                    word_length, first_word, word_count = length_entry.unpack_from(index_map, index_header.size + entry * length_entry.size)
+                    self.buckets[word_length] = MappedBucket(self, word_length, first_word, word_count)
+                return
+            index_map.close()
+        raise OSError(f"Could not build a word index for {self.dictionary_path}")
+
+    def __len__(self):
+        return self.word_total
+
+    def read_word(self, place, word_length):
+        """
+        Reads a word by its place in the index.
+
+        Args: place (int): The place of the word in the index, word_length (int): Its length.
+
+        Returns: str: The lower case word.
+        """
+        offset = struct.unpack_from("<Q", self.index_map, self.offsets_start + place * 8)[0]
+        return self.word_map[offset:offset + word_length].decode("ascii").lower()
+
+    def close(self):
+        for shared_map in (self.word_map, self.index_map):
+            if shared_map is not None:
+                shared_map.close()
+        self.word_map = self.index_map = None
+
+#=======================================
+# Word Pool
+#=======================================
+class PermutedBucket(collections.abc.Sequence):
+    """
+    A seeded shuffle of a bucket worked out one place at a time, without a list of the words.
+    Each place goes through a small keyed Feistel network over the next even power of two
+    above the bucket size and is run again until it lands inside the bucket, so every word
+    has exactly one place.
+
+    Args: bucket (collections.abc.Sequence): The words, seed (str): The shuffle seed, the same seed gives the same order.
+    """
+    def __init__(self, bucket, seed):
+        self.bucket = bucket
+        self.key = hashlib.sha1(seed.encode()).digest()
+        self.half_bits = max(1, (max(len(bucket) - 1, 1).bit_length() + 1) // 2)
+        self.half_mask = (1 << self.half_bits) - 1
+
+    def __len__(self):
+        return len(self.bucket)
+
+    def permute(self, number):
+        """
+        Gets the bucket place of a place in the shuffled order.
+        """
+        while True:
+            left, right = number >> self.half_bits, number & self.half_mask
+            for round_number in range(permutation_rounds):
+                round_hash = hashlib.blake2b(right.to_bytes(8, "little"), digest_size=8, key=self.key, person=bytes([round_number]) * 16).digest()
+                left, right = right, left ^ (int.from_bytes(round_hash, "little") & self.half_mask)
+            number = (left << self.half_bits) | right
+            if number < len(self.bucket):
+                return number
+
+    def __getitem__(self, number):
+        if not 0 <= number < len(self.bucket):
+            raise IndexError("word number out of range")
+        return self.bucket[self.permute(number)]
+
+class MappedWordPool(WordPool):
+    """
+    WordPool over a MappedDictionary, each player's order of a length is a PermutedBucket
+    rather than a shuffled list, so drawing loads only the words drawn.
+
+    Args: dictionary (MappedDictionary): The dictionary, cursor_file_path (str): The absolute path to the json file the draw cursors are saved in.
+    """
+    def __init__(self, dictionary, cursor_file_path):
+        super().__init__((), cursor_file_path)
+        self.dictionary = dictionary
+        self.buckets = dictionary.buckets
+
+    def player_order(self, player_name, word_length):
+        """
+        Gets the player's order of the words of one length, seeded by the player's name so it is the same every session.
+
+        Args: player_name (str): The player's name, word_length (int): The length of the words.
+
+        Returns: PermutedBucket: The player's order.
+        """
+        key = (player_name, word_length)
+        if key not in self.orders:
+            self.orders[key] = PermutedBucket(self.buckets.get(word_length, ()), f"{player_name}:{word_length}")
+        return self.orders[key]
+
+def open_word_pool(words, cursor_file_path):
+    """
+    Makes the word pool for a dictionary, a MappedWordPool for a MappedDictionary else a WordPool.
+
+    Args: words (MappedDictionary or iterable): The dictionary, cursor_file_path (str): The absolute path to the cursor file.
+
+    Returns: WordPool: The word pool.
+    """
+    if isinstance(words, MappedDictionary):
+        return MappedWordPool(words, cursor_file_path)
+    return WordPool(words, cursor_file_path)
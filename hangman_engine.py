@@ -0,0 +1,333 @@
+"""
+Hangman game engine.
+
+HangmanGame holds the state of one game and applies the rules. It does no I/O
+and reads no globals, so the terminal front end, bots, tests and servers can
+all drive games through the same object.
+
+Guesses are kept as bit masks of the letters and the hidden word is updated
+from an index of each letter's positions, so a guess doesn't loop over the
+alphabet or the word.
+
+Every right or wrong guess is also recorded as a guess event, a few bytes
+with the letter, whether it was right and the milliseconds since the last
+guess on the monotonic game clock. The time taken is worked out from those
+milliseconds, so hangman_replay can play a recorded game again and get the
+same score.
+"""
+import datetime # for game times
+import string # for ascii_lowercase
+import time # for the game clock
+
+# results returned by HangmanGame.guess()
+GUESS_RIGHT = "right"
+GUESS_WRONG = "wrong"
+GUESS_REPEATED = "repeated"
+GUESS_INVALID = "invalid"
+# values of HangmanGame.status
+PLAYING = "playing"
+WON = "won"
+LOST = "lost"
+# letter: bit of the letter in the HangmanGame letter masks
+letter_bits = {letter: 1 << code for code, letter in enumerate(string.ascii_lowercase)}
+# accepted guesses: the lower case letter, upper case letters are treated as lower case
+guess_letters = {**{letter: letter for letter in string.ascii_lowercase}, **{letter.upper(): letter for letter in string.ascii_lowercase}}
+# format of game_time in the game statistics entries
+game_time_format = "%d/%m/%y-%H:%M:%S"
+# added to the letter number (0 = 'a') of a guess event when the guess was right
+guess_event_right = 0x80
+
+def append_varint(buffer, value):
+    """
+    Appends a non-negative int to a bytearray in 7 bit groups, lowest first, so small numbers take one byte.
+
+    Args: buffer (bytearray): The buffer, value (int): The number.
+    """
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def get_wrong_max(word_length, difficulty_word_length):
+    """
+    Gets the maximum number of wrong guesses allowed.
+    Easy Words: 1 more than the word length
+    Normal Words: 1 less than the word length
+    Hard Words: 4 less than the word length
+
+    Args: word_length (int): The length of the word, difficulty_word_length (dict): The difficulty map.
+
+    Returns: int: The maximum number of wrong guesses allowed.
+    """
+    lengths = {key[1]: value for key, value in difficulty_word_length.items()}
+    if word_length == lengths["Easy"]:
+        return lengths["Easy"] + 1
+    elif word_length == lengths["Normal"]:
+        return lengths["Normal"] - 1
+    elif word_length == lengths["Hard"]:
+        return lengths["Normal"] - 4
+
+def get_word_difficulty(word_length, difficulty_word_length):
+    """
+    Gets the name of the difficulty for a word length.
+
+    Args: word_length (int): The length of the word, difficulty_word_length (dict): The difficulty map.
+
+    Returns: str: The difficulty name, e.g. "Easy".
+    """
+    return [key[1] for key, value in difficulty_word_length.items() if value == word_length][0]
+
+def calc_elapsed_time(start_time, end_time):
+    """
+    Calculates the time taken to complete the game.
+
+    Args: start_time (float) - The start time of the game in seconds, end_time (float) - The end time of the game in seconds.
+
+    Returns: elapsed_time_seconds (float(round 2 places)): The time taken to complete the game in seconds.
+    """
+    return round(end_time - start_time, 2)
+
+def get_game_timestamp(game_time):
+    """
+    Converts the game_time of a game statistics entry to seconds since 1970.
+
+    Args: game_time (str): When the game was started, "%d/%m/%y-%H:%M:%S".
+
+    Returns: int: The timestamp, 0 if the time is missing or unreadable.
+    """
+    try:
+        return int(datetime.datetime.strptime(game_time, game_time_format).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+def calc_score(name, loss, wrong_letters, hidden_hangman, hangman_word, elapsed_time, score_settings, game_time="", word_difficulty=""):
+    """
+    calculates the score of the game based on:
+    # + points for correct letters guessed (per letter in hidden_hangman)
+    # - points for wrong letters (per letter in wrong_letters)
+    # - points for time taken after grace period
+
+    Args:
+        name (str): the player's name
+        loss (bool): True if the game was lost
+        wrong_letters (list): list of wrong letters
+        hidden_hangman (list): the hangman word with correct letters filled in
+        hangman_word (str): the word to guess
+        elapsed_time (float): the time taken to complete the game
+        score_settings (dict): the score multipliers, see hangman_config.get_score_settings
+        game_time (str): when the game was started, "%d/%m/%y-%H:%M:%S"
+        word_difficulty (str): the difficulty name of the word
+
+    returns: list: dictionary of the score data, string: formatted score summary
+    """
+    correct_letters_multiplier = score_settings["correct_letters_multiplier"]
+    wrong_letter_multiplier = score_settings["wrong_letter_multiplier"]
+    win_multiplier = score_settings["win_multiplier"]
+    grace_period = len(hangman_word) * score_settings["grace_period_multiplier"] # grace period in seconds
+
+    # if player is faster than grace period
+    if round(elapsed_time) < grace_period: # round to an integer
+        time_score = (grace_period - round(elapsed_time)) * score_settings["time_points_multiplier"]
+        time_string = f"\t+{time_score} pts for faster than grace period.\n"
+
+    # if player is slower than grace period
+    elif round(elapsed_time) > grace_period:
+        time_score = -(round(elapsed_time) - grace_period) * score_settings["time_points_multiplier"]
+        time_string = f"\t{time_score} pts for slower than grace period.\n"
+
+    # if player is average
+    else:
+        time_score = 0
+        time_string = f"\t{time_score} pts for being an average guesser.\n"
+
+    # BASIC CALCULATIONS
+    correct_letters_score = (len(hidden_hangman) - hidden_hangman.count("_")) * correct_letters_multiplier # number of correct guessed letters calculated
+    wrong_letters_score = len(wrong_letters) * wrong_letter_multiplier # number of wrong letters calculated
+
+    # TOTAL SCORE TRACKING
+    total_score = 0 # start with 0 points
+    total_score += correct_letters_score # add correct letter score
+    total_score -= wrong_letters_score # subtract wrong letter score
+    total_score += time_score # add time score
+
+    if loss == True:
+        win = False
+        finished = "Lost"
+    else:
+        total_score += win_multiplier
+        win = True
+        finished = "Won"
+
+    score_summarised = (
+                        f"YOU {finished}!\nHangman word was: {hangman_word.upper()}\n"
+                        f"Score Summarised:\n"
+                        f"{'#'*20}\n"
+                        f"\t  0 pts baseline\n"
+                        "Additional Scores:\n"
+                        f"\t+ {correct_letters_score} pts (+{correct_letters_multiplier} pts per correct letter in '{hangman_word}')\n"
+                        f"\t{('+ ' + str(win_multiplier) + ' pts for winning') if win else '0 pts for losing'}\n"
+                        "Penalties:\n"
+                        f"\t- {wrong_letters_score} pts (-{wrong_letter_multiplier} per wrong letters, '{','.join(wrong_letters)}')\n"
+                        "Time Penalties/Bonuses:\n"
+                        f"{time_string}"
+                        "Total Score:\n"
+                        f"\t= {total_score} pts\n"
+                        f"{'#'*20}\n"
+                        )
+    return ({
+        "player_name":name,
+        "win_bool":win,
+        "total_score":total_score,
+        "game_time":game_time,
+        "hangman_word":hangman_word,
+        "guessed_word":"".join(hidden_hangman),
+        "word_difficulty":word_difficulty,
+        "score_wrong_letters":wrong_letters_score,
+        "total_wrong_letters":len(wrong_letters),
+        "time_taken":elapsed_time,
+        "score_time_taken":time_score
+            }, score_summarised)
+
+class HangmanGame:
+    """
+    The state and rules of a single game of Hangman.
+
+    The positions of each letter in the word are worked out once, guessed, right
+    and wrong letters are 26 bit masks (bit 0 = 'a') and the number of hidden
+    letters is counted down, so a guess only touches the places its letter is at.
+    guess_events holds a byte per right or wrong guess, the letter number plus
+    guess_event_right if it was right, each followed by the milliseconds since the
+    last guess (since the start for the first) as a varint, see append_varint.
+    __slots__ keeps each game small when many are in memory, e.g. on a server.
+
+    Args:
+    hangman_word (str): The word to guess.
+    wrong_max (int): The maximum number of wrong guesses allowed.
+    score_settings (dict): The score multipliers, see hangman_config.get_score_settings.
+    player_name (str): The player's name, saved with the score.
+    word_difficulty (str): The difficulty name of the word, saved with the score.
+    game_time (str): When the game was started, saved with the score.
+    clock (callable): Returns the current time in seconds, time.monotonic by default.
+    """
+    __slots__ = ("hangman_word", "wrong_max", "score_settings", "player_name", "word_difficulty", "game_time", "clock",
+                 "letter_positions", "hidden_hangman", "hidden_count", "guessed_mask", "right_mask", "wrong_mask",
+                 "right_letters", "wrong_letters", "start_time", "end_time", "guess_events", "elapsed_ms")
+
+    def __init__(self, hangman_word, wrong_max, score_settings, player_name="", word_difficulty="", game_time="", clock=time.monotonic):
+        self.hangman_word = hangman_word
+        self.wrong_max = wrong_max
+        self.score_settings = score_settings
+        self.player_name = player_name
+        self.word_difficulty = word_difficulty
+        self.game_time = game_time
+        self.clock = clock
+        # letter: positions of the letter in the word
+        self.letter_positions = {}
+        for position, letter in enumerate(hangman_word):
+            self.letter_positions.setdefault(letter, []).append(position)
+        # Runtime Game Data
+        self.hidden_hangman = ["_"] * len(hangman_word) # "_" for letters not guessed yet
+        self.hidden_count = len(hangman_word) # number of "_" left in hidden_hangman
+        self.guessed_mask = 0
+        self.right_mask = 0
+        self.wrong_mask = 0
+        self.right_letters = [] # in the order they were guessed
+        self.wrong_letters = []
+        self.start_time = clock()
+        self.end_time = None
+        self.guess_events = bytearray()
+        self.elapsed_ms = 0 # milliseconds from the start to the last guess
+
+    @property
+    def status(self):
+        """
+        The status of the game, PLAYING, WON or LOST.
+        """
+        if self.hidden_count == 0: # WIN CONDITION
+            return WON
+        if self.wrong_max is not None and len(self.wrong_letters) >= self.wrong_max: # LOSE CONDITION
+            return LOST
+        return PLAYING
+
+    @property
+    def tries_left(self):
+        """
+        The number of wrong guesses left before the game is lost.
+        """
+        return self.wrong_max - len(self.wrong_letters)
+
+    @property
+    def alphabet_list(self):
+        """
+        The letters not tried yet, in alphabetical order.
+        """
+        return [letter for letter, bit in letter_bits.items() if not self.guessed_mask & bit]
+
+    def guess(self, letter):
+        """
+        Guesses a letter.
+
+        Args: letter (str): The letter to guess, upper case letters are treated as lower case.
+
+        Returns: str: GUESS_RIGHT, GUESS_WRONG, GUESS_REPEATED or GUESS_INVALID (not a single a-z letter or the game is over).
+        """
+        letter = guess_letters.get(letter)
+        if letter is None or self.status != PLAYING:
+            return GUESS_INVALID
+        bit = letter_bits[letter]
+        if self.guessed_mask & bit:
+            return GUESS_REPEATED
+        self.guessed_mask |= bit
+        positions = self.letter_positions.get(letter)
+        if positions is not None:
+            self.right_mask |= bit
+            self.right_letters.append(letter)
+            for position in positions:
+                self.hidden_hangman[position] = letter
+            self.hidden_count -= len(positions)
+            result = GUESS_RIGHT
+        else:
+            self.wrong_mask |= bit
+            self.wrong_letters.append(letter)
+            result = GUESS_WRONG
+        guess_time = self.clock()
+        guess_ms = max(round((guess_time - self.start_time) * 1000), self.elapsed_ms)
+        self.guess_events.append(ord(letter) - 97 + (guess_event_right if result == GUESS_RIGHT else 0))
+        append_varint(self.guess_events, guess_ms - self.elapsed_ms)
+        self.elapsed_ms = guess_ms
+        if self.status != PLAYING:
+            self.end_time = guess_time # stop the clock as soon as the game is over
+        return result
+
+    def elapsed_time(self):
+        """
+        Gets the time taken so far, or to finish the game once it is over.
+
+        Returns: float: The time in seconds rounded to 2 places.
+        """
+        if self.end_time is not None:
+            return calc_elapsed_time(0, self.elapsed_ms / 1000) # the recorded time, the same when the game is replayed
+        return calc_elapsed_time(self.start_time, self.clock())
+
+    def score(self, elapsed_time=None):
+        """
+        Scores the game with calc_score.
+
+        Args: elapsed_time (float): Optional time taken to use instead of the game clock, e.g. for simulated games.
+
+        Returns: tuple: (dict) the score data, (str) the formatted score summary.
+        """
+        if elapsed_time is None:
+            elapsed_time = self.elapsed_time()
+        return calc_score(self.player_name, self.status != WON, self.wrong_letters, self.hidden_hangman, self.hangman_word,
+                          elapsed_time, self.score_settings, self.game_time, self.word_difficulty)
+
+    def to_record(self, elapsed_time=None):
+        """
+        Gets the game statistics entry saved to the game stats log.
+
+        Args: elapsed_time (float): Optional time taken to use instead of the game clock.
+
+        Returns: dict: The game statistics entry.
+        """
+        return self.score(elapsed_time)[0]
@@ -0,0 +1,332 @@
+"""
+Word hardness index for the Hangman game.
+
+Word length is a poor guide to how hard a word is, a long word of common letters
+falls quickly while a short word of rare letters doesn't. The index gives every
+dictionary word a hardness score from:
+    - how many wrong guesses the hint solver makes before it knows the word,
+    - how many candidate words the solver still has after its first guesses,
+    - how rare the word's letters are in the dictionary,
+    - how few distinct letters it has (fewer letters to find means fewer right guesses).
+Each part is ranked against the whole dictionary and the ranks are weighted.
+
+The solver part plays the hint strategy against every word of a length at
+once: words answering a guess the same way stay in a group and get the same
+next guess, so the dictionary is walked as one decision tree rather than a
+game per word.
+
+Building needs numpy and is done once, offline. The index file holds the words
+sorted from easiest to hardest with their offsets and scores, so the game maps
+it with mmap and difficulty tiers draw a random word from a range of it in
+constant time, without loading the dictionary.
+
+Usage:
+    python hangman_hardness.py build
+    python hangman_hardness.py show --words 10
+"""
+import hashlib # for the dictionary hash
+import math # for letter rarity
+import mmap # for reading the index
+import os # for file paths
+import random # for drawing words
+import struct # for the index file layout
+from hangman_solver import HangmanSolver, letter_frequency_order, np # hint solver, np is None without numpy
+from hangman_dictionary import PermutedBucket # shuffled order worked out one place at a time
+from hangman_words import WordPoolExhaustedError # raised when a player has played every word of a tier
+
+# file name for the index in the data directory
+hardness_index_file_name = "hardness_index.bin"
+# first bytes of an index file, changed if the layout changes
+index_magic = b"HANGHRD1"
+# magic, word count, size of the words, sha1 of the dictionary
+index_header = struct.Struct("<8sII20s")
+# weight of each part of the hardness score, they add up to 1
+hardness_weights = {
+    "solver_wrong_guesses": 0.5,
+    "candidates_left": 0.2,
+    "letter_rarity": 0.2,
+    "few_distinct_letters": 0.1
+}
+# guesses the solver makes before the candidates left are counted
+probe_guesses = 3
+# random words tried before a tier is searched through the player's shuffled order for an unplayed word
+max_random_draws = 32
+
+#=======================================
+# Building
+#=======================================
+def get_dictionary_hash(words):
+    """
+    Gets a hash of a dictionary, to tell if an index was built from it.
+
+    Args: words (iterable): The dictionary words, repeats count once.
+
+    Returns: bytes: The 20 byte sha1 of the sorted words.
+    """
+    return hashlib.sha1("\n".join(sorted(set(words))).encode()).digest()
+
+def play_solver_tree(solver, word_length):
+    """
+    Plays the solver's strategy against every word of a length.
+    Each group of words that answered every guess so far the same way gets the
+    letter found in the most of them, ties going to the more common letter in
+    English text, like HangmanSolver.suggest.
+
+    Args: solver (HangmanSolver): The solver, word_length (int): The word length.
+
+    Returns: tuple: (numpy.ndarray) the wrong guesses made before knowing each word, (numpy.ndarray) the candidates left after probe_guesses guesses.
+    """
+    words, position_masks, letter_masks, _ = solver.tables[word_length]
+    wrong_guesses = np.zeros(len(words), dtype=np.int32)
+    candidates_left = np.ones(len(words), dtype=np.int32)
+    # breaks ties between letters found in as many words, more common letters first
+    tie_breaks = np.array([25 - letter_frequency_order.index(chr(97 + code)) for code in range(26)], dtype=np.int64)
+    # groups of word numbers: (word numbers, guessed letter bits, wrong guesses so far, guesses so far)
+    groups = [(np.arange(len(words)), 0, 0, 0)]
+    while groups:
+        word_numbers, guessed_bits, wrong_count, guess_count = groups.pop()
+        if len(word_numbers) == 1:
+            # only one word left, the solver knows it and guesses the rest right
+            wrong_guesses[word_numbers] = wrong_count
+            continue
+        letter_counts = solver.count_letters(letter_masks[word_numbers]).astype(np.int64)
+        unguessed = ((guessed_bits >> np.arange(26)) & 1) == 0
+        scores = np.where(unguessed & (letter_counts > 0), letter_counts * 32 + tie_breaks, -1)
+        letter = int(scores.argmax())
+        if scores[letter] < 0:
+            wrong_guesses[word_numbers] = wrong_count # every letter found, can't happen for different words
+            continue
+        answers = position_masks[letter, word_numbers]
+        answer_values, answer_groups = np.unique(answers, return_inverse=True)
+        for group_number, answer in enumerate(answer_values):
+            group = word_numbers[answer_groups == group_number]
+            if guess_count + 1 == probe_guesses:
+                candidates_left[group] = len(group)
+            groups.append((group, guessed_bits | (1 << letter), wrong_count + (answer == 0), guess_count + 1))
+    return wrong_guesses, candidates_left
+
+def get_ranks(values):
+    """
+    Ranks values from 0 for the lowest to 1 for the highest, equal values get the same rank.
+
+    Args: values (numpy.ndarray): The values.
+
+    Returns: numpy.ndarray: The ranks.
+    """
+    if len(values) < 2:
+        return np.zeros(len(values))
+    sorted_values = np.sort(values)
+    lower = np.searchsorted(sorted_values, values, side="left")
+    upper = np.searchsorted(sorted_values, values, side="right") - 1
+    return (lower + upper) / 2 / (len(values) - 1)
+
+def compute_hardness(words_by_length):
+    """
+    Scores every dictionary word from 0 (easiest) to 1 (hardest).
+
+    Args: words_by_length (dict): {word length: list of lower case a-z words}, see hangman_words.bucket_words_by_length.
+
+    Returns: tuple: (list) the words, (numpy.ndarray) their hardness, (dict) part name: numpy.ndarray of each word's part before ranking.
+
+    Raises: ImportError: If numpy isn't installed.
+    """
+    solver = HangmanSolver(words_by_length) # raises ImportError without numpy
+    all_words = [word for word_length in sorted(solver.tables) for word in solver.tables[word_length][0].tolist()]
+    # share of the dictionary words with each letter
+    letter_shares = {letter: sum(letter in word for word in all_words) / len(all_words) for letter in letter_frequency_order}
+    parts = {"solver_wrong_guesses": [], "candidates_left": [], "letter_rarity": [], "few_distinct_letters": []}
+    for word_length in sorted(solver.tables):
+        wrong_guesses, candidates_left = play_solver_tree(solver, word_length)
+        parts["solver_wrong_guesses"].append(wrong_guesses)
+        parts["candidates_left"].append(np.log2(candidates_left))
+    for word in all_words:
+        distinct_letters = set(word)
+        parts["letter_rarity"].append(sum(-math.log2(letter_shares[letter]) for letter in distinct_letters) / len(distinct_letters))
+        parts["few_distinct_letters"].append(-len(distinct_letters))
+    parts = {name: np.concatenate(values) if isinstance(values[0], np.ndarray) else np.array(values, dtype=float)
+             for name, values in parts.items()}
+    hardness = sum(weight * get_ranks(parts[name]) for name, weight in hardness_weights.items())
+    return all_words, hardness, parts
+
+def write_hardness_index(file_path, words, hardness, dictionary_hash):
+    """
+    Writes the index, the words sorted from easiest to hardest.
+    Layout: header, word offsets (uint32, one more than the words), hardness (float32), the words (ascii).
+
+    Args:
+    file_path (str): The absolute path to the index file.
+    words (list): The words.
+    hardness (numpy.ndarray): The hardness of each word.
+    dictionary_hash (bytes): The hash of the dictionary the index is built from, see get_dictionary_hash.
+    """
+    order = np.argsort(hardness, kind="stable")
+    sorted_words = [words[number] for number in order]
+    word_bytes = "".join(sorted_words).encode("ascii")
+    offsets = np.zeros(len(sorted_words) + 1, dtype="<u4")
+    np.cumsum([len(word) for word in sorted_words], out=offsets[1:])
+    temp_file_path = file_path + ".tmp"
+    with open(temp_file_path, mode='wb') as file:
+        file.write(index_header.pack(index_magic, len(sorted_words), len(word_bytes), dictionary_hash))
+        file.write(offsets.tobytes())
+        file.write(hardness[order].astype("<f4").tobytes())
+        file.write(word_bytes)
+    os.replace(temp_file_path, file_path)
+
+#=======================================
+# Reading
+#=======================================
+class HardnessIndex:
+    """
+    Words sorted from easiest to hardest, read from the index file through mmap.
+
+    Args: file_path (str): The absolute path to the index file, dictionary_hash (bytes): Optional hash of the dictionary in use, see get_dictionary_hash.
+
+    Raises: OSError: If the file can't be read, ValueError: If it isn't a hardness index or was built from another dictionary.
+    """
+    def __init__(self, file_path, dictionary_hash=None):
+        with open(file_path, mode='rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < index_header.size:
+            raise ValueError(f"{file_path} is not a word hardness index")
+        magic, self.word_count, words_size, self.dictionary_hash = index_header.unpack_from(self.map)
+        self.offsets_start = index_header.size
+        self.hardness_start = self.offsets_start + (self.word_count + 1) * 4
+        self.words_start = self.hardness_start + self.word_count * 4
+        if magic != index_magic or len(self.map) != self.words_start + words_size:
+            raise ValueError(f"{file_path} is not a word hardness index, run 'python hangman_hardness.py build'")
+        if dictionary_hash is not None and dictionary_hash != self.dictionary_hash:
+            self.map.close()
+            raise ValueError(f"{file_path} was built from another dictionary, run 'python hangman_hardness.py build'")
+        self.search_orders = {} # (player name, tier, tier count): [PermutedBucket of the tier's places, place the last search stopped at]
+
+    def __len__(self):
+        return self.word_count
+
+    def word(self, number):
+        """
+        Gets a word by its place from the easiest.
+        """
+        start, end = struct.unpack_from("<II", self.map, self.offsets_start + number * 4)
+        return self.map[self.words_start + start:self.words_start + end].decode("ascii")
+
+    def hardness(self, number):
+        """
+        Gets the hardness of a word by its place from the easiest.
+        """
+        return struct.unpack_from("<f", self.map, self.hardness_start + number * 4)[0]
+
+    def tier_range(self, tier, tier_count):
+        """
+        Gets the places of the words in a difficulty tier, the tiers split the words evenly from easiest to hardest.
+
+        Args: tier (int): The tier, 0 is the easiest, tier_count (int): The number of tiers.
+
+        Returns: tuple: The (first, last + 1) places of the tier's words.
+        """
+        return self.word_count * tier // tier_count, self.word_count * (tier + 1) // tier_count
+
+    def draw(self, tier, tier_count, is_used=None, rng=random, player_name=""):
+        """
+        Draws a random word of a difficulty tier in constant time.
+        If random draws keep finding played words the tier is mostly played, so it is searched through
+        a shuffled order of the tier, a new one for each player every session, and the player's later
+        draws carry on from where that search stopped rather than searching the played words again.
+
+        Args:
+        tier (int): The tier, 0 is the easiest.
+        tier_count (int): The number of tiers.
+        is_used (callable): Optional check for words the player has already played, those are skipped.
+        rng (random.Random): The random generator.
+        player_name (str): The player drawing, each player searches their own order.
+
+        Returns: str: The word.
+
+        Raises: WordPoolExhaustedError: If every word of the tier has been played.
+        """
+        start, end = self.tier_range(tier, tier_count)
+        if start == end:
+            raise WordPoolExhaustedError(f"There are no words in difficulty tier {tier + 1}")
+        order_key = (player_name, tier, tier_count)
+        if order_key not in self.search_orders:
+            for _ in range(max_random_draws):
+                word = self.word(rng.randrange(start, end))
+                if is_used is None or not is_used(word):
+                    return word
+            self.search_orders[order_key] = [PermutedBucket(range(start, end), f"{player_name}:{rng.getrandbits(64)}"), 0]
+        order, first = self.search_orders[order_key]
+        for place in range(first, len(order)):
+            word = self.word(order[place])
+            if is_used is None or not is_used(word):
+                self.search_orders[order_key][1] = place
+                return word
+        raise WordPoolExhaustedError(f"Every word of difficulty tier {tier + 1} has been played")
+
+    def close(self):
+        self.map.close()
+
+def main():
+    """
+    Builds or shows the word hardness index from the command line.
+    """
+    import argparse # for command line arguments
+    import sys # for exit
+    import time # for timing the build
+    from hangman_config import load_settings, program_location # config.ini handling, program folder
+    from hangman_words import bucket_words_by_length, load_dictionary # dictionary loading and bucketing
+    parser = argparse.ArgumentParser(description="Hangman word hardness index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="score every dictionary word and write the index")
+    build_parser.add_argument("--words", default=None, help="word file to use instead of wonderwords or 'dictionary file', one word per line")
+    build_parser.add_argument("--min-length", type=int, default=4, help="shortest word to include")
+    build_parser.add_argument("--force", action="store_true", help="build the index even if it is up to date")
+    show_parser = subparsers.add_parser("show", help="show the easiest and hardest words of each tier")
+    show_parser.add_argument("--tiers", type=int, default=3, help="number of difficulty tiers")
+    show_parser.add_argument("--words", type=int, default=5, help="words to show from each end of a tier")
+    parser.add_argument("--index", default=os.path.join(program_location, "data", hardness_index_file_name), help="index file")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        words_file = args.words
+        dictionary_file = load_settings()[0]["dictionary_file"]
+        if words_file is None and dictionary_file:
+            words_file = os.path.join(program_location, dictionary_file) # the game's word file
+        all_words_by_length = bucket_words_by_length(load_dictionary(words_file))
+        words_by_length = {word_length: words for word_length, words in all_words_by_length.items() if word_length >= args.min_length}
+        # the whole dictionary, so the game can check the index against its word pool
+        dictionary_hash = get_dictionary_hash(word for words in all_words_by_length.values() for word in words)
+        try:
+            index = HardnessIndex(args.index)
+            up_to_date = index.dictionary_hash == dictionary_hash
+            index.close()
+        except (OSError, ValueError):
+            up_to_date = False
+        if up_to_date and not args.force:
+            print(f"{args.index} is already built from this dictionary, use --force to build it again")
+            return
+        print(f"Scoring {sum(len(words) for words in words_by_length.values())} words...")
+        start_time = time.perf_counter()
+        try:
+            words, hardness, _ = compute_hardness(words_by_length)
+        except ImportError as e:
+            sys.exit(str(e))
+        os.makedirs(os.path.dirname(args.index), exist_ok=True)
+        write_hardness_index(args.index, words, hardness, dictionary_hash)
+        print(f"...index of {len(words)} words written to {args.index} in {time.perf_counter() - start_time:.1f}s!")
+        return
+    try:
+        index = HardnessIndex(args.index)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Could not read the index: {e}")
+    print(f"{len(index)} words from easiest to hardest")
+    print("-"*20)
+    for tier in range(args.tiers):
+        start, end = index.tier_range(tier, args.tiers)
+        if start == end:
+            continue
+        print(f"Tier {tier + 1} (hardness {index.hardness(start):.3f} to {index.hardness(end - 1):.3f}, {end - start} words):")
+        print(f"\teasiest: {', '.join(index.word(number) for number in range(start, min(end, start + args.words)))}")
+        print(f"\thardest: {', '.join(index.word(number) for number in range(max(start, end - args.words), end))}")
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,616 @@
+"""
+All time leaderboard for the Hangman game.
+
+Leaderboard keeps one row per player ranked by total score in a list sorted
+with bisect, so recording a game moves one player's row in O(log n) and
+showing the top players never reloads the player stats. It is saved to
+leaderboard.json in the data directory as a checkpoint with the storage log
+offset it is up to date with. Opening it adds only the games recorded after
+that offset, and it is rebuilt from the player stats when the file is missing,
+unreadable or was built from another backend or log. Saving reads the file
+again and catches it up from the storage's game log, so sessions running at
+the same time never count a game twice or lose one.
+
+WindowedLeaderboards serves boards for the last day, the last week and all
+time, overall or for one difficulty, ranked by score, win ratio or average
+time. Every game is added to an hourly bucket as it is saved and to the
+running totals of each board it counts for, each kept ranked by every metric
+with bisect. When an hour falls out of a window its bucket is taken off that
+window's boards, so showing the top K of any board is a slice of its ranking,
+however many games have been played. The buckets of the last week and the
+all time totals are saved as a checkpoint in leaderboard_windows.json.
+
+Usage:
+    python hangman_leaderboard.py --window week --difficulty Hard --metric win_ratio
+"""
+import bisect # for the sorted ranking
+import os # for file paths
+import time # for the board windows
+from hangman_engine import get_game_timestamp # game_time to seconds since 1970
+from hangman_players import get_averages # averages derived from the aggregates
+from hangman_storage import lock_data_directory, read_checkpoint, write_checkpoint # locked atomic checkpoint files
+import hangman_profile # timing spans, on when debug is set
+
+# file name for the saved leaderboard
+leaderboard_file_name = "leaderboard.json"
+# lock file held while the leaderboard is saved, separate from the storage's so saving can read the storage
+leaderboard_lock_file_name = "leaderboard.lock"
+# file name for the saved day, week and all time boards
+windows_file_name = "leaderboard_windows.json"
+# board window: hours of games it covers, None for every game
+board_windows = {"day": 24, "week": 24 * 7, "all": None}
+# metrics the boards are ranked by
+board_metrics = ("score", "win_ratio", "average_time")
+
+# columns printed by Leaderboard.render(): (heading, row key, width)
+leaderboard_columns = [
+    ("Rank", "rank", 4),
+    ("Player", "player_name", 16),
+    ("Win %", "win_ratio", 7),
+    ("Score", "total_score", 9),
+    ("Wins", "total_wins", 6),
+    ("Games", "total_games", 6),
+    ("Avg Score", "average_score", 10),
+    ("Avg Time", "average_time", 9)
+]
+
+def get_ranking_key(row):
+    """
+    Gets the sort key of a leaderboard row, highest total score first then by name.
+
+    Args: row (dict): The leaderboard row.
+
+    Returns: tuple: The sort key.
+    """
+    return (-row["total_score"], row["player_name"])
+
+def new_row(player_name):
+    """
+    Gets an empty leaderboard row.
+
+    Args: player_name (str): The player's name.
+
+    Returns: dict: The row.
+    """
+    return {"player_name":player_name, "total_score":0, "total_wins":0, "total_games":0, "total_time":0}
+
+def format_leaderboard(rows):
+    """
+    Formats leaderboard rows as a plain text table.
+
+    Args: rows (list): The rows, best first, see Leaderboard.top.
+
+    Returns: str: The table.
+    """
+    lines = [" ".join(f"{heading:>{width}}" for heading, _, width in leaderboard_columns)]
+    for row in rows:
+        lines.append(" ".join(f"{str(row[key])[:width]:>{width}}" for _, key, width in leaderboard_columns))
+    if len(lines) == 1:
+        lines.append("No games played yet")
+    return "\n".join(lines)
+
+def get_game_change(game_stats):
+    """
+    Gets the amount a finished game adds to each total of a leaderboard row.
+
+    Args: game_stats (dict): The game statistics entry.
+
+    Returns: dict: The change.
+    """
+    return {
+        "total_score":game_stats["total_score"],
+        "total_wins":1 if game_stats["win_bool"] == True else 0,
+        "total_games":1,
+        "total_time":game_stats["time_taken"]
+    }
+
+def add_to_row(row, change):
+    """
+    Adds a change to the totals of a leaderboard row.
+
+    Args: row (dict): The row, change (dict): The amount to add to each total.
+    """
+    for key, value in change.items():
+        row[key] = round(row[key] + value, 2) if key == "total_time" else row[key] + value
+
+class Leaderboard:
+    """
+    Players ranked by total score.
+
+    Args: backend (str): The storage backend the rows were built from, e.g. "json", log_offset (int): The storage log offset the rows are up to date with.
+    """
+    def __init__(self, backend="", log_offset=0):
+        self.backend = backend
+        self.log_offset = log_offset
+        self.rows = {} # player name: {player_name, total_score, total_wins, total_games, total_time}
+        self.ranking = [] # ranking keys of every row, best first
+        self.changed = False # True if there are changes to save
+
+    def update(self, player_stats):
+        """
+        Adds or moves a player's row after their stats change.
+
+        Args: player_stats (dict): The player's stats, see hangman_players.new_player_stats.
+        """
+        row = {
+            "player_name":player_stats["player_name"],
+            "total_score":player_stats["total_score"],
+            "total_wins":player_stats["total_wins"],
+            "total_games":player_stats["total_games"],
+            "total_time":player_stats["total_time"]
+        }
+        old_row = self.rows.get(row["player_name"])
+        if old_row is not None:
+            del self.ranking[bisect.bisect_left(self.ranking, get_ranking_key(old_row))]
+        bisect.insort(self.ranking, get_ranking_key(row))
+        self.rows[row["player_name"]] = row
+        self.changed = True
+
+    def add_game(self, game_stats, log_offset=None):
+        """
+        Adds a finished game to the player's row.
+        The saved leaderboard gets the game from the storage's log, so the game must be recorded there too.
+
+        Args: game_stats (dict): The game statistics entry, log_offset (int): Optional log offset of the game, it is skipped if the leaderboard already has it.
+
+        Returns: bool: True if the game was added.
+        """
+        if log_offset is not None:
+            if log_offset <= self.log_offset:
+                return False
+            self.log_offset = log_offset
+        player_name = game_stats["player_name"]
+        row = dict(self.rows.get(player_name) or new_row(player_name))
+        add_to_row(row, get_game_change(game_stats))
+        self.update(row)
+        return True
+
+    def catch_up(self, storage):
+        """
+        Adds the games the storage recorded after the leaderboard's log offset.
+
+        Args: storage (JsonStorage or SqliteStorage): The storage the leaderboard was built from.
+
+        Returns: int: The number of games added.
+        """
+        games = 0
+        for game_stats, log_offset in storage.iter_games_after(self.log_offset):
+            games += self.add_game(game_stats, log_offset)
+        return games
+
+    def top(self, limit):
+        """
+        Gets the best players with their averages.
+
+        Args: limit (int): The number of players to get.
+
+        Returns: list: The leaderboard rows, best first, with rank, win_ratio, average_score and average_time added.
+        """
+        top_rows = []
+        for rank, (_, player_name) in enumerate(self.ranking[:limit], start=1):
+            row = self.rows[player_name]
+            top_rows.append({"rank":rank, **row, **get_averages(row["total_games"], row["total_wins"], row["total_score"], row["total_time"])})
+        return top_rows
+
+    def render(self, limit):
+        """
+        Formats the best players as a plain text table.
+
+        Args: limit (int): The number of players to show.
+
+        Returns: str: The table.
+        """
+        return format_leaderboard(self.top(limit))
+
+    def save(self, file_path, storage):
+        """
+        Saves the leaderboard if it has changed, through a temp file so a crash can't leave it half written.
+        The saved file is opened again and caught up from the storage, so games other sessions saved
+        since this one opened it are kept and games still waiting to be recorded are added by the next open.
+
+        Args: file_path (str): The absolute path to the leaderboard file, storage (JsonStorage or SqliteStorage): The storage.
+        """
+        if not self.changed:
+            return
+        with lock_data_directory(os.path.dirname(file_path), leaderboard_lock_file_name):
+            saved = Leaderboard.open(file_path, storage, self.backend)
+            write_checkpoint(file_path, saved.log_offset, {"backend":self.backend, "players":list(saved.rows.values())})
+        self.rows, self.ranking, self.log_offset = saved.rows, saved.ranking, saved.log_offset
+        self.changed = False
+
+    @classmethod
+    def load(cls, file_path, backend, log_offset=None):
+        """
+        Loads a saved leaderboard.
+
+        Args:
+        file_path (str): The absolute path to the leaderboard file.
+        backend (str): The storage backend in use.
+        log_offset (int): Optional end of the storage's log, a leaderboard past it was built from another log and isn't loaded.
+
+        Returns: Leaderboard: The leaderboard, None if the file is missing, unreadable or from another backend or log.
+        """
+        data = read_checkpoint(file_path, float("inf") if log_offset is None else log_offset)
+        try:
+            if data["backend"] != backend:
+                return None
+            leaderboard = cls(backend, data["log_offset"])
+            leaderboard.rows = {row["player_name"]: row for row in data["players"]}
+        except (KeyError, TypeError):
+            return None
+        leaderboard.ranking = sorted(get_ranking_key(row) for row in leaderboard.rows.values())
+        return leaderboard
+
+    @classmethod
+    def build(cls, players, backend, log_offset=0):
+        """
+        Builds a leaderboard from every player's stats.
+
+        Args: players (iterable): The player stats, backend (str): The storage backend they come from, log_offset (int): The storage log offset the stats are up to date with.
+
+        Returns: Leaderboard: The leaderboard.
+        """
+        leaderboard = cls(backend, log_offset)
+        for player_stats in players:
+            leaderboard.update(player_stats)
+        return leaderboard
+
+    @classmethod
+    def open(cls, file_path, storage, backend):
+        """
+        Loads the saved leaderboard and adds the games recorded since it was saved, so only those are read.
+        It is built from the player stats if it can't be loaded, see load.
+
+        Args: file_path (str): The absolute path to the leaderboard file, storage (JsonStorage or SqliteStorage): The storage, backend (str): The storage backend.
+
+        Returns: Leaderboard: The leaderboard, up to date with the storage.
+        """
+        leaderboard = cls.load(file_path, backend, storage.get_log_offset())
+        if leaderboard is None:
+            with hangman_profile.span("leaderboard.build"):
+                log_offset, players = storage.get_players_snapshot()
+                leaderboard = cls.build(players, backend, log_offset)
+        with hangman_profile.span("leaderboard.catch_up"):
+            if leaderboard.catch_up(storage) > 0:
+                leaderboard.changed = True
+        return leaderboard
+
+#=======================================
+# Windowed Boards
+#=======================================
+def get_board_key(metric, row):
+    """
+    Gets the sort key of a row on a board, best first.
+    Score: highest first. Win ratio: highest first, then by score. Average time: fastest first, then by score.
+
+    Args: metric (str): The metric, see board_metrics, row (dict): The leaderboard row.
+
+    Returns: tuple: The sort key, the player's name last.
+    """
+    if metric == "win_ratio":
+        return (-row["total_wins"] / row["total_games"], -row["total_score"], row["player_name"])
+    if metric == "average_time":
+        return (row["total_time"] / row["total_games"], -row["total_score"], row["player_name"])
+    return (-row["total_score"], row["player_name"])
+
+def get_change(totals):
+    """
+    Gets a change from a list of totals, the compact form the boards are saved in.
+
+    Args: totals (list): [total_score, total_wins, total_games, total_time].
+
+    Returns: dict: The change.
+    """
+    return dict(zip(("total_score", "total_wins", "total_games", "total_time"), totals))
+
+class RankedBoard:
+    """
+    The running totals of the players on one board, ranked by every board metric.
+    """
+    def __init__(self):
+        self.rows = {} # player name: {player_name, total_score, total_wins, total_games, total_time}
+        self.rankings = {metric: [] for metric in board_metrics} # metric: ranking keys of every row, best first
+
+    def add(self, player_name, change):
+        """
+        Adds to a player's totals and moves their row, a row left with no games is taken off the board.
+
+        Args: player_name (str): The player's name, change (dict): The amount to add to each total, negative to take games off.
+        """
+        old_row = self.rows.get(player_name)
+        if old_row is not None:
+            for metric, ranking in self.rankings.items():
+                del ranking[bisect.bisect_left(ranking, get_board_key(metric, old_row))]
+        row = dict(old_row or new_row(player_name))
+        add_to_row(row, change)
+        if row["total_games"] <= 0:
+            self.rows.pop(player_name, None)
+            return
+        self.rows[player_name] = row
+        for metric, ranking in self.rankings.items():
+            bisect.insort(ranking, get_board_key(metric, row))
+
+    def top(self, metric, limit):
+        """
+        Gets the best players by a metric with their averages.
+
+        Args: metric (str): The metric, see board_metrics, limit (int): The number of players to get.
+
+        Returns: list: The leaderboard rows, best first, see Leaderboard.top.
+        """
+        top_rows = []
+        for rank, key in enumerate(self.rankings[metric][:limit], start=1):
+            row = self.rows[key[-1]]
+            top_rows.append({"rank":rank, **row, **get_averages(row["total_games"], row["total_wins"], row["total_score"], row["total_time"])})
+        return top_rows
+
+class WindowedLeaderboards:
+    """
+    Day, week and all time boards, overall and per difficulty, kept up to date one game at a time.
+
+    Args:
+    backend (str): The storage backend the boards were built from, e.g. "json".
+    log_offset (int): The storage log offset the boards are up to date with.
+    clock (callable): Returns the current time in seconds, time.time by default.
+    """
+    def __init__(self, backend="", log_offset=0, clock=time.time):
+        self.backend = backend
+        self.log_offset = log_offset
+        self.clock = clock
+        self.boards = {} # (window, difficulty name or "" for every difficulty): RankedBoard
+        self.hours = {} # hour since 1970: {(difficulty name, player name): change}, only the hours of the longest window
+        self.current_hour = int(clock() // 3600)
+        self.longest_window = max(hours for hours in board_windows.values() if hours is not None)
+        self.changed = False # True if there are changes to save
+
+    def get_board(self, window, difficulty=""):
+        """
+        Gets a board, an empty one if no game has counted for it yet.
+
+        Args: window (str): "day", "week" or "all", difficulty (str): The difficulty name, "" for every difficulty.
+
+        Returns: RankedBoard: The board.
+        """
+        if window not in board_windows:
+            raise ValueError(f"Unknown leaderboard window '{window}', expected {', '.join(board_windows)}")
+        if (window, difficulty) not in self.boards:
+            self.boards[(window, difficulty)] = RankedBoard()
+        return self.boards[(window, difficulty)]
+
+    def add_change(self, hour, difficulty, player_name, change, windows=board_windows):
+        """
+        Adds a change to its hour and to the boards of every window the hour is in.
+
+        Args:
+        hour (int): The hour since 1970 the games were played in.
+        difficulty (str): The difficulty name of the games.
+        player_name (str): The player's name.
+        change (dict): The amount to add to each total.
+        windows (iterable): The windows to add it to, every window by default.
+        """
+        if hour > self.current_hour - self.longest_window:
+            hour_change = self.hours.setdefault(hour, {}).setdefault((difficulty, player_name), dict.fromkeys(change, 0))
+            add_to_row(hour_change, change)
+        for window in windows:
+            hours = board_windows[window]
+            if hours is None or hour > self.current_hour - hours:
+                self.get_board(window).add(player_name, change)
+                if difficulty:
+                    self.get_board(window, difficulty).add(player_name, change)
+
+    def add_game(self, game_stats, log_offset=None, windows=board_windows):
+        """
+        Adds a finished game to the boards.
+
+        Args:
+        game_stats (dict): The game statistics entry.
+        log_offset (int): Optional log offset of the game, it is skipped if the boards already have it.
+        windows (iterable): The windows to add it to, every window by default.
+
+        Returns: bool: True if the game was added.
+        """
+        if log_offset is not None:
+            if log_offset <= self.log_offset:
+                return False
+            self.log_offset = log_offset
+        self.advance()
+        # a game with no time, or from a clock ahead of this one, counts as played now
+        game_hour = get_game_timestamp(game_stats.get("game_time")) // 3600 or self.current_hour
+        self.add_change(min(game_hour, self.current_hour), game_stats.get("word_difficulty", ""), game_stats["player_name"],
+                        get_game_change(game_stats), windows)
+        self.changed = True
+        return True
+
+    def advance(self):
+        """
+        Moves the windows on to the current hour. The hours that fall out of a window
+        are taken off its boards and hours older than every window are dropped.
+        """
+        hour_now = int(self.clock() // 3600)
+        if hour_now <= self.current_hour:
+            return
+        for window, hours in board_windows.items():
+            if hours is None:
+                continue
+            for hour in [hour for hour in self.hours if self.current_hour - hours < hour <= hour_now - hours]:
+                for (difficulty, player_name), change in self.hours[hour].items():
+                    removed = {key: -value for key, value in change.items()}
+                    self.get_board(window).add(player_name, removed)
+                    if difficulty:
+                        self.get_board(window, difficulty).add(player_name, removed)
+        for hour in [hour for hour in self.hours if hour <= hour_now - self.longest_window]:
+            del self.hours[hour]
+        self.current_hour = hour_now
+        self.changed = True
+
+    def catch_up(self, storage):
+        """
+        Adds the games the storage recorded after the boards' log offset.
+
+        Args: storage (JsonStorage or SqliteStorage): The storage the boards were built from.
+
+        Returns: int: The number of games added.
+        """
+        games = 0
+        for game_stats, log_offset in storage.iter_games_after(self.log_offset):
+            games += self.add_game(game_stats, log_offset)
+        return games
+
+    def top(self, window, difficulty="", metric="score", limit=10):
+        """
+        Gets the best players of a board.
+
+        Args:
+        window (str): "day", "week" or "all".
+        difficulty (str): The difficulty name, "" for every difficulty.
+        metric (str): "score", "win_ratio" or "average_time".
+        limit (int): The number of players to get.
+
+        Returns: list: The leaderboard rows, best first, see Leaderboard.top.
+        """
+        if metric not in board_metrics:
+            raise ValueError(f"Unknown leaderboard metric '{metric}', expected {', '.join(board_metrics)}")
+        self.advance()
+        return self.get_board(window, difficulty).top(metric, limit)
+
+    def render(self, window, difficulty="", metric="score", limit=10):
+        """
+        Formats the best players of a board as a plain text table, see top.
+
+        Returns: str: The table.
+        """
+        return format_leaderboard(self.top(window, difficulty, metric, limit))
+
+    def save(self, file_path, storage):
+        """
+        Saves the boards if they have changed, like Leaderboard.save the saved file is opened
+        again and caught up from the storage, so games saved by other sessions are kept.
+
+        Args: file_path (str): The absolute path to the boards file, storage (JsonStorage or SqliteStorage): The storage.
+        """
+        if not self.changed:
+            return
+        with lock_data_directory(os.path.dirname(file_path), leaderboard_lock_file_name):
+            saved = WindowedLeaderboards.open(file_path, storage, self.backend, self.clock)
+            write_checkpoint(file_path, saved.log_offset, {
+                "backend":self.backend,
+                "all":[[difficulty, row["player_name"], row["total_score"], row["total_wins"], row["total_games"], row["total_time"]]
+                       for (window, difficulty), board in saved.boards.items() if window == "all" for row in board.rows.values()],
+                "hours":{str(hour): [[difficulty, player_name, change["total_score"], change["total_wins"], change["total_games"], change["total_time"]]
+                                     for (difficulty, player_name), change in hour_changes.items()]
+                         for hour, hour_changes in saved.hours.items()}
+            })
+        self.boards, self.hours, self.current_hour, self.log_offset = saved.boards, saved.hours, saved.current_hour, saved.log_offset
+        self.changed = False
+
+    @classmethod
+    def load(cls, file_path, backend, log_offset=None, clock=time.time):
+        """
+        Loads saved boards, the hours that have fallen out of a window since they were saved aren't added to it.
+
+        Args:
+        file_path (str): The absolute path to the boards file.
+        backend (str): The storage backend in use.
+        log_offset (int): Optional end of the storage's log, boards past it were built from another log and aren't loaded.
+        clock (callable): Returns the current time in seconds.
+
+        Returns: WindowedLeaderboards: The boards, None if the file is missing, unreadable or from another backend or log.
+        """
+        data = read_checkpoint(file_path, float("inf") if log_offset is None else log_offset)
+        try:
+            if data["backend"] != backend:
+                return None
+            boards = cls(backend, data["log_offset"], clock)
+            for difficulty, player_name, *totals in data["all"]:
+                boards.get_board("all", difficulty).add(player_name, get_change(totals))
+            windows = [window for window, hours in board_windows.items() if hours is not None]
+            for hour, hour_changes in data["hours"].items():
+                for difficulty, player_name, *totals in hour_changes:
+                    boards.add_change(int(hour), difficulty, player_name, get_change(totals), windows)
+        except (KeyError, TypeError, ValueError):
+            return None
+        return boards
+
+    @classmethod
+    def build(cls, players, backend, log_offset=0, clock=time.time):
+        """
+        Builds the all time boards from every player's stats, the day and week boards are left empty.
+
+        Args:
+        players (iterable): The player stats.
+        backend (str): The storage backend they come from.
+        log_offset (int): The storage log offset the stats are up to date with.
+        clock (callable): Returns the current time in seconds.
+
+        Returns: WindowedLeaderboards: The boards.
+        """
+        boards = cls(backend, log_offset, clock)
+        for player_stats in players:
+            if player_stats["total_games"] > 0:
+                boards.get_board("all").add(player_stats["player_name"], get_change(
+                    [player_stats["total_score"], player_stats["total_wins"], player_stats["total_games"], player_stats["total_time"]]))
+            for difficulty, stats in player_stats["difficulties"].items():
+                if stats["games"] > 0:
+                    boards.get_board("all", difficulty).add(player_stats["player_name"], get_change(
+                        [stats["total_score"], stats["wins"], stats["games"], stats["total_time"]]))
+        boards.changed = True
+        return boards
+
+    @classmethod
+    def open(cls, file_path, storage, backend, clock=time.time):
+        """
+        Loads the saved boards and adds the games recorded since they were saved, so only those are read.
+        If they can't be loaded the all time boards are built from the player stats and
+        the day and week boards from the games of the last week, which reads the whole log once.
+
+        Args:
+        file_path (str): The absolute path to the boards file.
+        storage (JsonStorage or SqliteStorage): The storage.
+        backend (str): The storage backend.
+        clock (callable): Returns the current time in seconds.
+
+        Returns: WindowedLeaderboards: The boards, up to date with the storage.
+        """
+        boards = cls.load(file_path, backend, storage.get_log_offset(), clock)
+        if boards is None:
+            with hangman_profile.span("leaderboard_windows.build"):
+                log_offset, players = storage.get_players_snapshot()
+                boards = cls.build(players, backend, log_offset, clock)
+                windows = [window for window, hours in board_windows.items() if hours is not None]
+                for game_stats, game_offset in storage.iter_games_after(0):
+                    if game_offset > log_offset:
+                        break
+                    boards.add_game(game_stats, windows=windows)
+        with hangman_profile.span("leaderboard_windows.catch_up"):
+            if boards.catch_up(storage) > 0:
+                boards.changed = True
+        return boards
+
+def main():
+    """
+    Shows a leaderboard from the command line.
+    """
+    import argparse # for command line arguments
+    from hangman_config import load_settings, program_location # config.ini handling
+    from hangman_storage import open_storage # json / sqlite storage backends
+    settings, _ = load_settings()
+    difficulty_names = [key[1] for key in settings["difficulty_word_length"]]
+    parser = argparse.ArgumentParser(description="Show a Hangman leaderboard.")
+    parser.add_argument("--window", choices=list(board_windows), default="week", help="games of the last day, the last week or all time")
+    parser.add_argument("--difficulty", choices=difficulty_names, default="", help="only games of one difficulty")
+    parser.add_argument("--metric", choices=board_metrics, default="score", help="what the players are ranked by")
+    parser.add_argument("--limit", type=int, default=settings["leaderboard_size"], help="number of players to show")
+    args = parser.parse_args()
+
+    data_dir = os.path.join(program_location, "data")
+    storage = open_storage(settings["storage_settings"], data_dir)
+    backend = settings["storage_settings"]["backend"]
+    boards = WindowedLeaderboards.open(os.path.join(data_dir, windows_file_name), storage, backend)
+    print(f"{args.window.title()} {args.difficulty or 'All Difficulties'} Leaderboard by {args.metric.replace('_', ' ')}:")
+    print("-"*20)
+    print(boards.render(args.window, args.difficulty, args.metric, args.limit))
+    boards.save(os.path.join(data_dir, windows_file_name), storage)
+    storage.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Player stats aggregates for the Hangman game.
+
+Each player record keeps counters, sums and maxima, overall and per
+difficulty, so recording a game is a constant time update of one record.
+Averages and win ratios are derived when read with get_player_averages().
+rebuild_player_stats() recomputes every aggregate from the game log in one
+streaming pass to fix any drift. The password rules shared by the terminal
+game and the server are here too, hashing is in hangman_credentials.
+"""
+
+# a new password needs at least one of these
+password_special_chars = ["#", "=", "-"]
+
+def get_password_problem(password, min_password_length):
+    """
+    Checks a new password against the password rules.
+
+    Args: password (str): The new password, min_password_length (int): The minimum length.
+
+    Returns: str: Why the password isn't allowed, None if it is.
+    """
+    if len(password) < min_password_length:
+        return f"Invalid Password, must be {min_password_length} or more characters"
+    if not any(char.isupper() for char in password):
+        return "Invalid Password, must have at least 1 upper case letter"
+    if not any(char.islower() for char in password):
+        return "Invalid Password, must have at least 1 lower case letter"
+    if not any(char in password_special_chars for char in password):
+        return f"Invalid Password, must have at least 1 special character ({','.join(password_special_chars)})"
+    return None
+
+def new_difficulty_stats():
+    """
+    Gets the empty aggregates for one difficulty.
+
+    Returns: dict: The difficulty aggregates.
+    """
+    return {
+        "games":0,
+        "wins":0,
+        "total_score":0,
+        "highest_score":0,
+        "total_time":0
+    }
+
+def new_player_stats(player_name, password_hash, difficulty_names=("Easy", "Normal", "Hard")):
+    """
+    Create a new player stats dictionary.
+
+    Args:
+    player_name (str): The player's name.
+    password_hash (str): The player's hashed password, "" for no password.
+    difficulty_names (iterable): The difficulties to start aggregates for.
+
+    Returns: dict: The new player stats dictionary.
+    """
+    return {
+        "player_name":player_name,
+        "player_password":password_hash,
+        "total_games":0,
+        "total_wins":0,
+        "total_score":0,
+        "highest_score":0,
+        "total_time":0,
+        "difficulties":{difficulty_name: new_difficulty_stats() for difficulty_name in difficulty_names}
+    }
+
+def add_to_aggregates(aggregates, game_stats, games_key="games", wins_key="wins"):
+    """
+    Adds one game to a set of aggregates.
+
+    Args:
+    aggregates (dict): The player or difficulty aggregates.
+    game_stats (dict): The game statistics entry.
+    games_key (str): The key of the game counter, "total_games" for the player totals.
+    wins_key (str): The key of the win counter, "total_wins" for the player totals.
+    """
+    aggregates[games_key] += 1
+    if game_stats["win_bool"] == True:
+        aggregates[wins_key] += 1
+    aggregates["total_score"] += game_stats["total_score"]
+    aggregates["total_time"] = round(aggregates["total_time"] + game_stats["time_taken"], 2)
+    # the first game sets the highest score even if it is negative
+    if aggregates[games_key] == 1 or game_stats["total_score"] > aggregates["highest_score"]:
+        aggregates["highest_score"] = game_stats["total_score"]
+
+def add_game_to_player_stats(player_stats, game_stats):
+    """
+    Updates a player's aggregates with a finished game, overall and for the game's difficulty.
+    Every game counts towards the games played, won or lost.
+
+    Args: player_stats (dict): The player stats, game_stats (dict): The game statistics entry.
+    """
+    add_to_aggregates(player_stats, game_stats, "total_games", "total_wins")
+    difficulty_stats = player_stats["difficulties"].setdefault(game_stats["word_difficulty"], new_difficulty_stats())
+    add_to_aggregates(difficulty_stats, game_stats)
+
+def get_averages(games, wins, total_score, total_time):
+    """
+    Derives the averages from a set of aggregates.
+
+    Returns: dict: The win ratio (%), average score and average time, 0 if there are no games.
+    """
+    if games == 0:
+        return {"win_ratio":0, "average_score":0, "average_time":0}
+    return {
+        "win_ratio":round(wins / games * 100, 2),
+        "average_score":round(total_score / games, 2),
+        "average_time":round(total_time / games, 2)
+    }
+
+def get_player_averages(player_stats):
+    """
+    Derives a player's averages from their aggregates.
+
+    Args: player_stats (dict): The player stats.
+
+    Returns: dict: The overall averages, with a "difficulties" dict of averages per difficulty.
+    """
+    averages = get_averages(player_stats["total_games"], player_stats["total_wins"], player_stats["total_score"], player_stats["total_time"])
+    averages["difficulties"] = {difficulty_name: get_averages(stats["games"], stats["wins"], stats["total_score"], stats["total_time"])
+                                for difficulty_name, stats in player_stats["difficulties"].items()}
+    return averages
+
+def upgrade_player_stats(player_stats):
+    """
+    Converts a player record from the old flat format with stored averages.
+    The old per difficulty averages were only updated on wins, so the sums are estimates,
+    rebuild_player_stats() recomputes them exactly from the game log.
+
+    Args: player_stats (dict): The player stats in either format.
+
+    Returns: dict: The player stats in the aggregate format.
+    """
+    if "difficulties" in player_stats:
+        return player_stats
+    upgraded = new_player_stats(player_stats["player_name"], player_stats.get("player_password", ""))
+    upgraded["total_games"] = player_stats.get("total_games", 0)
+    upgraded["total_wins"] = player_stats.get("total_wins", 0)
+    upgraded["total_score"] = player_stats.get("total_score", 0)
+    upgraded["total_time"] = round(player_stats.get("average_time", 0) * upgraded["total_games"], 2)
+    for difficulty_name in upgraded["difficulties"]:
+        prefix = difficulty_name.lower()
+        games = player_stats.get(f"{prefix}_games", 0)
+        upgraded["difficulties"][difficulty_name] = {
+            "games":games,
+            "wins":player_stats.get(f"{prefix}_wins", 0),
+            "total_score":round(player_stats.get(f"{prefix}_average_score", 0) * games),
+            "highest_score":player_stats.get(f"{prefix}_highest_score", 0),
+            "total_time":round(player_stats.get(f"{prefix}_average_time", 0) * games, 2)
+        }
+    upgraded["highest_score"] = max(stats["highest_score"] for stats in upgraded["difficulties"].values())
+    return upgraded
+
+def rebuild_player_stats(storage, difficulty_names=("Easy", "Normal", "Hard")):
+    """
+    Recomputes every player's aggregates from the game log in one streaming pass and saves them.
+    Passwords are kept, players with no games are reset to empty aggregates.
+    Games of names with no player record are left out rather than creating one, a record made
+    from the log would have no password and anyone could log in as that player.
+
+    Args: storage: The open storage, difficulty_names (iterable): The difficulties to start aggregates for.
+
+    Returns: tuple: The number of (players, games) rebuilt, (set) the names in the log with no player record.
+    """
+    rebuilt = {player_stats["player_name"]: new_player_stats(player_stats["player_name"], player_stats["player_password"], difficulty_names)
+               for player_stats in storage.iter_players()}
+    games = 0
+    unknown_players = set()
+    for game_stats in storage.iter_games():
+        player_stats = rebuilt.get(game_stats["player_name"])
+        if player_stats is None:
+            unknown_players.add(game_stats["player_name"])
+            continue
+        add_game_to_player_stats(player_stats, game_stats)
+        games += 1
+    storage.add_players(rebuilt.values())
+    return len(rebuilt), games, unknown_players
@@ -0,0 +1,171 @@
+"""
+Session profiling for the Hangman game, turned on by 'debug' under [Game Settings].
+
+span() times a block of code and count() adds to a named counter. Until
+enable() is called both return straight away, span() hands back one shared
+do-nothing context manager, so the calls can stay in the hot paths of a normal
+game. Once enabled every span is kept with its start time and thread, a
+summary table is printed at exit and the profile can be saved as json or as a
+Chrome trace (open it at chrome://tracing or https://ui.perfetto.dev).
+"""
+import atexit # for the report at exit
+import contextlib # for the disabled span
+import json # for the profile file
+import os # for the process id
+import threading # for the counter lock and thread ids
+import time # for timing
+
+# profile file formats written by export()
+profile_formats = ("json", "chrome")
+
+# set by enable(), checked before any profiling work is done
+enabled = False
+# shared context manager returned by span() while profiling is off
+disabled_span = contextlib.nullcontext()
+# finished spans: (name, start time in seconds since the profile started, duration in seconds, thread id)
+spans = []
+# counter name: total
+counters = {}
+counter_lock = threading.Lock()
+# perf_counter() value when the profile started
+profile_start_time = 0.0
+
+class Span:
+    """
+    Times a block of code and adds it to the profile when the block ends.
+
+    Args: name (str): The name the span is reported under, e.g. "storage.record_games".
+    """
+    __slots__ = ("name", "start_time")
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end_time = time.perf_counter()
+        spans.append((self.name, self.start_time - profile_start_time, end_time - self.start_time, threading.get_ident()))
+        return False
+
+def span(name):
+    """
+    Gets a context manager timing a block of code, it does nothing while profiling is off.
+
+    Args: name (str): The name the span is reported under.
+
+    Returns: Span or contextlib.nullcontext: The context manager.
+    """
+    if not enabled:
+        return disabled_span
+    return Span(name)
+
+def count(name, amount=1):
+    """
+    Adds to a counter, it does nothing while profiling is off.
+
+    Args: name (str): The counter name, e.g. "bytes_written", amount (int): The amount to add.
+    """
+    if not enabled:
+        return
+    with counter_lock: # the write-behind worker counts from its own thread
+        counters[name] = counters.get(name, 0) + amount
+
+def enable(profile_file="", profile_format="json"):
+    """
+    Starts profiling the session, the summary is printed and the profile saved when the program exits.
+
+    Args: profile_file (str): Optional path to save the profile to, profile_format (str): "json" or "chrome".
+    """
+    global enabled, profile_start_time
+    if profile_format not in profile_formats:
+        raise ValueError(f"Unknown profile format '{profile_format}', expected 'json' or 'chrome'")
+    if enabled:
+        return
+    profile_start_time = time.perf_counter()
+    enabled = True
+    # registered before the storage and leaderboard are opened, so it runs after they are saved at exit
+    atexit.register(report, profile_file, profile_format)
+
+def get_summary():
+    """
+    Gets the totals of every span name and the counters.
+
+    Returns: dict: {"spans": {name: {calls, total_ms, mean_ms, max_ms}}, "counters": {name: total}, "session_ms": float}.
+    """
+    span_totals = {}
+    for name, _, duration, _ in list(spans):
+        totals = span_totals.setdefault(name, {"calls": 0, "total_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0})
+        totals["calls"] += 1
+        totals["total_ms"] += duration * 1000
+        totals["max_ms"] = max(totals["max_ms"], duration * 1000)
+    for totals in span_totals.values():
+        totals["mean_ms"] = round(totals["total_ms"] / totals["calls"], 3)
+        totals["total_ms"] = round(totals["total_ms"], 3)
+        totals["max_ms"] = round(totals["max_ms"], 3)
+    return {
+        "session_ms": round((time.perf_counter() - profile_start_time) * 1000, 3),
+        "spans": dict(sorted(span_totals.items(), key=lambda item: item[1]["total_ms"], reverse=True)),
+        "counters": dict(sorted(counters.items()))
+    }
+
+def format_summary(summary):
+    """
+    Formats a profile summary as a plain text table, slowest spans first.
+
+    Args: summary (dict): The summary, see get_summary.
+
+    Returns: str: The table.
+    """
+    lines = [f"Session Profile ({summary['session_ms']:.0f} ms):", "-"*20]
+    lines.append(f"{'Span':>32} {'Calls':>6} {'Total ms':>10} {'Mean ms':>9} {'Max ms':>9}")
+    for name, totals in summary["spans"].items():
+        lines.append(f"{name[:32]:>32} {totals['calls']:>6} {totals['total_ms']:>10.2f} {totals['mean_ms']:>9.3f} {totals['max_ms']:>9.3f}")
+    for name, total in summary["counters"].items():
+        lines.append(f"{name[:32]:>32} {total:>6}")
+    return "\n".join(lines)
+
+def get_chrome_trace():
+    """
+    Gets the spans and counters in the Chrome trace event format.
+
+    Returns: dict: The trace.
+    """
+    process_id = os.getpid()
+    events = [{"name": name, "cat": "hangman", "ph": "X", "ts": round(start * 1e6, 3), "dur": round(duration * 1e6, 3),
+               "pid": process_id, "tid": thread_id} for name, start, duration, thread_id in list(spans)]
+    end_time = round((time.perf_counter() - profile_start_time) * 1e6, 3)
+    events += [{"name": name, "cat": "hangman", "ph": "C", "ts": end_time, "pid": process_id, "args": {name: total}}
+               for name, total in counters.items()]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def export(file_path, profile_format="json"):
+    """
+    Saves the profile.
+
+    Args: file_path (str): The file to save to, profile_format (str): "json" for the summary and every span, "chrome" for a Chrome trace.
+    """
+    if profile_format == "chrome":
+        data = get_chrome_trace()
+    else:
+        data = dict(get_summary(), span_list=[{"name": name, "start_ms": round(start * 1000, 3), "duration_ms": round(duration * 1000, 3),
+                                              "thread": thread_id} for name, start, duration, thread_id in list(spans)])
+    with open(file_path, mode='w') as file:
+        json.dump(data, file, indent=4)
+
+def report(profile_file="", profile_format="json"):
+    """
+    Prints the session summary and saves the profile if a file is set.
+
+    Args: profile_file (str): Optional path to save the profile to, profile_format (str): "json" or "chrome".
+    """
+    print(format_summary(get_summary()))
+    if profile_file:
+        try:
+            export(profile_file, profile_format)
+            print(f"Profile saved to {profile_file}")
+        except OSError as e:
+            print(f"Profile not saved: {e}")
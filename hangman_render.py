@@ -0,0 +1,125 @@
+"""
+Terminal rendering for the Hangman game.
+
+ScreenRenderer keeps a model of the lines on the screen and redraws only the
+end of each line from the first character that changed, with ANSI escape
+sequences in one write, so a turn doesn't have to clear the terminal and
+print the whole board again. Streams
+that aren't a terminal (pipes, files, IDE consoles) get the lines printed as
+plain text instead.
+"""
+import os # for the windows console
+import sys # for stdout
+
+# ANSI escape sequences
+clear_screen_sequence = "\x1b[H\x1b[2J" # cursor to the top left and clear the screen
+clear_line_sequence = "\x1b[K" # clear from the cursor to the end of the line
+clear_below_sequence = "\x1b[J" # clear from the cursor to the end of the screen
+
+def move_cursor_sequence(row, column=0):
+    """
+    Gets the ANSI escape sequence moving the cursor to a place on the screen.
+
+    Args: row (int): The row, 0 is the top of the screen, column (int): The column, 0 is the left of the screen.
+
+    Returns: str: The escape sequence.
+    """
+    return f"\x1b[{row + 1};{column + 1}H"
+
+def get_common_prefix_length(old_line, new_line):
+    """
+    Gets the number of characters at the start of two lines that are the same.
+
+    Args: old_line (str): The line on the screen, new_line (str): The line replacing it.
+
+    Returns: int: The length of the common prefix.
+    """
+    # binary search on slices, the comparisons run in C rather than a loop per character
+    low, high = 0, min(len(old_line), len(new_line))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_line[:middle] == new_line[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def get_game_lines(game, message="", show_word=False):
+    """
+    Gets the lines of the board shown each turn.
+
+    Args:
+    game (HangmanGame): The game in progress.
+    message (str): A message shown above the board, e.g. a hint.
+    show_word (bool): True to show the word to guess, for testing.
+
+    Returns: list: The lines of the board.
+    """
+    lines = [
+        message,
+        f"Wrong letters so far: {', '.join(game.wrong_letters)}",
+        f"You have {game.tries_left} tries left.",
+        f"Letters remaining: {' '.join(game.alphabet_list)}",
+        f"Current Hangman: {' '.join(game.hidden_hangman)}",
+        f"Current Game Time: {game.elapsed_time()} seconds",
+        "="*20
+    ]
+    if show_word == True:
+        lines.append(f"Here is the word to guess: (for testing purposes) {game.hangman_word}")
+    return lines
+
+class ScreenRenderer:
+    """
+    Draws screens of lines, only rewriting the lines that changed since the last screen.
+
+    Args:
+    stream (file): The stream to write to, sys.stdout by default.
+    ansi (bool): True to use ANSI escape sequences, by default only if the stream is a terminal.
+    """
+    def __init__(self, stream=None, ansi=None):
+        self.stream = stream if stream is not None else sys.stdout
+        if ansi is None:
+            ansi = self.stream.isatty()
+            if ansi and os.name == 'nt':
+                os.system("") # turns on escape sequence handling in the Windows console
+        self.ansi = ansi
+        self.lines = None # lines on the screen since the last clear, None if the screen is unknown
+        self.bytes_written = 0 # total bytes written, for benchmarks
+
+    def write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+        self.bytes_written += len(text.encode())
+
+    def clear(self):
+        """
+        Clears the screen, plain output isn't cleared.
+        """
+        if self.ansi:
+            self.write(clear_screen_sequence)
+            self.lines = []
+
+    def render(self, lines):
+        """
+        Draws a screen of lines from the top of the screen and leaves the cursor on the line after them.
+        Anything printed below the last screen, like an input prompt, is cleared.
+
+        Args: lines (list): The lines to show.
+        """
+        if not self.ansi:
+            self.write("\n".join(lines) + "\n")
+            return
+        if self.lines is None:
+            self.clear()
+        output = []
+        for row, line in enumerate(lines):
+            if row >= len(self.lines):
+                output.append(move_cursor_sequence(row) + line + clear_line_sequence)
+            elif self.lines[row] != line:
+                # only rewrite the line from the first character that changed
+                column = get_common_prefix_length(self.lines[row], line)
+                output.append(move_cursor_sequence(row, column) + line[column:] + clear_line_sequence)
+        # clears lines left over from a longer screen and anything printed after the last one
+        output.append(move_cursor_sequence(len(lines)) + clear_below_sequence)
+        self.write("".join(output))
+        self.lines = list(lines)
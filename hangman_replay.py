@@ -0,0 +1,439 @@
+"""
+Guess event recording and replay for the Hangman game.
+
+Each finished game is appended to guess_events.bin in the data directory as
+one compact binary record: who played which word, the difficulty, the wrong
+guesses allowed, when it was played and the score it got, followed by the
+game's guess events from HangmanGame (a byte per guess for the letter and
+whether it was right, then the milliseconds since the last guess as a varint).
+A guess costs 2 or 3 bytes and a whole game usually under 60, so every game
+can be kept. Recording is turned off with 'record guesses' under
+[Storage Settings].
+
+Replay plays every recorded game again through HangmanGame and calc_score
+with the score multipliers of any config file and compares the scores, so a
+change to the scoring or the rules can be checked against real games before
+it ships, and a scoring dispute can be played back guess by guess. The file
+is mapped with mmap and split into chunks of records for a process pool.
+
+Record layout, numbers are varints (see hangman_engine.append_varint), text is
+a varint byte count then utf-8:
+    record marker, body size, body, crc32 of the body (4 bytes, little endian)
+    body: version, player name, word, difficulty, wrong guesses allowed + 1
+    (0 for no limit), game time (seconds since 1970, 0 if unknown), score
+    (zigzag, so negative scores stay small), number of guesses, guess events.
+A record cut short by a crash is left in the file and later records are
+appended after it, so the reader checks each record's crc and, on a damaged
+one, skips ahead to the next record marker.
+
+Usage:
+    python hangman_replay.py --config new_scores.ini
+    python hangman_replay.py --show 3
+"""
+import argparse # for command line arguments
+import collections # for the last games shown
+import json # for json output
+import mmap # for reading the event file
+import multiprocessing # for the process pool
+import os # for file paths
+import struct # for the record checksum
+import zlib # for crc32
+from hangman_config import load_config, config_file, get_score_settings, program_location # config.ini handling
+from hangman_engine import HangmanGame, append_varint, calc_elapsed_time, get_game_timestamp, guess_event_right, GUESS_RIGHT, PLAYING # game rules
+import hangman_profile # counts the bytes recorded
+
+# file name for the guess events in the data directory
+guess_events_file_name = "guess_events.bin"
+# first bytes of every record, found again after a damaged record
+record_marker = b"\xf7HGR"
+# crc32 of the body after every record
+record_checksum = struct.Struct("<I")
+# first byte of every record body, changed if the layout changes
+record_version = 1
+# games replayed per task sent to a worker
+chunk_size = 20000
+# changed scores listed in the report
+example_limit = 5
+
+#=======================================
+# Recording
+#=======================================
+def append_text(buffer, text):
+    """
+    Appends text to a bytearray as its utf-8 byte count then the bytes.
+    """
+    encoded = text.encode()
+    append_varint(buffer, len(encoded))
+    buffer += encoded
+
+def encode_game_record(game, game_stats):
+    """
+    Encodes a finished game as one guess event record.
+
+    Args: game (HangmanGame): The finished game, game_stats (dict): Its game statistics entry, from game.score().
+
+    Returns: bytes: The record, with its marker and size first and its checksum last.
+    """
+    body = bytearray([record_version])
+    append_text(body, game.player_name)
+    append_text(body, game.hangman_word)
+    append_text(body, game.word_difficulty)
+    append_varint(body, 0 if game.wrong_max is None else game.wrong_max + 1)
+    append_varint(body, get_game_timestamp(game.game_time))
+    total_score = game_stats["total_score"]
+    append_varint(body, total_score * 2 if total_score >= 0 else -total_score * 2 - 1)
+    append_varint(body, len(game.right_letters) + len(game.wrong_letters))
+    body += game.guess_events
+    record = bytearray(record_marker)
+    append_varint(record, len(body))
+    return bytes(record + body + record_checksum.pack(zlib.crc32(body)))
+
+class GuessEventLog:
+    """
+    The append only file of guess event records. Each record goes to the end of the
+    file in a single write, so several game processes can record to the same file.
+
+    Args: file_path (str): The absolute path to the event file.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file_descriptor = None # opened on the first record
+
+    def append(self, record):
+        """
+        Appends a record from encode_game_record(), no fsync, a lost or torn record only loses the guesses of a saved game,
+        the records after it are found again by their marker.
+
+        Args: record (bytes): The record.
+        """
+        if self.file_descriptor is None:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            self.file_descriptor = os.open(self.file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        os.write(self.file_descriptor, record)
+        hangman_profile.count("guess_event_bytes", len(record))
+
+    def close(self):
+        if self.file_descriptor is not None:
+            os.close(self.file_descriptor)
+            self.file_descriptor = None
+
+#=======================================
+# Reading
+#=======================================
+def read_varint(buffer, offset):
+    """
+    Reads a varint written by append_varint.
+
+    Args: buffer (bytes or mmap.mmap): The data, offset (int): Where the varint starts.
+
+    Returns: tuple: (int) the number, (int) the offset after it.
+    """
+    value = shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def read_text(buffer, offset):
+    """
+    Reads text written by append_text.
+
+    Returns: tuple: (str) the text, (int) the offset after it.
+    """
+    size, offset = read_varint(buffer, offset)
+    return buffer[offset:offset + size].decode(), offset + size
+
+def decode_game_record(body):
+    """
+    Decodes the body of a record, the bytes after its size.
+
+    Args: body (bytes): The record body.
+
+    Returns: dict: {player_name, hangman_word, word_difficulty, wrong_max, game_timestamp, total_score,
+    guesses: [(letter, right, milliseconds since the last guess)], elapsed_ms}.
+
+    Raises: ValueError: If the record is from another version or damaged.
+    """
+    if body[0] != record_version:
+        raise ValueError(f"Unknown guess event record version {body[0]}")
+    try:
+        player_name, offset = read_text(body, 1)
+        hangman_word, offset = read_text(body, offset)
+        word_difficulty, offset = read_text(body, offset)
+        wrong_max, offset = read_varint(body, offset)
+        game_timestamp, offset = read_varint(body, offset)
+        total_score, offset = read_varint(body, offset)
+        guess_count, offset = read_varint(body, offset)
+        guesses = []
+        elapsed_ms = 0
+        for _ in range(guess_count):
+            event = body[offset]
+            delta_ms, offset = read_varint(body, offset + 1)
+            elapsed_ms += delta_ms
+            guesses.append((chr(97 + (event & 0x7f)), event >= guess_event_right, delta_ms))
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Damaged guess event record: {e}")
+    return {
+        "player_name": player_name,
+        "hangman_word": hangman_word,
+        "word_difficulty": word_difficulty,
+        "wrong_max": wrong_max - 1 if wrong_max else None,
+        "game_timestamp": game_timestamp,
+        "total_score": total_score >> 1 if total_score % 2 == 0 else -(total_score >> 1) - 1,
+        "guesses": guesses,
+        "elapsed_ms": elapsed_ms
+    }
+
+def iter_record_bodies(buffer, start=0, end=None):
+    """
+    Reads the whole records between two offsets. Bytes that aren't a whole record with the right checksum,
+    e.g. a record torn by a crash, are skipped up to the next record marker.
+
+    Args: buffer (bytes or mmap.mmap): The event file, start (int): Where to start reading, end (int): Where to stop.
+
+    Yields: tuple: (int) where the record starts, (int) where it ends, (bytes) its body.
+    """
+    offset = start
+    end = len(buffer) if end is None else end
+    while offset < end:
+        if buffer[offset:offset + len(record_marker)] == record_marker:
+            try:
+                size, body_start = read_varint(buffer, offset + len(record_marker))
+            except IndexError:
+                size, body_start = end, end # cut off inside the size
+            body_end = body_start + size
+            if body_end + record_checksum.size <= end:
+                body = buffer[body_start:body_end]
+                if record_checksum.unpack_from(buffer, body_end)[0] == zlib.crc32(body):
+                    record_start, offset = offset, body_end + record_checksum.size
+                    yield record_start, offset, body
+                    continue
+        next_marker = buffer.find(record_marker, offset + 1, end)
+        offset = end if next_marker == -1 else next_marker
+
+def find_record_chunks(buffer, games_per_chunk=chunk_size):
+    """
+    Splits the records into chunks, each ending where a record ends.
+
+    Args: buffer (bytes or mmap.mmap): The event file, games_per_chunk (int): The records in each chunk.
+
+    Returns: tuple: (list) (start, end, records) of each chunk, (int) bytes that aren't a whole record, e.g. torn by a crash.
+    """
+    chunks = []
+    chunk_start = chunk_end = records = record_bytes = 0
+    for record_start, record_end, _ in iter_record_bodies(buffer):
+        record_bytes += record_end - record_start
+        chunk_end = record_end
+        records += 1
+        if records == games_per_chunk:
+            chunks.append((chunk_start, chunk_end, records))
+            chunk_start, records = chunk_end, 0
+    if records:
+        chunks.append((chunk_start, chunk_end, records))
+    return chunks, len(buffer) - record_bytes
+
+def iter_game_records(buffer, start=0, end=None):
+    """
+    Reads the records between two offsets, skipping damaged ones.
+
+    Args: buffer (bytes or mmap.mmap): The event file, start (int): Where to start reading, end (int): Where to stop.
+
+    Yields: dict: Each record, see decode_game_record.
+    """
+    for _, _, body in iter_record_bodies(buffer, start, end):
+        try:
+            yield decode_game_record(body)
+        except ValueError:
+            continue
+
+#=======================================
+# Replay
+#=======================================
+def replay_clock():
+    return 0.0 # the recorded milliseconds are used for the time taken
+
+def replay_game(record, score_settings):
+    """
+    Plays a recorded game again through the game rules and scores it.
+
+    Args: record (dict): The record, see decode_game_record, score_settings (dict): The score multipliers to score it with.
+
+    Returns: tuple: (dict) the game statistics entry, (bool) True if every guess was right or wrong as recorded and the game finished.
+    """
+    game = HangmanGame(record["hangman_word"], record["wrong_max"], score_settings, record["player_name"], record["word_difficulty"],
+                       clock=replay_clock)
+    matches = True
+    for letter, right, _ in record["guesses"]:
+        if (game.guess(letter) == GUESS_RIGHT) != right:
+            matches = False
+    if game.status == PLAYING:
+        matches = False
+    return game.score(calc_elapsed_time(0, record["elapsed_ms"] / 1000))[0], matches
+
+def new_totals():
+    """
+    Gets empty replay totals, see replay_chunk.
+    """
+    return {"games": 0, "guesses": 0, "right_guesses": 0, "guess_ms": 0, "rule_mismatches": 0, "changed_scores": 0, "damaged_records": 0,
+            "difficulties": {}, "opening_letters": collections.Counter(), "changed_examples": []}
+
+def add_totals(totals, chunk_totals):
+    """
+    Adds the totals of a chunk to the run's totals.
+    """
+    for key in ("games", "guesses", "right_guesses", "guess_ms", "rule_mismatches", "changed_scores", "damaged_records"):
+        totals[key] += chunk_totals[key]
+    for difficulty, chunk_difficulty_totals in chunk_totals["difficulties"].items():
+        difficulty_totals = totals["difficulties"].setdefault(difficulty, dict.fromkeys(chunk_difficulty_totals, 0))
+        for key, value in chunk_difficulty_totals.items():
+            difficulty_totals[key] += value
+    totals["opening_letters"].update(chunk_totals["opening_letters"])
+    totals["changed_examples"] = (totals["changed_examples"] + chunk_totals["changed_examples"])[:example_limit]
+
+# set in each worker process by init_worker()
+worker_file_path = None
+worker_score_settings = None
+
+def init_worker(file_path, score_settings):
+    """
+    Keeps the replay settings in a worker process, so each task only sends its byte range.
+    """
+    global worker_file_path, worker_score_settings
+    worker_file_path = file_path
+    worker_score_settings = score_settings
+
+def replay_chunk(chunk):
+    """
+    Replays the records of one chunk of the event file, a record that can't be decoded is counted and skipped.
+
+    Args: chunk (tuple): (start, end, records) from find_record_chunks.
+
+    Returns: dict: The chunk's totals, see new_totals.
+    """
+    start, end, _ = chunk
+    totals = new_totals()
+    with open(worker_file_path, mode='rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as event_map:
+            for _, _, body in iter_record_bodies(event_map, start, end):
+                try:
+                    record = decode_game_record(body)
+                except ValueError:
+                    totals["damaged_records"] += 1
+                    continue
+                game_stats, matches = replay_game(record, worker_score_settings)
+                guesses = record["guesses"]
+                totals["games"] += 1
+                totals["guesses"] += len(guesses)
+                totals["right_guesses"] += sum(1 for _, right, _ in guesses if right)
+                totals["guess_ms"] += record["elapsed_ms"]
+                if guesses:
+                    totals["opening_letters"][guesses[0][0]] += 1
+                if not matches:
+                    totals["rule_mismatches"] += 1
+                difficulty_totals = totals["difficulties"].setdefault(record["word_difficulty"], {"games": 0, "wins": 0, "recorded_score": 0, "replayed_score": 0})
+                difficulty_totals["games"] += 1
+                difficulty_totals["wins"] += game_stats["win_bool"] == True
+                difficulty_totals["recorded_score"] += record["total_score"]
+                difficulty_totals["replayed_score"] += game_stats["total_score"]
+                if game_stats["total_score"] != record["total_score"]:
+                    totals["changed_scores"] += 1
+                    if len(totals["changed_examples"]) < example_limit:
+                        totals["changed_examples"].append((record["player_name"], record["hangman_word"], record["total_score"], game_stats["total_score"]))
+    return totals
+
+def replay_file(file_path, score_settings, workers=None):
+    """
+    Replays every recorded game in an event file across a process pool.
+
+    Args:
+    file_path (str): The absolute path to the event file.
+    score_settings (dict): The score multipliers to score the games with.
+    workers (int): The number of worker processes, the cpu count by default, 1 replays in this process.
+
+    Returns: tuple: (dict) the totals, see new_totals, (int) bytes that aren't a whole record.
+    """
+    totals = new_totals()
+    if os.path.getsize(file_path) == 0:
+        return totals, 0
+    with open(file_path, mode='rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as event_map:
+            chunks, torn_bytes = find_record_chunks(event_map)
+    if workers == 1 or len(chunks) < 2:
+        init_worker(file_path, score_settings)
+        for chunk in chunks:
+            add_totals(totals, replay_chunk(chunk))
+        return totals, torn_bytes
+    with multiprocessing.Pool(min(workers or os.cpu_count(), len(chunks)), initializer=init_worker, initargs=(file_path, score_settings)) as pool:
+        for chunk_totals in pool.imap_unordered(replay_chunk, chunks):
+            add_totals(totals, chunk_totals)
+    return totals, torn_bytes
+
+def format_game(record):
+    """
+    Formats a recorded game guess by guess, for checking a disputed score.
+
+    Args: record (dict): The record, see decode_game_record.
+
+    Returns: str: The game.
+    """
+    lines = [f"{record['player_name']} - {record['hangman_word']} ({record['word_difficulty']}, {record['wrong_max']} wrong guesses allowed)"
+             f" - {record['total_score']} pts in {record['elapsed_ms'] / 1000:.2f}s"]
+    guess_ms = 0
+    for number, (letter, right, delta_ms) in enumerate(record["guesses"], start=1):
+        guess_ms += delta_ms
+        lines.append(f"\t{number:>3} {letter} {'right' if right else 'wrong'} at {guess_ms / 1000:.2f}s (+{delta_ms / 1000:.2f}s)")
+    return "\n".join(lines)
+
+def main():
+    """
+    Replays the recorded games from the command line and prints the report.
+    """
+    parser = argparse.ArgumentParser(description="Replay recorded Hangman games through the game rules and scoring.")
+    parser.add_argument("--events", default=os.path.join(program_location, "data", guess_events_file_name), help="guess event file")
+    parser.add_argument("--config", default=config_file, help="config file with the score multipliers to replay with")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--show", type=int, default=0, help="print the last N recorded games guess by guess instead")
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.events):
+        raise SystemExit(f"No guess events recorded yet at {args.events}")
+    if not os.path.exists(args.config):
+        parser.error(f"config file {args.config} does not exist") # load_config would write a default one
+    if args.show > 0:
+        with open(args.events, mode='rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as event_map:
+                chunks, _ = find_record_chunks(event_map)
+                last_records = collections.deque((record for start, end, _ in chunks for record in iter_game_records(event_map, start, end)), maxlen=args.show)
+        for record in last_records:
+            print(format_game(record))
+        return
+    config, _ = load_config(args.config)
+    totals, torn_bytes = replay_file(args.events, get_score_settings(config), args.workers)
+    if args.json:
+        print(json.dumps(dict(totals, torn_bytes=torn_bytes), indent=4))
+        return
+    games = max(totals["games"], 1)
+    print(f"Replayed {totals['games']} games, {totals['guesses']} guesses, scored with {args.config}")
+    print("-"*20)
+    if torn_bytes:
+        print(f"{torn_bytes} bytes of the file aren't a whole record and were skipped")
+    if totals["damaged_records"]:
+        print(f"{totals['damaged_records']} records couldn't be decoded and were skipped")
+    print(f"\t{totals['guesses'] / games:.2f} guesses per game, {totals['right_guesses'] / max(totals['guesses'], 1) * 100:.1f}% right,"
+          f" {totals['guess_ms'] / max(totals['guesses'], 1) / 1000:.2f}s per guess")
+    print(f"\topening letters: {', '.join(f'{letter} {count / games * 100:.1f}%' for letter, count in totals['opening_letters'].most_common(5))}")
+    print(f"\t{totals['rule_mismatches']} games played differently under the current rules")
+    print(f"\t{totals['changed_scores']} games scored differently")
+    for difficulty, difficulty_totals in totals["difficulties"].items():
+        print(f"\t{difficulty or 'Unknown'}: {difficulty_totals['games']} games, win rate {difficulty_totals['wins'] / difficulty_totals['games'] * 100:.1f}%,"
+              f" average score {difficulty_totals['recorded_score'] / difficulty_totals['games']:.1f} recorded"
+              f" / {difficulty_totals['replayed_score'] / difficulty_totals['games']:.1f} replayed")
+    for player_name, hangman_word, recorded_score, replayed_score in totals["changed_examples"]:
+        print(f"\t\t{player_name} '{hangman_word}': {recorded_score} -> {replayed_score} pts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""
+Multi-session Hangman server.
+
+Players connect with telnet (or any line based TCP client) and play through
+the same HangmanGame rules, calc_score scoring and player password checks as
+the terminal game. Every session is a coroutine on one asyncio event loop, so
+thousands of players can be connected at once. Storage, word drawing and the
+leaderboard run on a single storage thread, so disk writes never stall the
+other sessions and the storage is only ever used from one thread. Passwords
+are hashed and checked on the credential workers, after a login the player is
+given a session token they can answer the password prompt with when they
+reconnect, which skips the password hash.
+Passwords are sent as plain text, only listen on localhost or behind a TLS proxy.
+
+The bench command starts a server and thousands of in-process bot clients
+against a temporary data directory and reports sessions and guesses per second.
+
+Usage:
+    python hangman_server.py serve --port 7777
+    python hangman_server.py bench --clients 1000 --games 3
+"""
+import argparse # for command line arguments
+import asyncio # for the event loop
+import os # for file paths
+import tempfile # for the bench data directory
+import time # for the rates
+from concurrent.futures import ThreadPoolExecutor # for the storage thread
+from hangman_config import load_settings, program_location # config.ini handling
+from hangman_credentials import CredentialService # salted password hashing on worker threads, session tokens
+from hangman_engine import HangmanGame, get_wrong_max, get_word_difficulty, PLAYING, GUESS_REPEATED, GUESS_INVALID # game rules
+from hangman_leaderboard import Leaderboard, leaderboard_file_name # cached all time leaderboard
+from hangman_players import new_player_stats, get_password_problem # player stats and password rules
+from hangman_render import get_game_lines # the board shown each turn
+from hangman_replay import GuessEventLog, encode_game_record, guess_events_file_name # compact guess by guess game records
+from hangman_storage import open_storage # json / sqlite storage backends
+from hangman_dictionary import MappedDictionary, open_word_pool # memory mapped word files
+from hangman_words import WordPoolExhaustedError, load_dictionary # length bucketed word pool
+
+# file name for the per player word pool draw cursors, shared with Hangman.py
+word_pool_cursor_file_name = "word_pool_cursors.json"
+# sent after every prompt, clients answer with one line
+prompt_marker = "\r\n> "
+
+class SessionClosed(Exception):
+    """
+    Raised when a player disconnects or stops answering.
+    """
+
+class Connection:
+    """
+    Line based text I/O for one player.
+
+    Args: reader (asyncio.StreamReader), writer (asyncio.StreamWriter), idle_timeout (float): Seconds to wait for an answer.
+    """
+    def __init__(self, reader, writer, idle_timeout):
+        self.reader = reader
+        self.writer = writer
+        self.idle_timeout = idle_timeout
+
+    async def send(self, text):
+        self.writer.write((text.replace("\n", "\r\n") + "\r\n").encode())
+        await self.writer.drain()
+
+    async def ask(self, text):
+        """
+        Sends a prompt and waits for the answer.
+
+        Args: text (str): The prompt.
+
+        Returns: str: The answer without the line ending.
+        """
+        self.writer.write((text.replace("\n", "\r\n") + prompt_marker).encode())
+        await self.writer.drain()
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), self.idle_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            raise SessionClosed()
+        if not line:
+            raise SessionClosed()
+        return line.decode(errors="ignore").strip()
+
+class HangmanServer:
+    """
+    Runs Hangman sessions for every connected player.
+
+    Args:
+    settings (dict): The settings, see hangman_config.load_settings.
+    data_dir (str): The directory the data files are kept in.
+    words (MappedDictionary or iterable): The dictionary words.
+    idle_timeout (float): Seconds a player can take to answer before they are disconnected.
+    """
+    def __init__(self, settings, data_dir, words, idle_timeout=600):
+        self.settings = settings
+        self.data_dir = data_dir
+        self.words = words
+        self.idle_timeout = idle_timeout
+        self.difficulty_word_length = settings["difficulty_word_length"]
+        # only used from the storage thread
+        self.storage_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hangman-storage")
+        self.credentials = CredentialService(settings["credential_settings"])
+        self.storage = None
+        self.word_pool = None
+        self.leaderboard = None
+        self.guess_event_log = None
+        self.solver = None # future of the hint engine, built the first time a hint is asked for
+        self.server = None
+        # counters for the rates
+        self.sessions_started = 0
+        self.sessions_active = 0
+        self.games_finished = 0
+        self.guesses = 0
+
+    # Storage Thread
+    #=======================================
+    async def run_storage(self, function, *args):
+        """
+        Runs a function on the storage thread without blocking the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.storage_executor, function, *args)
+
+    def open_storage(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.storage = open_storage(self.settings["storage_settings"], self.data_dir)
+        self.word_pool = open_word_pool(self.words, os.path.join(self.data_dir, word_pool_cursor_file_name))
+        backend = self.settings["storage_settings"]["backend"]
+        self.leaderboard = Leaderboard.open(os.path.join(self.data_dir, leaderboard_file_name), self.storage, backend)
+        if self.settings["storage_settings"].get("record_guesses", True):
+            self.guess_event_log = GuessEventLog(os.path.join(self.data_dir, guess_events_file_name))
+
+    def close_storage(self):
+        self.word_pool.save_cursors()
+        self.leaderboard.save(os.path.join(self.data_dir, leaderboard_file_name), self.storage)
+        if self.guess_event_log is not None:
+            self.guess_event_log.close()
+        self.storage.close()
+
+    def draw_word(self, word_length, player_name):
+        return self.word_pool.draw(word_length, player_name, is_used=lambda word: self.storage.word_used(player_name, word))
+
+    def record_game(self, game_stats, guess_record=None):
+        """
+        Saves a finished game and updates the player's stats and the leaderboard.
+
+        Args: game_stats (dict): The game statistics entry, guess_record (bytes): Optional guess event record of the game, see hangman_replay.
+
+        Returns: str: The leaderboard after the game.
+        """
+        self.storage.record_games([game_stats])
+        if guess_record is not None and self.guess_event_log is not None:
+            self.guess_event_log.append(guess_record)
+        self.leaderboard.add_game(game_stats)
+        # checkpoint the leaderboard now and then, so a crash only leaves a few games for the next start to read
+        checkpoint_every_n_games = self.settings["storage_settings"].get("checkpoint_every_n_games", 100)
+        if checkpoint_every_n_games > 0 and self.games_finished % checkpoint_every_n_games == 0:
+            self.leaderboard.save(os.path.join(self.data_dir, leaderboard_file_name), self.storage)
+        return self.leaderboard.render(self.settings["leaderboard_size"])
+
+    # Server
+    #=======================================
+    async def start(self, host, port):
+        """
+        Opens the storage and starts listening.
+
+        Args: host (str): The address to listen on, port (int): The port, 0 for any free port.
+
+        Returns: int: The port the server is listening on.
+        """
+        await self.run_storage(self.open_storage)
+        self.server = await asyncio.start_server(self.handle_session, host, port, backlog=4096)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops listening and saves and closes the storage.
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        await self.run_storage(self.close_storage)
+        self.storage_executor.shutdown()
+        self.credentials.close()
+
+    async def report(self, interval):
+        """
+        Prints the active sessions and the sessions, games and guesses per second every interval.
+
+        Args: interval (float): Seconds between reports.
+        """
+        last_time = time.perf_counter()
+        last_counts = (self.sessions_started, self.games_finished, self.guesses)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            counts = (self.sessions_started, self.games_finished, self.guesses)
+            sessions_rate, games_rate, guesses_rate = ((count - last_count) / (now - last_time) for count, last_count in zip(counts, last_counts))
+            print(f"{self.sessions_active} active sessions, {sessions_rate:.1f} sessions/s, {games_rate:.1f} games/s, {guesses_rate:.1f} guesses/s")
+            last_time, last_counts = now, counts
+
+    async def handle_session(self, reader, writer):
+        self.sessions_started += 1
+        self.sessions_active += 1
+        try:
+            await self.play_session(Connection(reader, writer, self.idle_timeout))
+        except (SessionClosed, ConnectionError):
+            pass
+        finally:
+            self.sessions_active -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    # Session
+    #=======================================
+    async def play_session(self, connection):
+        await connection.send(f"{'='*20}\nWelcome to Hangman\n{'='*20}")
+        player_name = await self.login(connection)
+        if player_name is None:
+            return
+        while True:
+            word_length = await self.select_difficulty(connection)
+            try:
+                hangman_word = await self.run_storage(self.draw_word, word_length, player_name)
+            except WordPoolExhaustedError as e:
+                await connection.send(f"{e}, pick another difficulty")
+                continue
+            game = HangmanGame(hangman_word, get_wrong_max(word_length, self.difficulty_word_length), self.settings["score_settings"],
+                               player_name, get_word_difficulty(word_length, self.difficulty_word_length), time.strftime("%d/%m/%y-%H:%M:%S"))
+            await self.play_game(connection, game)
+            game_stats, score_summarised = game.score()
+            self.games_finished += 1
+            leaderboard = await self.run_storage(self.record_game, game_stats, encode_game_record(game, game_stats))
+            await connection.send(f"{score_summarised}\nAll Time Leaderboard:\n{'-'*20}\n{leaderboard}")
+            if (await connection.ask("Play Again? (yes) or Enter to exit")).lower() != "yes":
+                await connection.send("Goodbye!")
+                return
+
+    async def login(self, connection):
+        """
+        Asks for the player's name and logs them in, new players get a profile.
+
+        Returns: str: The player's name, None if they got the password wrong too many times.
+        """
+        player_name = await connection.ask("Enter your name (longer than 3 characters)")
+        while len(player_name) < 3:
+            player_name = await connection.ask("Invalid Name, must be 3 or more characters\nEnter your name (longer than 3 characters)")
+        stats = await self.run_storage(self.storage.get_player, player_name)
+        if stats is None:
+            await connection.send("Hi new player, lets build your profile")
+            password = await connection.ask("Set a password or hit Enter to skip")
+            password_problem = None if password == "" else get_password_problem(password, self.settings["min_password_length"])
+            while password_problem is not None:
+                password = await connection.ask(f"{password_problem}\nSet a password or hit Enter to skip")
+                password_problem = None if password == "" else get_password_problem(password, self.settings["min_password_length"])
+            password_hash = "" if password == "" else await asyncio.wrap_future(self.credentials.hash_password(password))
+            stats = new_player_stats(player_name, password_hash, [key[1] for key in self.difficulty_word_length])
+            await self.run_storage(self.storage.add_player, stats)
+            return player_name
+        await connection.send("Welcome back, lets play!")
+        if stats["player_password"] == "":
+            return player_name
+        incorrect_password_attempts = self.settings["incorrect_password_attempts"]
+        for attempts_left in range(incorrect_password_attempts - 1, -1, -1):
+            password = await connection.ask("Password (or session token)")
+            if self.credentials.check_session(player_name, password):
+                return player_name
+            password_right, new_password_hash = await asyncio.wrap_future(self.credentials.check_password(stats, password))
+            if password_right:
+                # passwords saved by older versions or with a lower cost are hashed again with the current settings
+                if new_password_hash is not None:
+                    await self.run_storage(self.storage.set_player_password, player_name, new_password_hash)
+                await connection.send(f"Session token, use it instead of your password for the next "
+                                      f"{self.settings['credential_settings']['session_minutes']:g} minutes: {self.credentials.start_session(player_name)}")
+                return player_name
+            await connection.send(f"Incorrect Password, {attempts_left} attempts left")
+        await connection.send("Too many incorrect password attempts, exiting")
+        return None
+
+    async def select_difficulty(self, connection):
+        """
+        Asks for the difficulty.
+
+        Returns: int: The length of the word to guess.
+        """
+        options = "\n".join(f"{key[0]} = {key[1]} ({value} Letters)" for key, value in self.difficulty_word_length.items())
+        lengths = {key[0]: value for key, value in self.difficulty_word_length.items()}
+        difficulty = await connection.ask(f"Select Difficulty:\n{'-'*20}\n{options}\nType Number:")
+        while difficulty not in lengths:
+            difficulty = await connection.ask("Invalid Selection, try again\nType Number:")
+        return lengths[difficulty]
+
+    async def play_game(self, connection, game):
+        """
+        Plays one game, sending the board each turn.
+        """
+        message = ""
+        while game.status == PLAYING:
+            board = "\n".join(get_game_lines(game, message))
+            answer = await connection.ask(f"{board}\nType Hangman Letter (or '?' for a hint):")
+            if answer == "?":
+                message = await self.get_hint(game)
+                continue
+            result = game.guess(answer)
+            self.guesses += 1
+            if result == GUESS_REPEATED:
+                message = "already tried, try again"
+            elif result == GUESS_INVALID:
+                message = "Invalid Input, try again"
+            else:
+                message = ""
+
+    async def get_hint(self, game):
+        """
+        Gets a hint message, the hint engine is built off the event loop the first time.
+        """
+        if self.solver is None:
+            from hangman_solver import HangmanSolver # imports numpy, only when the first hint is asked for
+            buckets = self.word_pool.buckets
+            # only the difficulties' lengths, a mapped dictionary reads just those words
+            words_by_length = {word_length: list(buckets[word_length]) for word_length in set(self.difficulty_word_length.values()) if word_length in buckets}
+            self.solver = asyncio.get_running_loop().run_in_executor(None, HangmanSolver, words_by_length)
+        try:
+            letter = (await self.solver).suggest(game.hidden_hangman, game.wrong_letters)
+        except ImportError as e:
+            return f"No hints available: {e}"
+        return f"Hint: try '{letter}'"
+
+#=======================================
+# In-process Client
+#=======================================
+async def run_bot(host, port, player_name, difficulty, games):
+    """
+    Plays games against the server over TCP, guessing letters from most to least common.
+
+    Args:
+    host (str): The server address.
+    port (int): The server port.
+    player_name (str): The bot's name, a new player without a password.
+    difficulty (str): The difficulty menu number to pick.
+    games (int): The number of games to play.
+    """
+    from hangman_solver import letter_frequency_order # imports numpy, kept out of the server's startup
+    reader, writer = await asyncio.open_connection(host, port)
+    marker = prompt_marker.encode()
+    letters = iter(letter_frequency_order)
+    try:
+        while True:
+            prompt = (await reader.readuntil(marker)).decode()
+            if "Enter your name" in prompt:
+                answer = player_name
+            elif "Set a password" in prompt:
+                answer = ""
+            elif "Type Number" in prompt:
+                answer = difficulty
+                letters = iter(letter_frequency_order)
+            elif "Type Hangman Letter" in prompt:
+                answer = next(letters)
+            elif "Play Again" in prompt:
+                games -= 1
+                answer = "yes" if games > 0 else ""
+            else:
+                raise RuntimeError(f"Unexpected prompt from the server: {prompt!r}")
+            writer.write((answer + "\r\n").encode())
+            await writer.drain()
+            if "Play Again" in prompt and games == 0:
+                await reader.read() # "Goodbye!" until the server closes the connection
+                return
+    finally:
+        writer.close()
+
+async def run_bench(settings, words, clients, games, concurrency):
+    """
+    Starts a server with a temporary data directory and plays games against it with bot clients.
+
+    Args:
+    settings (dict): The settings, see hangman_config.load_settings.
+    words (list): The dictionary words.
+    clients (int): The number of bot sessions.
+    games (int): The games each bot plays.
+    concurrency (int): The most bots connected at once.
+
+    Returns: dict: The bench results.
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = HangmanServer(settings, data_dir, words)
+        port = await server.start("127.0.0.1", 0)
+        limit = asyncio.Semaphore(concurrency)
+        difficulties = [key[0] for key in settings["difficulty_word_length"]]
+
+        async def limited_bot(number):
+            async with limit:
+                await run_bot("127.0.0.1", port, f"bot{number:06d}", difficulties[number % len(difficulties)], games)
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(limited_bot(number) for number in range(clients)))
+        elapsed_time = time.perf_counter() - start_time
+        await server.stop()
+    return {
+        "clients": clients,
+        "concurrency": concurrency,
+        "games": server.games_finished,
+        "guesses": server.guesses,
+        "seconds": round(elapsed_time, 2),
+        "sessions_per_second": round(clients / elapsed_time, 1),
+        "games_per_second": round(server.games_finished / elapsed_time, 1),
+        "guesses_per_second": round(server.guesses / elapsed_time, 1)
+    }
+
+def raise_open_file_limit():
+    """
+    Raises the open file limit as far as allowed, every bot needs a socket at each end.
+    """
+    try:
+        import resource # unix only
+    except ImportError:
+        return
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard_limit == resource.RLIM_INFINITY or hard_limit > soft_limit:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit if hard_limit != resource.RLIM_INFINITY else 65536, hard_limit))
+        except (ValueError, OSError):
+            pass
+
+async def serve(settings, data_dir, words, host, port, report_interval):
+    server = HangmanServer(settings, data_dir, words)
+    port = await server.start(host, port)
+    print(f"Hangman server listening on {host}:{port}")
+    reporter = asyncio.create_task(server.report(report_interval)) if report_interval > 0 else None
+    try:
+        await asyncio.Event().wait() # until Ctrl+C
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await server.stop()
+
+def main():
+    """
+    Runs the server or the bench from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Hangman server for many players at once.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="listen for players")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=7777, help="port to listen on")
+    serve_parser.add_argument("--report-every", type=float, default=10, help="seconds between rate reports, 0 for none")
+    bench_parser = subparsers.add_parser("bench", help="play games against an in-process server with bot clients")
+    bench_parser.add_argument("--clients", type=int, default=1000, help="bot sessions to run")
+    bench_parser.add_argument("--games", type=int, default=3, help="games per bot")
+    bench_parser.add_argument("--concurrency", type=int, default=1000, help="most bots connected at once")
+    for subparser in (serve_parser, bench_parser):
+        subparser.add_argument("--words", default=None, help="word file to use instead of wonderwords or 'dictionary file'")
+    args = parser.parse_args()
+
+    settings, _ = load_settings()
+    if args.words is None and settings["dictionary_file"]:
+        # mapped like the game does, relative paths are from the program folder
+        words = MappedDictionary(os.path.join(program_location, settings["dictionary_file"]), os.path.join(program_location, "data"))
+    else:
+        words = load_dictionary(args.words)
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(settings, os.path.join(program_location, "data"), words, args.host, args.port, args.report_every))
+        except KeyboardInterrupt:
+            print("Server stopped")
+        return
+    raise_open_file_limit()
+    print(f"Running {args.clients} bot sessions of {args.games} games, {args.concurrency} at once...")
+    results = asyncio.run(run_bench(settings, words, args.clients, args.games, args.concurrency))
+    print(f"...{results['games']} games and {results['guesses']} guesses in {results['seconds']} seconds")
+    print(f"\t{results['sessions_per_second']} sessions/s, {results['games_per_second']} games/s, {results['guesses_per_second']} guesses/s")
+
+if __name__ == "__main__":
+    main()
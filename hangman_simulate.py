@@ -0,0 +1,264 @@
+"""
+Batch simulation of Hangman games for tuning the [Score Multipliers] in config.ini.
+
+Plays games headlessly through the HangmanGame engine with a pluggable guessing
+strategy, spreads them across a process pool and reports the score
+distribution from calc_score and the win rate for each difficulty.
+Runs are seeded per chunk of games so the same seed always gives the same
+results, however many workers are used.
+
+Usage:
+    python hangman_simulate.py --games 1000000 --strategy frequency --seed 1
+"""
+import argparse # for command line arguments
+import json # for json output
+import math # for standard deviation
+import multiprocessing # for the process pool
+import os # for cpu count
+import random # for seeded word and guess choices
+import string # for ascii_lowercase
+from collections import Counter # for score histograms
+from hangman_config import load_config, config_file, get_difficulty_word_length, get_score_settings # config.ini handling
+from hangman_engine import HangmanGame, get_wrong_max, get_word_difficulty, PLAYING, WON # game rules
+from hangman_solver import HangmanSolver, letter_frequency_order, np # vectorized hint engine, np is None without numpy
+from hangman_words import bucket_words_by_length, load_dictionary # dictionary loading and bucketing
+
+# games played per task sent to a worker
+chunk_size = 5000
+
+#=======================================
+# Strategies
+#=======================================
+class RandomStrategy:
+    """
+    Guesses the letters not tried yet in a random order.
+    """
+    def __init__(self, words_by_length, rng):
+        self.rng = rng
+
+    def new_game(self, game):
+        self.letters = list(string.ascii_lowercase)
+        self.rng.shuffle(self.letters)
+
+    def next_guess(self, game):
+        return self.letters.pop()
+
+class FrequencyStrategy:
+    """
+    Guesses letters from the most to the least common in English text.
+    """
+    def __init__(self, words_by_length, rng):
+        pass
+
+    def new_game(self, game):
+        self.letters = iter(letter_frequency_order)
+
+    def next_guess(self, game):
+        return next(self.letters)
+
+class OptimalStrategy:
+    """
+    Guesses the letter found in the most dictionary words that still match the game,
+    ties go to the more common letter in English text.
+    Uses HangmanSolver when numpy is installed, a pure Python filter otherwise.
+    """
+    solvers = {} # id of the dictionary: solver, built once per process
+
+    def __init__(self, words_by_length, rng):
+        self.words_by_length = words_by_length
+        self.solver = None
+        if np is not None:
+            if id(words_by_length) not in self.solvers:
+                self.solvers[id(words_by_length)] = HangmanSolver(words_by_length)
+            self.solver = self.solvers[id(words_by_length)]
+
+    def new_game(self, game):
+        self.candidates = self.words_by_length.get(len(game.hangman_word), [])
+
+    def next_guess(self, game):
+        if self.solver is not None:
+            return self.solver.suggest(game.hidden_hangman, game.wrong_letters)
+        right_letters = set(game.right_letters)
+        wrong_letters = set(game.wrong_letters)
+        pattern = game.hidden_hangman
+        # keep words with the revealed letters in the same places, no wrong letters
+        # and no guessed letters in the places still hidden
+        self.candidates = [word for word in self.candidates
+                           if not wrong_letters.intersection(word)
+                           and all(letter == shown if shown != "_" else letter not in right_letters
+                                   for letter, shown in zip(word, pattern))]
+        guessed = right_letters | wrong_letters
+        letter_counts = Counter()
+        for word in self.candidates:
+            letter_counts.update(set(word) - guessed)
+        if letter_counts:
+            return max(letter_counts, key=lambda letter: (letter_counts[letter], -letter_frequency_order.index(letter)))
+        return next(letter for letter in letter_frequency_order if letter not in guessed)
+
+# strategy name: strategy class, add to this to plug in a new strategy
+strategies = {
+    "random": RandomStrategy,
+    "frequency": FrequencyStrategy,
+    "optimal": OptimalStrategy
+}
+
+#=======================================
+# Simulation
+#=======================================
+# set in each worker process by init_worker()
+worker_words_by_length = None
+worker_settings = None
+
+def init_worker(words_by_length, settings):
+    """
+    Keeps the dictionary and settings in the worker so they are only sent once.
+
+    Args: words_by_length (dict): The dictionary bucketed by length, settings (dict): The simulation settings.
+    """
+    global worker_words_by_length, worker_settings
+    worker_words_by_length = words_by_length
+    worker_settings = settings
+
+def simulate_chunk(task):
+    """
+    Plays one chunk of games at one difficulty.
+
+    Args: task (tuple): (word length (int), chunk number (int), number of games (int)).
+
+    Returns: tuple: (word length (int), games (int), wins (int), guesses (int), score histogram (Counter)).
+    """
+    word_length, chunk_number, games = task
+    settings = worker_settings
+    # seeded per chunk so results don't depend on which worker plays it
+    rng = random.Random(f"{settings['seed']}:{word_length}:{chunk_number}")
+    strategy = strategies[settings["strategy"]](worker_words_by_length, rng)
+    words = worker_words_by_length[word_length]
+    wrong_max = get_wrong_max(word_length, settings["difficulty_word_length"])
+    word_difficulty = get_word_difficulty(word_length, settings["difficulty_word_length"])
+    wins = 0
+    guesses = 0
+    scores = Counter()
+    for _ in range(games):
+        game = HangmanGame(rng.choice(words), wrong_max, settings["score_settings"], word_difficulty=word_difficulty)
+        strategy.new_game(game)
+        while game.status == PLAYING:
+            game.guess(strategy.next_guess(game))
+        game_guesses = len(game.right_letters) + len(game.wrong_letters)
+        guesses += game_guesses
+        wins += game.status == WON
+        scores[game.to_record(game_guesses * settings["seconds_per_guess"])["total_score"]] += 1
+    return word_length, games, wins, guesses, scores
+
+def score_percentile(scores, games, percentile):
+    """
+    Gets a percentile from a score histogram.
+
+    Args: scores (Counter): {score: count}, games (int): The total count, percentile (float): 0 to 100.
+
+    Returns: int: The score at the percentile.
+    """
+    target = max(1, math.ceil(games * percentile / 100))
+    seen = 0
+    for score in sorted(scores):
+        seen += scores[score]
+        if seen >= target:
+            return score
+
+def run_simulation(words_by_length, difficulty_word_length, score_settings, games, strategy="frequency",
+                   seed=0, seconds_per_guess=2.0, workers=None):
+    """
+    Plays games at every difficulty across a process pool.
+
+    Args:
+    words_by_length (dict): The dictionary bucketed by length.
+    difficulty_word_length (dict): The difficulty map.
+    score_settings (dict): The score multipliers.
+    games (int): The number of games to play at each difficulty.
+    strategy (str): The name of the guessing strategy in strategies.
+    seed (int): The seed for the run, the same seed gives the same results.
+    seconds_per_guess (float): The simulated time taken per guess, used for the time score.
+    workers (int): The number of worker processes, the cpu count by default.
+
+    Returns: list: One summary dict per difficulty.
+    """
+    settings = {
+        "strategy": strategy,
+        "seed": seed,
+        "seconds_per_guess": seconds_per_guess,
+        "difficulty_word_length": difficulty_word_length,
+        "score_settings": score_settings
+    }
+    tasks = []
+    for word_length in difficulty_word_length.values():
+        if not words_by_length.get(word_length):
+            raise ValueError(f"No {word_length} letter words in the dictionary")
+        for chunk_number, start in enumerate(range(0, games, chunk_size)):
+            tasks.append((word_length, chunk_number, min(chunk_size, games - start)))
+    totals = {word_length: [0, 0, 0, Counter()] for word_length in difficulty_word_length.values()}
+    # only send the buckets the games need to the workers
+    needed_words = words_by_length if strategy == "optimal" else {length: words_by_length[length] for length in totals}
+    with multiprocessing.Pool(workers or os.cpu_count(), initializer=init_worker, initargs=(needed_words, settings)) as pool:
+        for word_length, chunk_games, wins, guesses, scores in pool.imap_unordered(simulate_chunk, tasks):
+            total = totals[word_length]
+            total[0] += chunk_games
+            total[1] += wins
+            total[2] += guesses
+            total[3].update(scores)
+
+    summaries = []
+    for word_length, (total_games, wins, guesses, scores) in totals.items():
+        mean = sum(score * count for score, count in scores.items()) / total_games
+        variance = sum(count * (score - mean) ** 2 for score, count in scores.items()) / total_games
+        summaries.append({
+            "word_difficulty": get_word_difficulty(word_length, difficulty_word_length),
+            "word_length": word_length,
+            "wrong_max": get_wrong_max(word_length, difficulty_word_length),
+            "games": total_games,
+            "win_rate": round(wins / total_games * 100, 2),
+            "average_guesses": round(guesses / total_games, 2),
+            "average_score": round(mean, 2),
+            "score_stdev": round(math.sqrt(variance), 2),
+            "min_score": min(scores),
+            "p10_score": score_percentile(scores, total_games, 10),
+            "median_score": score_percentile(scores, total_games, 50),
+            "p90_score": score_percentile(scores, total_games, 90),
+            "max_score": max(scores)
+        })
+    return summaries
+
+def main():
+    """
+    Runs a simulation from the command line and prints the report.
+    """
+    parser = argparse.ArgumentParser(description="Play Hangman games headlessly to tune the score multipliers.")
+    parser.add_argument("--games", type=int, default=100000, help="games to play at each difficulty")
+    parser.add_argument("--strategy", choices=sorted(strategies), default="frequency", help="guessing strategy")
+    parser.add_argument("--seed", type=int, default=0, help="seed for a reproducible run")
+    parser.add_argument("--seconds-per-guess", type=float, default=2.0, help="simulated time per guess")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--words", default=None, help="word file to use instead of wonderwords")
+    parser.add_argument("--config", default=config_file, help="config file with the settings to test")
+    parser.add_argument("--json", action="store_true", help="print the report as json")
+    args = parser.parse_args()
+
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if not os.path.exists(args.config):
+        parser.error(f"config file {args.config} does not exist") # load_config would write a default one
+    config, _ = load_config(args.config)
+    summaries = run_simulation(bucket_words_by_length(load_dictionary(args.words)), get_difficulty_word_length(config), get_score_settings(config),
+                               args.games, args.strategy, args.seed, args.seconds_per_guess, args.workers)
+    if args.json:
+        print(json.dumps(summaries, indent=4))
+        return
+    print(f"Simulated {args.games} games per difficulty, strategy '{args.strategy}', seed {args.seed}")
+    print("-"*20)
+    for summary in summaries:
+        print(f"{summary['word_difficulty']} ({summary['word_length']} letters, {summary['wrong_max']} wrong guesses allowed)\n"
+              f"\twin rate: {summary['win_rate']}% in {summary['average_guesses']} guesses on average\n"
+              f"\tscore: average {summary['average_score']} (stdev {summary['score_stdev']})\n"
+              f"\t       min {summary['min_score']} / p10 {summary['p10_score']} / median {summary['median_score']}"
+              f" / p90 {summary['p90_score']} / max {summary['max_score']}")
+
+if __name__ == "__main__":
+    main()
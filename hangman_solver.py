@@ -0,0 +1,140 @@
+"""
+Hint engine for Hangman.
+
+Suggests the letter most likely to be in the word from the dictionary words
+still consistent with the hidden word and the wrong letters. Each word length
+gets precomputed NumPy arrays, a letter-by-word matrix of the positions each
+letter is at (as bitmasks) and a 26 bit letter mask per word, so narrowing the
+candidates and counting letter frequencies are batched array operations
+rather than Python loops over the dictionary.
+"""
+try:
+    import numpy as np # pip install numpy
+except ImportError:
+    np = None
+
+# letters of English text from most to least common, used for ties and when no word matches
+letter_frequency_order = "etaoinshrdlcumwfgypbvkjxqz"
+
+class HangmanSolver:
+    """
+    Candidate filtering and letter suggestions over a dictionary.
+
+    Args: words_by_length (dict): {word length: list of lower case a-z words}, see hangman_words.bucket_words_by_length.
+    """
+    def __init__(self, words_by_length):
+        if np is None:
+            raise ImportError("numpy is not installed, run 'pip install numpy' to use hints")
+        # bits set in each byte value, used to count letters from the bytes of the letter masks
+        self.byte_bits = ((np.arange(256)[:, None] >> np.arange(8)) & 1).astype(np.int64)
+        self.tables = {} # word length: (words, position masks, letter masks, letter counts of every word)
+        for word_length, words in words_by_length.items():
+            self.add_words(word_length, words)
+
+    def add_words(self, word_length, words):
+        """
+        Builds the tables of one word length, replacing any it had.
+        Lengths over 32 letters don't fit the position masks and are left out, hints fall back to letter frequency.
+
+        Args: word_length (int): The word length, words (list): The lower case a-z words of that length.
+        """
+        if not words or word_length > 32:
+            return
+        word_numbers = np.arange(len(words))
+        # one row per word, one column per position, 0 = 'a' ... 25 = 'z'
+        characters = np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), word_length) - 97
+        # row per letter, column per word, bit i set if the letter is at position i
+        position_masks = np.zeros((26, len(words)), dtype=np.uint32)
+        for position in range(word_length):
+            position_masks[characters[:, position], word_numbers] |= np.uint32(1 << position)
+        # bit per letter in the word, bit 0 = 'a'
+        letter_masks = np.bitwise_or.reduce(np.left_shift(np.uint32(1), characters.astype(np.uint32)), axis=1)
+        self.tables[word_length] = (np.array(words), position_masks, letter_masks, self.count_letters(letter_masks))
+
+    def count_letters(self, letter_masks):
+        """
+        Counts the words with each letter, from a histogram of each byte of the letter masks.
+
+        Args: letter_masks (numpy.ndarray): The uint32 letter masks of the words.
+
+        Returns: numpy.ndarray: The number of words with each letter, 'a' first.
+        """
+        mask_bytes = letter_masks.astype("<u4").view(np.uint8).reshape(-1, 4) # lowest byte first
+        return np.concatenate([np.bincount(mask_bytes[:, byte], minlength=256) @ self.byte_bits for byte in range(4)])[:26]
+
+    def candidate_mask(self, hidden_hangman, wrong_letters):
+        """
+        Marks the dictionary words still consistent with the game.
+        Every guessed letter has to be at exactly the places it is shown,
+        so wrong letters are at no place and revealed letters are at no hidden place.
+
+        Args: hidden_hangman (list): The word with "_" for letters not guessed yet, wrong_letters (list): The wrong letters.
+
+        Returns: numpy.ndarray: True for each matching word in the word length's table, None if there are no words of that length.
+        """
+        table = self.tables.get(len(hidden_hangman))
+        if table is None:
+            return None
+        position_masks = table[1]
+        guessed_positions = dict.fromkeys(wrong_letters, 0)
+        for position, letter in enumerate(hidden_hangman):
+            if letter != "_":
+                guessed_positions[letter] = guessed_positions.get(letter, 0) | (1 << position)
+        matches = np.ones(position_masks.shape[1], dtype=bool)
+        for letter, positions in guessed_positions.items():
+            matches &= position_masks[ord(letter) - 97] == positions
+        return matches
+
+    def candidates(self, hidden_hangman, wrong_letters):
+        """
+        Gets the dictionary words still consistent with the game.
+
+        Args: hidden_hangman (list): The word with "_" for letters not guessed yet, wrong_letters (list): The wrong letters.
+
+        Returns: list: The matching words.
+        """
+        matches = self.candidate_mask(hidden_hangman, wrong_letters)
+        if matches is None:
+            return []
+        return self.tables[len(hidden_hangman)][0][matches].tolist()
+
+    def letter_probabilities(self, hidden_hangman, wrong_letters):
+        """
+        Gets the chance of each letter not guessed yet being in the word.
+
+        Args: hidden_hangman (list): The word with "_" for letters not guessed yet, wrong_letters (list): The wrong letters.
+
+        Returns: dict: {letter: share of the matching words with the letter}, empty if no word matches.
+        """
+        guessed = set(hidden_hangman) | set(wrong_letters)
+        if guessed <= {"_"} and len(hidden_hangman) in self.tables:
+            # nothing guessed yet, every word of the length matches
+            letter_counts = self.tables[len(hidden_hangman)][3]
+            candidate_count = len(self.tables[len(hidden_hangman)][0])
+        else:
+            matches = self.candidate_mask(hidden_hangman, wrong_letters)
+            candidate_count = 0 if matches is None else int(np.count_nonzero(matches))
+            if candidate_count == 0:
+                return {}
+            words, _, letter_masks, all_letter_counts = self.tables[len(hidden_hangman)]
+            if candidate_count * 2 > len(words):
+                # cheaper to count the words ruled out and take them away
+                letter_counts = all_letter_counts - self.count_letters(letter_masks[~matches])
+            else:
+                letter_counts = self.count_letters(letter_masks[matches])
+        return {chr(97 + code): int(count) / candidate_count for code, count in enumerate(letter_counts)
+                if chr(97 + code) not in guessed}
+
+    def suggest(self, hidden_hangman, wrong_letters):
+        """
+        Suggests the letter most likely to be in the word.
+
+        Args: hidden_hangman (list): The word with "_" for letters not guessed yet, wrong_letters (list): The wrong letters.
+
+        Returns: str: The suggested letter, None if every letter has been guessed.
+        """
+        guessed = set(hidden_hangman) | set(wrong_letters)
+        probabilities = self.letter_probabilities(hidden_hangman, wrong_letters)
+        if probabilities:
+            return max(probabilities, key=lambda letter: (probabilities[letter], -letter_frequency_order.index(letter)))
+        return next((letter for letter in letter_frequency_order if letter not in guessed), None)
@@ -0,0 +1,1108 @@
+"""
+Storage backends for the Hangman game.
+
+JsonStorage keeps one json file per player in players/ and games in the
+append only hangman_stats.jsonl log, SqliteStorage keeps both in one SQLite database in
+WAL mode so several processes can write safely. Both have the same methods,
+open_storage() picks one from the [Storage Settings] in config.ini and
+migrate_storage() copies everything from one backend to the other.
+
+JsonStorage commits hold an exclusive lock on the data directory and every
+file rewrite goes through a temp file, fsync and an atomic rename, so several
+game processes can share one data directory without losing records.
+PersistenceWorker queues finished games and commits them in batches on a
+background thread, so the player never waits for the disk.
+
+State derived from the games, the used word index and the leaderboard, is
+saved as a checkpoint with the log offset it is up to date with (the byte
+offset of the json log, the last game id in SQLite). Loading one only reads
+the games recorded after that offset, so startup doesn't grow with the
+history, and a missing or unreadable checkpoint is rebuilt from scratch.
+
+Usage:
+    python hangman_storage.py migrate json sqlite
+    python hangman_storage.py rebuild_player_stats
+    python hangman_storage.py convert_legacy data/hangman_stats.json
+"""
+import contextlib # for the data directory lock
+import hashlib # for player file names
+import heapq # for the best scores
+import json # for json file handling
+import os # for file paths
+import queue # for the write-behind queue
+import re # for skipping whitespace in json array files
+import threading # for the write-behind worker
+try:
+    import fcntl # for the data directory lock on Linux / MacOS
+except ImportError:
+    fcntl = None
+    import msvcrt # for the data directory lock on Windows
+from hangman_players import upgrade_player_stats, add_game_to_player_stats # player stats aggregates
+import hangman_profile # timing spans and byte counters, on when debug is set
+
+# file name for the game stats log (one json entry per line, append only)
+file_name = "hangman_stats.jsonl"
+# file name for the old game stats json file, migrated into the log once
+legacy_file_name = "hangman_stats.json"
+# file name for the old player credentials and stats json file, split into the player directory once
+player_file_name = "player_stats.json"
+# directory for the player credentials and stats, one json file per player
+player_dir_name = "players"
+# file name for the per player used word index (rebuilt from the game stats log if missing)
+used_words_index_file_name = "used_words_index.json"
+# file name for the sqlite database
+default_database_file_name = "hangman.db"
+# file name locked while the json files are being written
+lock_file_name = "hangman.lock"
+# characters read from a json array file at a time
+array_chunk_size = 1 << 16
+# an entry of a json array file this big that still hasn't decoded is skipped as corrupt
+max_array_entry_size = 1 << 20
+whitespace_pattern = re.compile(r"\s*")
+
+#=======================================
+# Checkpoints
+#=======================================
+def read_checkpoint(file_path, log_offset):
+    """
+    Reads a checkpoint, a snapshot of state derived from the games with the log offset it is up to date with.
+
+    Args: file_path (str): The absolute path to the checkpoint file, log_offset (int): The current end of the game log, see get_log_offset.
+
+    Returns: dict: The checkpoint, None if it is missing, unreadable or past the end of the log (it was built from another log).
+    """
+    try:
+        with open(file_path, mode='r') as file:
+            checkpoint = json.load(file)
+            if hangman_profile.enabled:
+                hangman_profile.count("bytes_read", file.tell())
+        # the log never shrinks, if it has the checkpoint was built from a different log
+        if not 0 <= checkpoint["log_offset"] <= log_offset:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return checkpoint
+
+def write_checkpoint(file_path, log_offset, snapshot):
+    """
+    Saves a checkpoint, games it is missing are replayed from its log offset when it is read.
+
+    Args: file_path (str): The absolute path to the checkpoint file, log_offset (int): The log offset the snapshot is up to date with, snapshot (dict): The state.
+    """
+    write_json_file(file_path, dict(snapshot, log_offset=log_offset))
+
+#=======================================
+# JSON Files
+#=======================================
+def read_statistics_log(file_path, offset=0):
+    """
+    Lazily read the entries of a json lines log, one dict at a time.
+    Blank lines and a partially written last line are skipped.
+
+    Args:
+    file_path (str): The absolute path to the log file.
+    offset (int): The byte offset in the log to start reading from.
+
+    Returns: generator: (entry (dict), end offset of the entry (int)) for each entry in the log.
+    """
+    if not os.path.exists(file_path):
+        return
+    start_offset = offset
+    with open(file_path, mode='rb') as file:
+        file.seek(offset)
+        try:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break # torn write at the end of the log, ignore it
+                offset += len(line)
+                if line.strip() == b"":
+                    continue
+                try:
+                    yield json.loads(line), offset
+                except json.JSONDecodeError:
+                    continue # skip a corrupted entry but keep reading the rest
+        finally:
+            hangman_profile.count("bytes_read", offset - start_offset) # counted once, even if the reader stops early
+
+def scan_array_entry(text, start, state=(0, False, False)):
+    """
+    Scans a json array entry for the ',' or ']' that ends it, used to step over an entry that doesn't decode.
+    Strings and nesting are tracked so commas inside the entry aren't taken for the end of it.
+
+    Args:
+    text (str): The text to scan.
+    start (int): The index to scan from.
+    state (tuple): The (depth, in string, escaped) state, from the last call if the entry carries on from earlier text.
+
+    Returns: tuple: (int) the index of the ',' or ']' ending the entry or -1 if the text ends first, (tuple) the state at the end of the text.
+    """
+    depth, in_string, escaped = state
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{" or char == "[":
+            depth += 1
+        elif char == "}" or char == "]":
+            if depth == 0:
+                return index, state
+            depth -= 1
+        elif char == "," and depth == 0:
+            return index, state
+    return -1, (depth, in_string, escaped)
+
+def read_statistics_array(file_path, errors=None):
+    """
+    Lazily read the entries of a json array file, like the old hangman_stats.json, one dict at a time.
+    The file is read in chunks and only the entry being decoded is held in memory, so the size
+    of the file doesn't matter. Entries that don't decode, or aren't dicts, are skipped and reported.
+
+    Args:
+    file_path (str): The absolute path to the JSON file.
+    errors (list): Optional list the skipped entries are added to as {"entry", "offset", "error"} dicts, they are printed if not given.
+
+    Returns: generator: The entries as dicts.
+
+    Raises: ValueError: If the file isn't a json array.
+    """
+    def report(entry_number, offset, error):
+        if errors is None:
+            print(f"Skipped corrupt entry {entry_number} at character {offset} of {file_path}: {error}")
+        else:
+            errors.append({"entry": entry_number, "offset": offset, "error": error})
+
+    decoder = json.JSONDecoder()
+    with open(file_path, mode='r') as file:
+        buffer = file.read(array_chunk_size)
+        position = whitespace_pattern.match(buffer).end()
+        while position == len(buffer) and buffer:
+            buffer = file.read(array_chunk_size)
+            position = whitespace_pattern.match(buffer).end()
+        if not buffer:
+            return # empty file
+        if buffer[position] != "[":
+            raise ValueError(f"{file_path} is not a json list")
+        position += 1
+        consumed = 0 # characters dropped from the front of the buffer
+        end_of_file = False
+        entry_number = 0
+        while True:
+            position = whitespace_pattern.match(buffer, position).end()
+            if position == len(buffer) or buffer[position] == ",":
+                if position < len(buffer):
+                    position += 1 # between entries
+                    continue
+                if end_of_file:
+                    report(entry_number, consumed + position, "the file ends without closing the list")
+                    return
+                chunk = file.read(array_chunk_size)
+                consumed += position
+                buffer, position, end_of_file = buffer[position:] + chunk, 0, chunk == ""
+                continue
+            if buffer[position] == "]":
+                return
+            entry_number += 1
+            try:
+                entry, end = decoder.raw_decode(buffer, position)
+                # a number cut off at the end of the buffer still decodes, read on to be sure
+                if end == len(buffer) and not end_of_file:
+                    raise json.JSONDecodeError("entry runs past the buffer", buffer, end)
+            except json.JSONDecodeError as e:
+                end, state = scan_array_entry(buffer, position)
+                if end == -1 and not end_of_file and len(buffer) - position < max_array_entry_size:
+                    # the entry carries on in the next chunk
+                    entry_number -= 1
+                    chunk = file.read(array_chunk_size)
+                    consumed += position
+                    buffer, position, end_of_file = buffer[position:] + chunk, 0, chunk == ""
+                    continue
+                report(entry_number, consumed + position, e.msg)
+                # step over the rest of the entry without keeping it in memory
+                while end == -1 and not end_of_file:
+                    consumed += len(buffer)
+                    buffer = file.read(array_chunk_size)
+                    end_of_file = buffer == ""
+                    end, state = scan_array_entry(buffer, 0, state)
+                if end == -1:
+                    return
+                position = end
+                continue
+            position = end
+            if not isinstance(entry, dict):
+                report(entry_number, consumed + position, f"expected an object, got {type(entry).__name__}")
+                continue
+            yield entry
+
+def load_statistics_from_json(file_path):
+    """
+    Load data from a json file.
+    '.jsonl' logs are streamed back lazily, one entry at a time.
+    Corrupt entries of other files are skipped and reported, see read_statistics_array to read big files one entry at a time.
+
+    Args:
+    file_path (str): The absolute path to the JSON file.
+
+    Returns:
+    list: The list of json entries as dicts (a generator for '.jsonl' logs).
+
+    Raises: ValueError: If the file isn't a json list, so a save can't overwrite it with an empty list.
+    """
+    if file_path.endswith(".jsonl"):
+        return (entry for entry, _ in read_statistics_log(file_path))
+    # Load current data from the file if it exists
+    if not os.path.exists(file_path):
+        return []
+    return list(read_statistics_array(file_path))
+
+def append_statistics_to_log(file_path, entries, fsync=True):
+    """
+    Append entries to a json lines log with a single buffered write.
+    If the log ends in a torn line from a crash, the line is ended first so the new
+    entries start on a line of their own, the torn line is skipped as a corrupted entry.
+    Hold the data directory lock, see lock_data_directory, if other processes write to the log.
+
+    Args:
+    file_path (str): The absolute path to the log file.
+    entries (list): The new entries to append.
+    fsync (bool): True to fsync the log before returning.
+
+    Returns: tuple: The (start, end) byte offsets of the entries in the log.
+    """
+    lines = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+    hangman_profile.count("bytes_written", len(lines))
+    with open(file_path, mode='a+b') as file:
+        start_offset = file.seek(0, os.SEEK_END)
+        if start_offset > 0:
+            file.seek(start_offset - 1)
+            if file.read(1) != b"\n":
+                file.write(b"\n") # appended at the end, the file is in append mode
+                start_offset += 1
+        file.write(lines)
+        if fsync:
+            file.flush()
+            os.fsync(file.fileno())
+    return start_offset, start_offset + len(lines)
+
+def save_statistics_to_json(file_path, statistics):
+    """
+    Save an entry to a json file.
+    '.jsonl' logs are appended to, other files have the new entry added to the list and are rewritten.
+
+    Args:
+    file_path (str): The absolute path to the JSON file.
+    statistics (dict): The new entry to save.
+
+    Returns: tuple: The (start, end) byte offsets of the entry for '.jsonl' logs, otherwise None.
+    """
+    if file_path.endswith(".jsonl"):
+        return append_statistics_to_log(file_path, [statistics])
+
+    json_file = load_statistics_from_json(file_path)
+
+    if json_file != []:
+        # add stats to the list
+        json_file.append(statistics)
+    else:
+        json_file = [statistics]
+
+    # Save the list back to the file
+    with open(file_path, mode='w') as file:
+        json.dump(json_file, file, indent=4)
+
+def get_temp_file_path(file_path):
+    """
+    Gets a temp file name next to a file, unique to the process and thread so writers never share a temp file.
+
+    Args: file_path (str): The absolute path to the file the temp file is renamed over.
+
+    Returns: str: The absolute path to the temp file.
+    """
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def write_json_file(file_path, data, indent=None):
+    """
+    Write json to a temp file, fsync it and rename it over the file, so a crash can't leave it half written.
+
+    Args: file_path (str): The absolute path to the JSON file, data: The data to save, indent (int): Optional json indent.
+    """
+    temp_file_path = get_temp_file_path(file_path)
+    with open(temp_file_path, mode='w') as file:
+        json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+        if hangman_profile.enabled:
+            hangman_profile.count("bytes_written", file.tell())
+    os.replace(temp_file_path, file_path)
+
+@contextlib.contextmanager
+def lock_data_directory(data_dir, lock_name=lock_file_name):
+    """
+    Holds an exclusive lock on the data directory, shared by every process and thread using it.
+    Not re-entrant, don't take it again while holding it.
+
+    Args: data_dir (str): The directory the data files are kept in, lock_name (str): Optional lock file name for a lock of its own.
+    """
+    with open(os.path.join(data_dir, lock_name), mode='a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX) # released when the file is closed
+            yield
+            return
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue # LK_LOCK gives up after 10 seconds, keep waiting
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def convert_statistics_array_to_log(array_file_path, log_file_path):
+    """
+    Writes the entries of a json array file to a json lines log, one entry at a time so the
+    whole history is never in memory. The log is written to a temp file and renamed once complete.
+
+    Args:
+    array_file_path (str): The absolute path to the JSON array file.
+    log_file_path (str): The absolute path to the '.jsonl' log file to write.
+
+    Returns: tuple: (int) the number of entries written, (list) the skipped corrupt entries, see read_statistics_array.
+    """
+    errors = []
+    entries = 0
+    temp_file_path = log_file_path + ".tmp"
+    try:
+        with open(temp_file_path, mode='w') as file:
+            for stats in read_statistics_array(array_file_path, errors):
+                file.write(json.dumps(stats) + "\n")
+                entries += 1
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        os.remove(temp_file_path)
+        raise
+    os.replace(temp_file_path, log_file_path)
+    return entries, errors
+
+def print_skipped_entries(file_path, errors):
+    """
+    Prints the corrupt entries skipped while reading a json array file.
+
+    Args: file_path (str): The file that was read, errors (list): The skipped entries, see read_statistics_array.
+    """
+    for error in errors:
+        print(f"Skipped corrupt entry {error['entry']} at character {error['offset']} of {file_path}: {error['error']}")
+
+def migrate_statistics_to_log(legacy_file_path, log_file_path):
+    """
+    One-time migration of the old json array game stats file into the json lines log.
+    The old file is kept as '<name>.migrated' once the log has been written.
+
+    Args:
+    legacy_file_path (str): The absolute path to the old JSON file.
+    log_file_path (str): The absolute path to the '.jsonl' log file.
+    """
+    if not os.path.exists(legacy_file_path) or os.path.exists(log_file_path):
+        return
+    print("Migrating game stats to the new log format...")
+    # write to a temp file first so a crash can't leave a half migrated log
+    try:
+        games, errors = convert_statistics_array_to_log(legacy_file_path, log_file_path)
+    except ValueError as e:
+        print(f"Could not migrate the game stats, {legacy_file_path} has been left as it is: {e}")
+        return
+    print_skipped_entries(legacy_file_path, errors)
+    os.replace(legacy_file_path, legacy_file_path + ".migrated")
+    print(f"...{games} games migrated!")
+
+def migrate_players_to_directory(legacy_file_path, player_dir):
+    """
+    One-time migration of the old player stats json file into one file per player.
+    The old file is kept as '<name>.migrated' once every player has been written.
+
+    Args:
+    legacy_file_path (str): The absolute path to the old JSON file.
+    player_dir (str): The absolute path to the player directory.
+    """
+    if not os.path.exists(legacy_file_path) or os.path.exists(player_dir):
+        return
+    print("Migrating player stats to one file per player...")
+    # build the directory under a temp name so a crash can't leave it half migrated
+    temp_player_dir = player_dir + ".tmp"
+    os.makedirs(temp_player_dir, exist_ok=True)
+    players = 0
+    try:
+        for player_stats in read_statistics_array(legacy_file_path):
+            write_json_file(os.path.join(temp_player_dir, get_player_file_name(player_stats["player_name"])),
+                            upgrade_player_stats(player_stats), indent=4)
+            players += 1
+    except ValueError as e:
+        print(f"Could not migrate the player stats, {legacy_file_path} has been left as it is: {e}")
+        return
+    os.replace(temp_player_dir, player_dir)
+    os.replace(legacy_file_path, legacy_file_path + ".migrated")
+    print(f"...{players} players migrated!")
+
+def get_player_file_name(player_name):
+    """
+    Gets the file name of a player's stats, hashed so any name is a safe file name.
+
+    Args: player_name (str): The player's name.
+
+    Returns: str: The file name.
+    """
+    return hashlib.sha1(player_name.encode()).hexdigest() + ".json"
+
+class JsonStorage:
+    """
+    Players in one json file each in players/, games in the hangman_stats.jsonl log.
+    Saving a player only rewrites that player's file. Writes hold the data directory lock.
+    A per player used word index covers the "already played" check, it is saved
+    with the log offset it covers and games logged after that are replayed from the log.
+
+    Args:
+    data_dir (str): The directory the files are kept in.
+    fsync_every_n_games (int): fsync the game log every n games, 0 leaves it to the OS.
+    checkpoint_every_n_games (int): Save the used word index every n games as well as on close, 0 only on close.
+    """
+    def __init__(self, data_dir, fsync_every_n_games=1, checkpoint_every_n_games=100):
+        self.data_dir = data_dir
+        self.fsync_every_n_games = fsync_every_n_games
+        self.checkpoint_every_n_games = checkpoint_every_n_games
+        self.games_since_checkpoint = 0 # number of games added since the used word index was saved
+        self.log_file_path = os.path.join(data_dir, file_name)
+        self.player_dir = os.path.join(data_dir, player_dir_name)
+        self.index_file_path = os.path.join(data_dir, used_words_index_file_name)
+        self.unsynced_log_writes = 0 # number of log writes since the last fsync
+        self.used_words_index = None # {player name: set of played words}, loaded by load_used_words_index()
+        self.used_words_index_offset = 0 # game log byte offset the used word index is up to date with
+        self.archive = None # GameArchive the recorded games are also added to, set by open_storage()
+        migrate_statistics_to_log(os.path.join(data_dir, legacy_file_name), self.log_file_path)
+        migrate_players_to_directory(os.path.join(data_dir, player_file_name), self.player_dir)
+        os.makedirs(self.player_dir, exist_ok=True)
+
+    # Players
+    #=======================================
+    def read_player_file(self, file_path):
+        try:
+            with open(file_path, mode='r') as file:
+                player_stats = json.load(file)
+                if hangman_profile.enabled:
+                    hangman_profile.count("bytes_read", file.tell())
+                return upgrade_player_stats(player_stats)
+        except (OSError, ValueError):
+            return None # missing or corrupted
+
+    def iter_players(self):
+        for entry in os.scandir(self.player_dir):
+            if entry.name.endswith(".json"):
+                stats = self.read_player_file(entry.path)
+                if stats is not None:
+                    yield stats
+
+    def get_player(self, player_name):
+        return self.read_player_file(os.path.join(self.player_dir, get_player_file_name(player_name)))
+
+    def write_player(self, player_stats):
+        write_json_file(os.path.join(self.player_dir, get_player_file_name(player_stats["player_name"])), player_stats, indent=4)
+
+    def add_player(self, player_stats):
+        self.add_players([player_stats])
+
+    def save_player(self, player_stats):
+        """
+        Add or replace the saved stats of a player, only their file is written.
+        """
+        self.add_players([player_stats])
+
+    def add_players(self, players):
+        """
+        Add or replace the stats of many players.
+        """
+        with lock_data_directory(self.data_dir):
+            for player_stats in players:
+                self.write_player(player_stats)
+
+    def set_player_password(self, player_name, password_hash):
+        """
+        Replace a player's password hash, their stats are read again under the lock so no game is lost.
+        """
+        with lock_data_directory(self.data_dir):
+            player_stats = self.get_player(player_name)
+            if player_stats is not None:
+                player_stats["player_password"] = password_hash
+                self.write_player(player_stats)
+
+    def top_players(self, limit):
+        """
+        Gets the players with the highest total score, best first.
+        """
+        return heapq.nlargest(limit, self.iter_players(), key=lambda stats: stats["total_score"])
+
+    # Games
+    #=======================================
+    def iter_games(self):
+        return load_statistics_from_json(self.log_file_path)
+
+    def add_games(self, games):
+        """
+        Append finished games to the game log and add their words to the used word index, holding the data directory lock.
+        """
+        with lock_data_directory(self.data_dir):
+            self.log_games(games)
+
+    def log_games(self, games):
+        """
+        Append finished games to the game log and add their words to the used word index.
+        Only call it holding the data directory lock, see add_games.
+        """
+        self.load_used_words_index()
+        self.unsynced_log_writes += len(games)
+        fsync = self.fsync_every_n_games > 0 and self.unsynced_log_writes >= self.fsync_every_n_games
+        start_offset, end_offset = append_statistics_to_log(self.log_file_path, games, fsync)
+        if fsync:
+            self.unsynced_log_writes = 0
+        for game_stats in games:
+            self.used_words_index.setdefault(game_stats["player_name"], set()).add(game_stats["hangman_word"])
+        # only move the offset on if no other game was logged in between,
+        # anything skipped is picked up from the log on the next load
+        if start_offset == self.used_words_index_offset:
+            self.used_words_index_offset = end_offset
+        self.games_since_checkpoint += len(games)
+        if self.checkpoint_every_n_games > 0 and self.games_since_checkpoint >= self.checkpoint_every_n_games:
+            self.save_used_words_index()
+
+    def add_game(self, game_stats):
+        self.add_games([game_stats])
+
+    def record_games(self, games):
+        """
+        Logs finished games and adds them to their players' stats as one locked commit.
+        Each player's stats are read again under the lock, so updates from other processes are kept.
+
+        Args: games (list): The game statistics entries.
+
+        Returns: list: The updated stats of each player.
+        """
+        with lock_data_directory(self.data_dir):
+            self.log_games(games)
+            updated_players = {}
+            for game_stats in games:
+                player_stats = updated_players.get(game_stats["player_name"]) or self.get_player(game_stats["player_name"])
+                if player_stats is not None:
+                    add_game_to_player_stats(player_stats, game_stats)
+                    updated_players[player_stats["player_name"]] = player_stats
+            for player_stats in updated_players.values():
+                self.write_player(player_stats)
+        archive_games(self.archive, games)
+        return list(updated_players.values())
+
+    def word_used(self, player_name, word):
+        return word in self.load_used_words_index().get(player_name, ())
+
+    def top_games(self, limit):
+        """
+        Gets the highest scoring games, best first.
+        """
+        return heapq.nlargest(limit, self.iter_games(), key=lambda stats: stats["total_score"])
+
+    # Checkpoints
+    #=======================================
+    def get_log_offset(self):
+        """
+        Gets the end of the game log, checkpoints are saved with the offset they are up to date with.
+        """
+        return os.path.getsize(self.log_file_path) if os.path.exists(self.log_file_path) else 0
+
+    def iter_games_after(self, log_offset):
+        """
+        Reads the games logged after a checkpoint's log offset.
+
+        Returns: generator: (game statistics entry (dict), log offset after it (int)) for each game.
+        """
+        return read_statistics_log(self.log_file_path, log_offset)
+
+    def get_players_snapshot(self):
+        """
+        Reads every player under the lock, so no game is recorded while they are read.
+
+        Returns: tuple: (int) the log offset the player stats are up to date with, (list) the player stats.
+        """
+        with lock_data_directory(self.data_dir):
+            return self.get_log_offset(), list(self.iter_players())
+
+    # Used Word Index
+    #=======================================
+    def save_used_words_index(self):
+        """
+        Save the used word index as a checkpoint.
+        """
+        if self.used_words_index is None:
+            return
+        write_checkpoint(self.index_file_path, self.used_words_index_offset,
+                         {"players": {player_name: sorted(words) for player_name, words in self.used_words_index.items()}})
+        self.games_since_checkpoint = 0
+
+    def update_used_words_index(self, offset=0):
+        """
+        Add the games in the game log after the offset to the used word index.
+        """
+        for stats, end_offset in self.iter_games_after(offset):
+            self.used_words_index.setdefault(stats["player_name"], set()).add(stats["hangman_word"])
+            self.used_words_index_offset = end_offset
+
+    def rebuild_used_words_index(self):
+        """
+        Rebuild the used word index from the whole game log and save it.
+        """
+        print("Building used word index...")
+        self.used_words_index = {}
+        self.used_words_index_offset = 0
+        self.update_used_words_index()
+        self.save_used_words_index()
+        return self.used_words_index
+
+    def load_used_words_index(self):
+        """
+        Load the used word index once per session.
+        Games logged since the index was last saved are replayed from the log,
+        a missing or unreadable index is rebuilt from the whole log.
+
+        Returns: dict: The player names mapped to the set of words they have played.
+        """
+        if self.used_words_index is not None:
+            return self.used_words_index
+        with hangman_profile.span("storage.load_used_words_index"):
+            return self.read_used_words_index()
+
+    def read_used_words_index(self):
+        checkpoint = read_checkpoint(self.index_file_path, self.get_log_offset())
+        try:
+            self.used_words_index = {player_name: set(words) for player_name, words in checkpoint["players"].items()}
+        except (KeyError, TypeError, AttributeError):
+            return self.rebuild_used_words_index() # missing, unreadable or from another log
+        self.used_words_index_offset = checkpoint["log_offset"]
+        self.update_used_words_index(self.used_words_index_offset)
+        return self.used_words_index
+
+    def close(self):
+        self.save_used_words_index()
+
+#=======================================
+# SQLite
+#=======================================
+class SqliteStorage:
+    """
+    Players and games in one SQLite database in WAL mode.
+    Players are keyed by name, games are indexed on (player_name, hangman_word)
+    for the "already played" check and on total_score for the best scores.
+    The full stats of each row are kept as json next to the indexed columns.
+
+    Args: database_path (str): The absolute path to the database file.
+    """
+    def __init__(self, database_path):
+        import sqlite3 # for the sqlite backend, only imported when it is used
+        self.database_path = database_path
+        self.archive = None # GameArchive the recorded games are also added to, set by open_storage()
+        self.connection = sqlite3.connect(database_path, timeout=30) # wait up to 30s for other writers
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS players (
+                    player_name TEXT PRIMARY KEY,
+                    total_score INTEGER NOT NULL DEFAULT 0,
+                    stats TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS players_total_score ON players (total_score);
+                CREATE TABLE IF NOT EXISTS games (
+                    game_id INTEGER PRIMARY KEY,
+                    player_name TEXT NOT NULL,
+                    hangman_word TEXT NOT NULL,
+                    total_score INTEGER NOT NULL,
+                    stats TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS games_player_word ON games (player_name, hangman_word);
+                CREATE INDEX IF NOT EXISTS games_total_score ON games (total_score);
+            """)
+
+    # Players
+    #=======================================
+    def iter_players(self):
+        for (stats,) in self.connection.execute("SELECT stats FROM players"):
+            yield upgrade_player_stats(json.loads(stats))
+
+    def get_player(self, player_name):
+        row = self.connection.execute("SELECT stats FROM players WHERE player_name = ?", (player_name,)).fetchone()
+        return None if row is None else upgrade_player_stats(json.loads(row[0]))
+
+    def add_player(self, player_stats):
+        self.add_players([player_stats])
+
+    def save_player(self, player_stats):
+        self.add_players([player_stats])
+
+    def add_players(self, players):
+        """
+        Add or replace the stats of many players in one transaction.
+        """
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO players (player_name, total_score, stats) VALUES (?, ?, ?)",
+                                        ((player_stats["player_name"], player_stats.get("total_score", 0), json.dumps(player_stats))
+                                         for player_stats in players))
+
+    def set_player_password(self, player_name, password_hash):
+        """
+        Replace a player's password hash, the transaction takes the write lock before reading so no game is lost.
+        """
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            player_stats = self.get_player(player_name)
+            if player_stats is not None:
+                player_stats["player_password"] = password_hash
+                self.connection.execute("UPDATE players SET stats = ? WHERE player_name = ?", (json.dumps(player_stats), player_name))
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+
+    def top_players(self, limit):
+        """
+        Gets the players with the highest total score, best first.
+        """
+        rows = self.connection.execute("SELECT stats FROM players ORDER BY total_score DESC LIMIT ?", (limit,))
+        return [upgrade_player_stats(json.loads(stats)) for (stats,) in rows]
+
+    # Games
+    #=======================================
+    def iter_games(self):
+        for (stats,) in self.connection.execute("SELECT stats FROM games ORDER BY game_id"):
+            yield json.loads(stats)
+
+    def add_games(self, games):
+        with self.connection:
+            self.connection.executemany("INSERT INTO games (player_name, hangman_word, total_score, stats) VALUES (?, ?, ?, ?)",
+                                        ((game_stats["player_name"], game_stats["hangman_word"], game_stats["total_score"], json.dumps(game_stats))
+                                         for game_stats in games))
+
+    def add_game(self, game_stats):
+        self.add_games([game_stats])
+
+    def record_games(self, games):
+        """
+        Logs finished games and adds them to their players' stats in one transaction.
+        The transaction takes the write lock before reading, so updates from other processes are kept.
+
+        Args: games (list): The game statistics entries.
+
+        Returns: list: The updated stats of each player.
+        """
+        updated_players = {}
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.executemany("INSERT INTO games (player_name, hangman_word, total_score, stats) VALUES (?, ?, ?, ?)",
+                                        ((game_stats["player_name"], game_stats["hangman_word"], game_stats["total_score"], json.dumps(game_stats))
+                                         for game_stats in games))
+            for game_stats in games:
+                player_stats = updated_players.get(game_stats["player_name"]) or self.get_player(game_stats["player_name"])
+                if player_stats is not None:
+                    add_game_to_player_stats(player_stats, game_stats)
+                    updated_players[player_stats["player_name"]] = player_stats
+            self.connection.executemany("UPDATE players SET total_score = ?, stats = ? WHERE player_name = ?",
+                                        ((player_stats["total_score"], json.dumps(player_stats), player_stats["player_name"])
+                                         for player_stats in updated_players.values()))
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        archive_games(self.archive, games)
+        return list(updated_players.values())
+
+    def word_used(self, player_name, word):
+        row = self.connection.execute("SELECT 1 FROM games WHERE player_name = ? AND hangman_word = ? LIMIT 1", (player_name, word)).fetchone()
+        return row is not None
+
+    # Checkpoints
+    #=======================================
+    def get_log_offset(self):
+        """
+        Gets the id of the last game, checkpoints are saved with the id they are up to date with.
+        """
+        return self.connection.execute("SELECT COALESCE(MAX(game_id), 0) FROM games").fetchone()[0]
+
+    def iter_games_after(self, log_offset):
+        """
+        Reads the games recorded after a checkpoint's game id.
+
+        Returns: generator: (game statistics entry (dict), game id (int)) for each game.
+        """
+        for game_id, stats in self.connection.execute("SELECT game_id, stats FROM games WHERE game_id > ? ORDER BY game_id", (log_offset,)):
+            yield json.loads(stats), game_id
+
+    def get_players_snapshot(self):
+        """
+        Reads every player in one read transaction, so no game is recorded while they are read.
+
+        Returns: tuple: (int) the game id the player stats are up to date with, (list) the player stats.
+        """
+        self.connection.execute("BEGIN")
+        try:
+            return self.get_log_offset(), list(self.iter_players())
+        finally:
+            self.connection.commit()
+
+    def top_games(self, limit):
+        """
+        Gets the highest scoring games, best first.
+        """
+        rows = self.connection.execute("SELECT stats FROM games ORDER BY total_score DESC LIMIT ?", (limit,))
+        return [json.loads(stats) for (stats,) in rows]
+
+    def close(self):
+        self.connection.close()
+
+#=======================================
+# Write-behind
+#=======================================
+class PersistenceWorker:
+    """
+    Commits finished games on a background thread, everything queued since the last commit goes in one batch.
+    The worker opens its own storage, so it never shares a file handle or database connection with the game.
+
+    Args: open_worker_storage (callable): Opens the storage for the worker, called on the worker thread.
+    """
+    stop_signal = object() # queued by close() after the last game
+
+    def __init__(self, open_worker_storage):
+        self.open_worker_storage = open_worker_storage
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="hangman-persistence", daemon=True)
+        self.thread.start()
+
+    def submit_game(self, game_stats):
+        """
+        Queues a finished game to be logged and added to the player's stats, returns straight away.
+        """
+        self.queue.put(game_stats)
+
+    def run(self):
+        try:
+            storage = self.open_worker_storage()
+        except Exception as e:
+            storage = None
+            print(f"Error opening storage for saving game stats: {e}")
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            # take everything else waiting so it goes in the same commit
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self.stop_signal in batch:
+                stopping = True
+                batch.remove(self.stop_signal)
+            if batch and storage is not None:
+                try:
+                    with hangman_profile.span("storage.record_games"):
+                        storage.record_games(batch)
+                    hangman_profile.count("games_saved", len(batch))
+                except Exception as e:
+                    print(f"Error saving game stats: {e}")
+            for _ in range(len(batch) + stopping):
+                self.queue.task_done()
+        if storage is not None:
+            storage.close()
+
+    def flush(self):
+        """
+        Waits until every queued game has been committed.
+        """
+        self.queue.join()
+
+    def close(self):
+        """
+        Commits everything queued and stops the worker.
+        """
+        if self.thread.is_alive():
+            self.queue.put(self.stop_signal)
+            self.thread.join()
+
+#=======================================
+# Backends
+#=======================================
+def open_storage(storage_settings, data_dir, backend=None):
+    """
+    Opens the storage backend set by 'backend' under [Storage Settings] in config.ini.
+
+    Args:
+    storage_settings (dict): The storage settings, see hangman_config.get_storage_settings.
+    data_dir (str): The directory the data files are kept in.
+    backend (str): Optional "json" or "sqlite" to use instead of the config setting.
+
+    Returns: JsonStorage or SqliteStorage: The open storage, recorded games are archived too if 'archive games' is on.
+    """
+    if backend is None:
+        backend = storage_settings["backend"]
+    if backend == "json":
+        storage = JsonStorage(data_dir, storage_settings["fsync_every_n_games"], storage_settings.get("checkpoint_every_n_games", 100))
+    elif backend == "sqlite":
+        storage = SqliteStorage(os.path.join(data_dir, storage_settings["sqlite_file"]))
+    else:
+        raise ValueError(f"Unknown storage backend '{backend}', expected 'json' or 'sqlite'")
+    if storage_settings.get("archive_games", True):
+        from hangman_archive import GameArchive, archive_dir_name # columnar copy of the games for reports
+        storage.archive = GameArchive(os.path.join(data_dir, archive_dir_name))
+    return storage
+
+def archive_games(archive, games):
+    """
+    Adds recorded games to the game archive. The games are already saved, so a failed archive write is only reported.
+
+    Args: archive (GameArchive): The archive, None if archiving is off, games (list): The game statistics entries.
+    """
+    if archive is None:
+        return
+    try:
+        with hangman_profile.span("archive.append"):
+            archive.append(games)
+    except (OSError, ValueError, KeyError, TypeError, OverflowError) as e:
+        print(f"Error archiving game stats, run 'python hangman_archive.py rebuild' to catch up: {e}")
+
+def get_game_key(game_stats):
+    """
+    Gets what tells one game statistics entry from another, for finding games a storage already has.
+    """
+    return (game_stats.get("player_name"), game_stats.get("game_time"), game_stats.get("hangman_word"),
+            game_stats.get("total_score"), game_stats.get("time_taken"))
+
+def storage_is_empty(storage):
+    """
+    Checks that a storage has no players and no games.
+    """
+    return storage.get_log_offset() == 0 and next(iter(storage.iter_players()), None) is None
+
+def migrate_storage(source, target, batch_size=10000, append=False):
+    """
+    Copies every player and game from one storage to another.
+
+    Args:
+    source: The storage to copy from.
+    target: The storage to copy to.
+    batch_size (int): Games written per batch.
+    append (bool): Copy into a target that already has players or games, its players are replaced by the source's
+    and games it already has are skipped.
+
+    Returns: tuple: The number of (players, games) copied.
+
+    Raises: ValueError: If the target has players or games and append is False.
+    """
+    existing_games = set()
+    if not storage_is_empty(target):
+        if not append:
+            raise ValueError("the target storage already has players or games, migrating again would copy every game twice")
+        existing_games = {get_game_key(game_stats) for game_stats in target.iter_games()}
+    players = list(source.iter_players())
+    target.add_players(players)
+    games = 0
+    batch = []
+    for game_stats in source.iter_games():
+        if get_game_key(game_stats) in existing_games:
+            continue
+        batch.append(game_stats)
+        if len(batch) == batch_size:
+            target.add_games(batch)
+            games += len(batch)
+            batch = []
+    if batch:
+        target.add_games(batch)
+        games += len(batch)
+    return len(players), games
+
+def remove_leaderboard(data_dir):
+    """
+    Removes the saved leaderboards after the player stats change outside the game, they are rebuilt on the next run.
+
+    Args: data_dir (str): The directory the data files are kept in.
+    """
+    from hangman_leaderboard import leaderboard_file_name, windows_file_name # cached leaderboards
+    for file_name in (leaderboard_file_name, windows_file_name):
+        file_path = os.path.join(data_dir, file_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+def main():
+    """
+    Runs the storage tools from the command line.
+    """
+    import argparse # for command line arguments
+    import sys # for exit
+    from hangman_config import load_settings, program_location # config.ini handling
+    parser = argparse.ArgumentParser(description="Hangman storage tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="copy every player and game from one backend to the other")
+    migrate_parser.add_argument("source", choices=["json", "sqlite"])
+    migrate_parser.add_argument("target", choices=["json", "sqlite"])
+    migrate_parser.add_argument("--append", action="store_true", help="copy into a target that already has players or games, skipping games it has")
+    subparsers.add_parser("rebuild_player_stats", help="recompute every player's stats from the game log")
+    convert_parser = subparsers.add_parser("convert_legacy", help="convert an old json list stats file to a json lines log")
+    convert_parser.add_argument("file", help="the json list file, e.g. data/hangman_stats.json")
+    convert_parser.add_argument("--output", default=None, help="the log to write, the file name with '.jsonl' by default")
+    args = parser.parse_args()
+
+    if args.command == "convert_legacy":
+        output_file = args.output or os.path.splitext(args.file)[0] + ".jsonl"
+        if os.path.exists(output_file):
+            parser.error(f"{output_file} already exists")
+        print(f"Converting {args.file} to {output_file}...")
+        try:
+            entries, errors = convert_statistics_array_to_log(args.file, output_file)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Could not convert {args.file}: {e}")
+        print_skipped_entries(args.file, errors)
+        print(f"...{entries} entries converted, {len(errors)} corrupt entries skipped!")
+        return
+
+    settings, _ = load_settings()
+    data_dir = os.path.join(program_location, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    if args.command == "rebuild_player_stats":
+        from hangman_players import rebuild_player_stats # player stats aggregates
+        storage = open_storage(settings["storage_settings"], data_dir)
+        print("Rebuilding player stats from the game log...")
+        players, games, unknown_players = rebuild_player_stats(storage, [key[1] for key in settings["difficulty_word_length"]])
+        storage.close()
+        remove_leaderboard(data_dir)
+        print(f"...{players} players rebuilt from {games} games!")
+        if unknown_players:
+            print(f"Games of {len(unknown_players)} names with no player profile were left out: {', '.join(sorted(unknown_players))}")
+        return
+    if args.source == args.target:
+        parser.error("source and target must be different backends")
+    source = open_storage(settings["storage_settings"], data_dir, args.source)
+    target = open_storage(settings["storage_settings"], data_dir, args.target)
+    print(f"Migrating {args.source} storage to {args.target}...")
+    try:
+        players, games = migrate_storage(source, target, append=args.append)
+    except ValueError as e:
+        parser.error(f"{e}, use --append to copy into it anyway")
+    finally:
+        source.close()
+        target.close()
+    remove_leaderboard(data_dir)
+    print(f"...{players} players and {games} games migrated!")
+    print(f"Set 'backend = {args.target}' under [Storage Settings] in config.ini to use it.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Word pool for the Hangman game.
+
+The dictionary is loaded once and bucketed by word length. Each player draws
+through their own shuffled order of a bucket, with a cursor saved between
+sessions, so every draw is constant time and words are never repeated.
+
+WordPrefetcher gets each difficulty's next word ready on a background thread
+while the player reads their score, so picking a difficulty doesn't wait for
+the dictionary to load or the used word check.
+"""
+import concurrent.futures # for the prefetched words
+import json # for cursor file handling
+import os # for file paths
+import queue # for the prefetch requests
+import random # for shuffling
+import threading # for the prefetch worker and the cursor lock
+import hangman_profile # counts prefetch waits and used words skipped
+from hangman_storage import get_temp_file_path # temp name unique to the process and thread
+
+def bucket_words_by_length(words):
+    """
+    Buckets dictionary words by length, anything that is not a plain a-z word is skipped.
+
+    Args: words (iterable): The dictionary words.
+
+    Returns: dict: {word length: sorted list of lower case words}.
+    """
+    buckets = {}
+    for word in {word.lower() for word in words}:
+        if word.isascii() and word.isalpha():
+            buckets.setdefault(len(word), []).append(word)
+    for bucket in buckets.values():
+        bucket.sort() # fixed order so shuffles and seeded draws repeat between runs
+    return buckets
+
+def load_dictionary(words_file=None):
+    """
+    Loads the dictionary words from a word file, one word per line, or from wonderwords.
+
+    Args: words_file (str): Optional path to the word file.
+
+    Returns: list: The dictionary words.
+    """
+    if words_file is not None:
+        with open(words_file, mode='r') as file:
+            return [line.strip() for line in file]
+    try:
+        from wonderwords import RandomWord # pip install wonderwords
+    except ImportError:
+        raise SystemExit("wonderwords is not installed, run 'pip install wonderwords' or use a word file")
+    return RandomWord().filter()
+
+class WordPoolExhaustedError(Exception):
+    """
+    Raised when a player has played every word of the requested length.
+    """
+
+class WordPool:
+    """
+    Length-bucketed dictionary with a persisted per player draw cursor.
+
+    Args:
+    words (iterable): The dictionary words, anything that is not a plain a-z word is skipped.
+    cursor_file_path (str): The absolute path to the json file the draw cursors are saved in.
+    """
+    def __init__(self, words, cursor_file_path):
+        self.buckets = bucket_words_by_length(words) # word length: sorted list of words
+        self.cursor_file_path = cursor_file_path
+        self.cursors = self.load_cursors()
+        self.orders = {} # (player name, word length): shuffled bucket
+        self.lock = threading.Lock() # words are peeked on the prefetch thread and taken on the game's
+
+    def load_cursors(self):
+        """
+        Load the saved draw cursors.
+
+        Returns: dict: {player name: {word length: {"cursor": int, "pool_size": int}}}.
+        """
+        if not os.path.exists(self.cursor_file_path):
+            return {}
+        with open(self.cursor_file_path, mode='r') as file:
+            try:
+                return json.load(file)
+            except json.JSONDecodeError:
+                return {} # the used word check still stops repeats after a reset
+
+    def save_cursors(self):
+        """
+        Save the draw cursors to the cursor file.
+        """
+        temp_file_path = get_temp_file_path(self.cursor_file_path)
+        with open(temp_file_path, mode='w') as file:
+            json.dump(self.cursors, file)
+        os.replace(temp_file_path, self.cursor_file_path)
+
+    def player_order(self, player_name, word_length):
+        """
+        Gets the player's shuffled order of the words of one length.
+        The shuffle is seeded by the player's name so it is the same every session.
+
+        Args: player_name (str): The player's name, word_length (int): The length of the words.
+
+        Returns: list: The shuffled words.
+        """
+        key = (player_name, word_length)
+        if key not in self.orders:
+            order = list(self.buckets.get(word_length, []))
+            random.Random(f"{player_name}:{word_length}").shuffle(order)
+            self.orders[key] = order
+        return self.orders[key]
+
+    def player_cursor(self, player_name, word_length, order):
+        """
+        Gets the player's draw cursor for the words of one length.
+
+        Args: player_name (str): The player's name, word_length (int): The length of the words, order (list): The player's shuffled words.
+
+        Returns: dict: {"cursor": int, "pool_size": int}, changes to it are saved.
+        """
+        player_cursors = self.cursors.setdefault(player_name, {})
+        cursor_data = player_cursors.get(str(word_length))
+        # start again if the dictionary changed, the used word check stops repeats
+        if cursor_data is None or cursor_data["pool_size"] != len(order):
+            cursor_data = {"cursor": 0, "pool_size": len(order)}
+            player_cursors[str(word_length)] = cursor_data
+        return cursor_data
+
+    def peek(self, word_length, player_name, is_used=None):
+        """
+        Gets the player's next word of a length without using it up, so it is drawn
+        again until take() is called. Words the player has already played are skipped for good.
+
+        Args:
+        word_length (int): The length of the word.
+        player_name (str): The player's name.
+        is_used (callable): Optional check for words the player has already played, those are skipped.
+
+        Returns: word (str): The next word.
+
+        Raises: WordPoolExhaustedError: If the player has played every word of that length.
+        """
+        order = self.player_order(player_name, word_length)
+        with self.lock:
+            cursor_data = self.player_cursor(player_name, word_length, order)
+            while cursor_data["cursor"] < len(order):
+                word = order[cursor_data["cursor"]]
+                if is_used is None or not is_used(word):
+                    return word
+                cursor_data["cursor"] += 1
+        raise WordPoolExhaustedError(f"{player_name} has played every {word_length} letter word")
+
+    def take(self, word_length, player_name, word):
+        """
+        Uses up a word got from peek(), it is skipped if the cursor has already moved past it.
+
+        Args: word_length (int): The length of the word, player_name (str): The player's name, word (str): The word.
+        """
+        order = self.player_order(player_name, word_length)
+        with self.lock:
+            cursor_data = self.player_cursor(player_name, word_length, order)
+            if cursor_data["cursor"] < len(order) and order[cursor_data["cursor"]] == word:
+                cursor_data["cursor"] += 1
+
+    def draw(self, word_length, player_name, is_used=None):
+        """
+        Draws the player's next word of a length.
+
+        Args:
+        word_length (int): The length of the word to draw.
+        player_name (str): The player's name.
+        is_used (callable): Optional check for words the player has already played, those are skipped.
+
+        Returns: word (str): The drawn word.
+
+        Raises: WordPoolExhaustedError: If the player has played every word of that length.
+        """
+        word = self.peek(word_length, player_name, is_used)
+        self.take(word_length, player_name, word)
+        return word
+
+class WordPrefetcher:
+    """
+    Gets the next word of each difficulty ready on a background thread.
+    A prefetched word has been checked against the player's used words but not used up,
+    so words fetched for difficulties the player doesn't pick are drawn again next session.
+    The worker opens its own storage, like PersistenceWorker, so it never shares a connection with the game.
+
+    Args:
+    fetch_word (callable): fetch_word(word_length, player_name, is_used) gets the player's next unplayed word without using it up, see WordPool.peek.
+    open_worker_storage (callable): Opens the storage the used word check reads, called on the worker thread.
+    """
+    stop_signal = object() # queued by close() after the last request
+
+    def __init__(self, fetch_word, open_worker_storage):
+        self.fetch_word = fetch_word
+        self.open_worker_storage = open_worker_storage
+        self.words = {} # (player name, word length): concurrent.futures.Future of the word
+        self.taken_words = set() # (player name, word) taken this session, the storage may not have their games yet
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="hangman-prefetch", daemon=True)
+        self.thread.start()
+
+    def prefetch(self, player_name, word_lengths):
+        """
+        Queues the player's next word of each length to be fetched, returns straight away.
+
+        Args: player_name (str): The player's name, word_lengths (iterable): The word lengths.
+        """
+        for word_length in word_lengths:
+            key = (player_name, word_length)
+            if key not in self.words:
+                self.words[key] = concurrent.futures.Future()
+                self.queue.put((key, self.words[key]))
+
+    def take(self, player_name, word_length):
+        """
+        Takes the player's prefetched word of a length, waiting for it if it isn't ready yet.
+        The word isn't fetched again, use it up and then prefetch the next one.
+
+        Args: player_name (str): The player's name, word_length (int): The length of the word.
+
+        Returns: word (str): The word.
+
+        Raises: WordPoolExhaustedError: If the player has played every word of that length.
+        """
+        self.prefetch(player_name, [word_length])
+        future = self.words.pop((player_name, word_length))
+        if not future.done():
+            hangman_profile.count("word_prefetch_waits")
+        word = future.result()
+        self.taken_words.add((player_name, word))
+        return word
+
+    def run(self):
+        try:
+            storage = self.open_worker_storage()
+        except Exception as e:
+            storage = None
+            storage_error = e
+        while True:
+            request = self.queue.get()
+            if request is self.stop_signal:
+                break
+            (player_name, word_length), future = request
+            if not future.set_running_or_notify_cancel():
+                continue
+            def is_used(word):
+                if (player_name, word) in self.taken_words or storage.word_used(player_name, word):
+                    hangman_profile.count("get_word_retries")
+                    return True
+                return False
+            try:
+                if storage is None:
+                    raise storage_error
+                future.set_result(self.fetch_word(word_length, player_name, is_used))
+            except BaseException as e: # raised again by take() on the game's thread, SystemExit too
+                future.set_exception(e)
+        if storage is not None:
+            storage.close()
+
+    def close(self):
+        """
+        Drops the words not taken and stops the worker.
+        """
+        for future in self.words.values():
+            future.cancel()
+        if self.thread.is_alive():
+            self.queue.put(self.stop_signal)
+            self.thread.join()
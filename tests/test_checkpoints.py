@@ -0,0 +1,164 @@
+"""
+Tests for the leaderboard checkpoint and the game log offsets it is saved with.
+"""
+import os # for file paths
+import pytest # test runner
+from hangman_leaderboard import Leaderboard, WindowedLeaderboards, leaderboard_file_name, windows_file_name # cached leaderboards
+from hangman_players import new_player_stats # player stats
+from hangman_storage import (JsonStorage, SqliteStorage, PersistenceWorker, append_statistics_to_log, remove_leaderboard, read_statistics_log,
+                             read_checkpoint, write_checkpoint) # storage backends and checkpoint files
+
+def make_game(player_name, total_score, win=True, time_taken=10.0):
+    """
+    Makes a game statistics entry.
+    """
+    return {
+        "player_name":player_name,
+        "win_bool":win,
+        "total_score":total_score,
+        "game_time":"01/01/25-12:00:00",
+        "hangman_word":f"word{total_score}",
+        "guessed_word":"",
+        "word_difficulty":"Easy",
+        "score_wrong_letters":0,
+        "total_wrong_letters":0,
+        "time_taken":time_taken,
+        "score_time_taken":0
+    }
+
+def open_test_storage(backend, data_dir):
+    """
+    Opens a storage in the test's data directory, each thread needs its own.
+    """
+    if backend == "json":
+        storage = JsonStorage(str(data_dir))
+    else:
+        storage = SqliteStorage(str(data_dir / "hangman.db"))
+    storage.backend = backend
+    return storage
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    storage = open_test_storage(request.param, tmp_path)
+    storage.add_players([new_player_stats(player_name, "") for player_name in ("ann", "bob")])
+    yield storage
+    storage.close()
+
+def get_leaderboard_path(tmp_path):
+    return os.path.join(str(tmp_path), leaderboard_file_name)
+
+def rows_from_players(storage):
+    return Leaderboard.build(storage.iter_players(), storage.backend).rows
+
+#=======================================
+# Leaderboard
+#=======================================
+def test_open_add_save_open_round_trips(storage, tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    leaderboard = Leaderboard.open(file_path, storage, storage.backend)
+    for game_stats in (make_game("ann", 300), make_game("bob", 500), make_game("ann", 100, win=False)):
+        storage.record_games([game_stats])
+        leaderboard.add_game(game_stats)
+    leaderboard.save(file_path, storage)
+
+    reopened = Leaderboard.load(file_path, storage.backend, storage.get_log_offset())
+    assert reopened is not None # loaded from the checkpoint, not rebuilt
+    assert reopened.log_offset == storage.get_log_offset()
+    assert reopened.rows == leaderboard.rows == rows_from_players(storage)
+    assert reopened.rows["ann"]["total_games"] == 2
+    assert [row["player_name"] for row in reopened.top(2)] == ["bob", "ann"]
+
+def test_games_recorded_after_the_checkpoint_are_caught_up(storage, tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    leaderboard = Leaderboard.open(file_path, storage, storage.backend)
+    storage.record_games([make_game("ann", 300)])
+    leaderboard.add_game(make_game("ann", 300))
+    leaderboard.save(file_path, storage)
+    storage.record_games([make_game("bob", 700)]) # another session, never added to this leaderboard
+
+    reopened = Leaderboard.open(file_path, storage, storage.backend)
+    assert reopened.rows == rows_from_players(storage)
+    assert reopened.rows["bob"]["total_score"] == 700
+
+def test_game_already_in_the_log_is_not_counted_twice(storage, tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    game_stats = make_game("ann", 300)
+    worker = PersistenceWorker(lambda: open_test_storage(storage.backend, tmp_path))
+    worker.submit_game(game_stats)
+    worker.close() # commits the game
+
+    leaderboard = Leaderboard.open(file_path, storage, storage.backend) # catches the game up from the log
+    assert leaderboard.add_game(game_stats, storage.get_log_offset()) == False
+    assert leaderboard.rows["ann"]["total_games"] == 1
+    assert leaderboard.rows["ann"]["total_score"] == 300
+    assert leaderboard.catch_up(storage) == 0
+
+def test_catch_up_twice_adds_nothing(storage, tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    storage.record_games([make_game("ann", 300), make_game("bob", 200)])
+    leaderboard = Leaderboard.open(file_path, storage, storage.backend)
+    assert leaderboard.catch_up(storage) == 0
+    assert leaderboard.rows == rows_from_players(storage)
+
+def test_checkpoint_past_the_end_of_the_log_is_rejected(storage, tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    storage.record_games([make_game("ann", 300)])
+    log_offset = storage.get_log_offset()
+    row = dict(rows_from_players(storage)["ann"], total_score=9999)
+    write_checkpoint(file_path, log_offset + 1000, {"backend":storage.backend, "players":[row]})
+
+    assert read_checkpoint(file_path, log_offset) is None
+    assert Leaderboard.load(file_path, storage.backend, log_offset) is None
+    leaderboard = Leaderboard.open(file_path, storage, storage.backend) # rebuilt from the player stats
+    assert leaderboard.rows == rows_from_players(storage)
+    assert leaderboard.rows["ann"]["total_score"] == 300
+
+def test_checkpoint_from_another_backend_is_rejected(storage, tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    write_checkpoint(file_path, 0, {"backend":"other", "players":[]})
+    assert Leaderboard.load(file_path, storage.backend, storage.get_log_offset()) is None
+
+def test_unreadable_checkpoint_is_rejected(tmp_path):
+    file_path = get_leaderboard_path(tmp_path)
+    with open(file_path, mode='w') as file:
+        file.write("{not json")
+    assert read_checkpoint(file_path, 100) is None
+    assert read_checkpoint(os.path.join(str(tmp_path), "missing.json"), 100) is None
+
+#=======================================
+# Game Log
+#=======================================
+def test_torn_log_tail_is_skipped_and_later_appends_read_back(tmp_path):
+    log_file_path = os.path.join(str(tmp_path), "hangman_stats.jsonl")
+    append_statistics_to_log(log_file_path, [make_game("ann", 100)], fsync=False)
+    with open(log_file_path, mode='ab') as file:
+        file.write(b'{"player_name": "ann", "total_sc') # crash part way through a write
+
+    assert [game_stats["total_score"] for game_stats, _ in read_statistics_log(log_file_path)] == [100]
+    start_offset, end_offset = append_statistics_to_log(log_file_path, [make_game("bob", 200)], fsync=False)
+    assert end_offset == os.path.getsize(log_file_path)
+    assert [game_stats["total_score"] for game_stats, _ in read_statistics_log(log_file_path)] == [100, 200]
+    assert [game_stats["total_score"] for game_stats, _ in read_statistics_log(log_file_path, start_offset)] == [200]
+
+def test_torn_log_tail_does_not_lose_recorded_games(tmp_path):
+    storage = open_test_storage("json", tmp_path)
+    storage.add_players([new_player_stats("ann", "")])
+    storage.record_games([make_game("ann", 100)])
+    with open(storage.log_file_path, mode='ab') as file:
+        file.write(b'{"player_name": "ann"')
+    storage.record_games([make_game("ann", 200)])
+
+    assert [game_stats["total_score"] for game_stats in storage.iter_games()] == [100, 200]
+    leaderboard = Leaderboard.open(get_leaderboard_path(tmp_path), storage, "json")
+    assert leaderboard.rows["ann"]["total_games"] == 2
+    storage.close()
+
+def test_remove_leaderboard_removes_every_board(storage, tmp_path):
+    storage.record_games([make_game("ann", 300)])
+    Leaderboard.open(get_leaderboard_path(tmp_path), storage, storage.backend).save(get_leaderboard_path(tmp_path), storage)
+    windows_file_path = os.path.join(str(tmp_path), windows_file_name)
+    WindowedLeaderboards.open(windows_file_path, storage, storage.backend).save(windows_file_path, storage)
+    assert os.path.exists(windows_file_path)
+    remove_leaderboard(str(tmp_path))
+    assert not os.path.exists(get_leaderboard_path(tmp_path))
+    assert not os.path.exists(windows_file_path)
@@ -0,0 +1,118 @@
+"""
+Tests for password hashing, upgrading old hashes on login and session tokens.
+"""
+import asyncio # for the server login
+import pytest # test runner
+import hangman_credentials # password hashing and sessions
+from hangman_credentials import CredentialService, check_and_rehash, hash_password, hash_password_md5, needs_rehash, verify_password
+from hangman_players import new_player_stats # player stats
+from hangman_server import HangmanServer # the server's login
+from hangman_storage import JsonStorage # json storage backend
+
+# low costs so the tests run quickly
+scrypt_settings = {"password_hash": "scrypt", "scrypt_cost": 1024, "pbkdf2_iterations": 1000, "hash_workers": 2, "session_minutes": 30}
+pbkdf2_settings = dict(scrypt_settings, password_hash="pbkdf2")
+
+class FakeTime:
+    """
+    A monotonic clock that is moved on by the test.
+    """
+    now = 1000.0
+
+    @classmethod
+    def monotonic(cls):
+        return cls.now
+
+class FakeConnection:
+    """
+    Answers the server's prompts from a list and keeps what it was sent.
+    """
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.sent = []
+
+    async def send(self, text):
+        self.sent.append(text)
+
+    async def ask(self, text):
+        self.sent.append(text)
+        return self.answers.pop(0)
+
+@pytest.fixture
+def credentials():
+    credentials = CredentialService(scrypt_settings)
+    yield credentials
+    credentials.close()
+
+#=======================================
+# Hashing
+#=======================================
+@pytest.mark.parametrize("credential_settings", [scrypt_settings, pbkdf2_settings])
+def test_hash_round_trips(credential_settings):
+    password_hash = hash_password("Secret#1", credential_settings)
+    assert verify_password("Secret#1", password_hash)
+    assert not verify_password("secret#1", password_hash)
+    assert not needs_rehash(password_hash, credential_settings)
+    assert hash_password("Secret#1", credential_settings) != password_hash # a new salt every time
+
+def test_damaged_hash_is_a_wrong_password():
+    password_hash = hash_password("Secret#1", pbkdf2_settings)
+    assert not verify_password("Secret#1", password_hash[:-2] + "zz")
+    assert not verify_password("Secret#1", "pbkdf2_sha256$x$00$00")
+    assert not verify_password("Secret#1", "unknown$1$2")
+
+def test_hash_with_a_lower_cost_needs_rehash():
+    password_hash = hash_password("Secret#1", dict(scrypt_settings, scrypt_cost=512))
+    assert needs_rehash(password_hash, scrypt_settings)
+    assert needs_rehash(password_hash, pbkdf2_settings)
+
+def test_md5_hash_is_checked_and_rehashed():
+    password_right, new_password_hash = check_and_rehash("Secret#1", hash_password_md5("Secret#1"), scrypt_settings)
+    assert password_right
+    assert new_password_hash.startswith("scrypt$")
+    assert verify_password("Secret#1", new_password_hash)
+    assert check_and_rehash("Wrong#1", hash_password_md5("Secret#1"), scrypt_settings) == (False, None)
+
+def test_check_password_on_a_worker_thread(credentials):
+    player_stats = new_player_stats("ann", credentials.hash_password("Secret#1").result())
+    assert credentials.check_password(player_stats, "Secret#1").result() == (True, None)
+    assert credentials.check_password(player_stats, "Wrong#1").result() == (False, None)
+    assert credentials.check_password(new_player_stats("bob", ""), "anything").result() == (True, None)
+
+def test_md5_hash_is_upgraded_on_login(tmp_path):
+    storage = JsonStorage(str(tmp_path))
+    storage.add_player(new_player_stats("ann", hash_password_md5("Secret#1")))
+    settings = {"credential_settings": scrypt_settings, "difficulty_word_length": {("1", "Easy"): 8},
+                "min_password_length": 8, "incorrect_password_attempts": 3, "storage_settings": {"backend": "json"}}
+    server = HangmanServer(settings, str(tmp_path), [])
+    server.storage = storage
+    connection = FakeConnection(["ann", "Wrong#1", "Secret#1"])
+
+    assert asyncio.run(server.login(connection)) == "ann"
+    password_hash = storage.get_player("ann")["player_password"]
+    assert password_hash.startswith("scrypt$")
+    assert verify_password("Secret#1", password_hash)
+    assert any(text.startswith("Incorrect Password") for text in connection.sent)
+    server.credentials.close()
+    server.storage_executor.shutdown()
+    storage.close()
+
+#=======================================
+# Sessions
+#=======================================
+def test_session_token_logs_the_player_in(credentials):
+    token = credentials.start_session("ann")
+    assert credentials.check_session("ann", token)
+    assert not credentials.check_session("bob", token) # another player's token
+    assert not credentials.check_session("ann", "not a token")
+    credentials.end_session(token)
+    assert not credentials.check_session("ann", token)
+
+def test_session_expires(credentials, monkeypatch):
+    monkeypatch.setattr(hangman_credentials, "time", FakeTime)
+    token = credentials.start_session("ann")
+    FakeTime.now += 29 * 60
+    assert credentials.check_session("ann", token)
+    FakeTime.now += 2 * 60
+    assert not credentials.check_session("ann", token)
+    assert token not in credentials.sessions # dropped once expired
@@ -0,0 +1,110 @@
+"""
+Tests for the memory mapped word file, its index and drawing from it.
+"""
+import os # for file paths
+import pytest # test runner
+from hangman_dictionary import MappedDictionary, MappedWordPool, PermutedBucket, get_index_file_path, open_word_pool # memory mapped word files
+from hangman_words import WordPool, WordPoolExhaustedError # length bucketed word pool
+
+def write_words(file_path, text):
+    with open(file_path, mode='w', newline="") as file:
+        file.write(text)
+
+@pytest.fixture
+def dictionary_path(tmp_path):
+    file_path = os.path.join(str(tmp_path), "words.txt")
+    write_words(file_path, "apple\r\n  Grape \nkiwi\nnot a word\nfig3\n\npear\nlemon\napple")
+    return file_path
+
+@pytest.fixture
+def dictionary(dictionary_path, tmp_path):
+    dictionary = MappedDictionary(dictionary_path, os.path.join(str(tmp_path), "data"))
+    yield dictionary
+    dictionary.close()
+
+#=======================================
+# Index
+#=======================================
+def test_words_are_read_by_length(dictionary):
+    assert sorted(dictionary.buckets) == [4, 5]
+    assert list(dictionary.buckets[5]) == ["apple", "grape", "lemon", "apple"] # file order, repeats kept
+    assert list(dictionary.buckets[4]) == ["kiwi", "pear"]
+    assert dictionary.buckets[4][-1] == "pear"
+    assert len(dictionary) == 6
+    with pytest.raises(IndexError):
+        dictionary.buckets[4][2]
+
+def test_saved_index_is_used_again(dictionary_path, tmp_path, capsys):
+    index_dir = os.path.join(str(tmp_path), "data")
+    MappedDictionary(dictionary_path, index_dir).close()
+    assert "Building word index" in capsys.readouterr().out
+    assert os.path.exists(get_index_file_path(dictionary_path, index_dir))
+    dictionary = MappedDictionary(dictionary_path, index_dir)
+    assert capsys.readouterr().out == ""
+    assert list(dictionary.buckets[4]) == ["kiwi", "pear"]
+    dictionary.close()
+
+def test_index_is_built_again_when_the_file_changes(dictionary_path, tmp_path, capsys):
+    index_dir = os.path.join(str(tmp_path), "data")
+    MappedDictionary(dictionary_path, index_dir).close()
+    write_words(dictionary_path, "plum\nbanana\n")
+    capsys.readouterr()
+    dictionary = MappedDictionary(dictionary_path, index_dir)
+    assert "Building word index" in capsys.readouterr().out
+    assert {word_length: list(bucket) for word_length, bucket in dictionary.buckets.items()} == {4: ["plum"], 6: ["banana"]}
+    dictionary.close()
+
+def test_damaged_index_is_built_again(dictionary_path, tmp_path):
+    index_dir = os.path.join(str(tmp_path), "data")
+    MappedDictionary(dictionary_path, index_dir).close()
+    with open(get_index_file_path(dictionary_path, index_dir), mode='r+b') as file:
+        file.truncate(20)
+    dictionary = MappedDictionary(dictionary_path, index_dir)
+    assert list(dictionary.buckets[4]) == ["kiwi", "pear"]
+    dictionary.close()
+
+def test_empty_word_file(tmp_path):
+    file_path = os.path.join(str(tmp_path), "empty.txt")
+    write_words(file_path, "")
+    dictionary = MappedDictionary(file_path, str(tmp_path))
+    assert dictionary.buckets == {}
+    assert len(dictionary) == 0
+    dictionary.close()
+
+#=======================================
+# Word Pool
+#=======================================
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 1000])
+def test_permuted_bucket_is_a_permutation(size):
+    permuted = PermutedBucket(range(size), "ann:5")
+    assert sorted(permuted) == list(range(size))
+    assert list(PermutedBucket(range(size), "ann:5")) == list(permuted) # same seed, same order
+    with pytest.raises(IndexError):
+        permuted[size]
+
+def test_permuted_bucket_orders_differ_by_seed():
+    assert list(PermutedBucket(range(1000), "ann:5")) != list(PermutedBucket(range(1000), "bob:5"))
+    assert list(PermutedBucket(range(1000), "ann:5")) != list(range(1000))
+
+def test_word_pool_draws_every_word_once(dictionary, tmp_path):
+    cursor_file_path = os.path.join(str(tmp_path), "cursors.json")
+    word_pool = open_word_pool(dictionary, cursor_file_path)
+    assert isinstance(word_pool, MappedWordPool)
+    drawn = []
+    with pytest.raises(WordPoolExhaustedError):
+        while True:
+            drawn.append(word_pool.draw(5, "ann", is_used=drawn.__contains__))
+    assert sorted(drawn) == ["apple", "grape", "lemon"] # the repeated apple is skipped as used
+    with pytest.raises(WordPoolExhaustedError):
+        word_pool.draw(9, "ann")
+
+def test_word_pool_cursor_is_saved(dictionary, tmp_path):
+    cursor_file_path = os.path.join(str(tmp_path), "cursors.json")
+    word_pool = open_word_pool(dictionary, cursor_file_path)
+    order = word_pool.player_order("ann", 5)
+    assert word_pool.draw(5, "ann") == order[0]
+    word_pool.save_cursors()
+    assert open_word_pool(dictionary, cursor_file_path).draw(5, "ann") == order[1] # carries on from the saved cursor
+
+def test_word_lists_get_a_plain_word_pool(tmp_path):
+    assert type(open_word_pool(["kiwi", "pear"], os.path.join(str(tmp_path), "cursors.json"))) is WordPool
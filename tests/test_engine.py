@@ -0,0 +1,149 @@
+"""
+Tests for the HangmanGame engine and scoring.
+"""
+from hangman_engine import (HangmanGame, calc_score, get_wrong_max, get_word_difficulty, GUESS_INVALID, GUESS_REPEATED, GUESS_RIGHT,
+                            GUESS_WRONG, LOST, PLAYING, WON) # game rules
+
+score_settings = {
+    "correct_letters_multiplier": 100,
+    "wrong_letter_multiplier": 50,
+    "win_multiplier": 500,
+    "grace_period_multiplier": 5,
+    "time_points_multiplier": 10
+}
+difficulty_word_length = {("1", "Easy"): 8, ("2", "Normal"): 10, ("3", "Hard"): 15}
+
+class FakeClock:
+    """
+    A game clock that is moved on by the test.
+    """
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def new_game(hangman_word="banana", wrong_max=3):
+    clock = FakeClock()
+    return HangmanGame(hangman_word, wrong_max, score_settings, "ann", "Easy", clock=clock), clock
+
+#=======================================
+# Guesses
+#=======================================
+def test_right_guess_fills_every_position():
+    game, _ = new_game()
+    assert game.guess("a") == GUESS_RIGHT
+    assert game.hidden_hangman == ["_", "a", "_", "a", "_", "a"]
+    assert game.right_letters == ["a"]
+    assert game.status == PLAYING
+
+def test_wrong_guess_uses_a_try():
+    game, _ = new_game()
+    assert game.guess("z") == GUESS_WRONG
+    assert game.wrong_letters == ["z"]
+    assert game.tries_left == 2
+    assert "z" not in game.alphabet_list
+
+def test_repeated_guess_changes_nothing():
+    game, _ = new_game()
+    game.guess("a")
+    game.guess("z")
+    assert game.guess("a") == GUESS_REPEATED
+    assert game.guess("Z") == GUESS_REPEATED # upper case is the same letter
+    assert (game.right_letters, game.wrong_letters, game.tries_left) == (["a"], ["z"], 2)
+
+def test_invalid_guesses_are_rejected():
+    game, _ = new_game()
+    for guess in ("", "ab", "1", "é", " ", None):
+        assert game.guess(guess) == GUESS_INVALID
+    assert game.guessed_mask == 0
+    assert game.guess_events == bytearray()
+
+def test_upper_case_guess_counts_as_lower_case():
+    game, _ = new_game()
+    assert game.guess("B") == GUESS_RIGHT
+    assert game.hidden_hangman[0] == "b"
+
+#=======================================
+# Win and loss
+#=======================================
+def test_guessing_every_letter_wins():
+    game, _ = new_game()
+    for letter in "ban":
+        game.guess(letter)
+    assert game.status == WON
+    assert game.guess("x") == GUESS_INVALID # the game is over
+
+def test_running_out_of_tries_loses():
+    game, _ = new_game()
+    for letter in "xyz":
+        assert game.status == PLAYING
+        game.guess(letter)
+    assert game.status == LOST
+    assert game.tries_left == 0
+    assert game.guess("a") == GUESS_INVALID
+
+def test_no_wrong_guess_limit():
+    game, _ = new_game(wrong_max=None)
+    for letter in "cdefghijklm":
+        game.guess(letter)
+    assert game.status == PLAYING
+
+#=======================================
+# Time
+#=======================================
+def test_elapsed_time_stops_when_the_game_ends():
+    game, clock = new_game()
+    clock.now += 2.5
+    game.guess("b")
+    clock.now += 1.0
+    assert game.elapsed_time() == 3.5 # still playing, the clock runs
+    game.guess("a")
+    game.guess("n")
+    clock.now += 60.0
+    assert game.status == WON
+    assert game.elapsed_time() == 3.5
+
+def test_guess_events_record_the_milliseconds_between_guesses():
+    game, clock = new_game()
+    clock.now += 0.25
+    game.guess("b")
+    clock.now += 0.5
+    game.guess("z")
+    assert game.guess_events == bytearray([1 + 0x80, 250 & 0x7f | 0x80, 250 >> 7, 25, 500 & 0x7f | 0x80, 500 >> 7])
+
+#=======================================
+# Scoring
+#=======================================
+def test_calc_score_of_a_fast_win():
+    game_stats, summary = calc_score("ann", False, ["z"], list("banana"), "banana", 10.4, score_settings, "01/01/25-12:00:00", "Easy")
+    # 6 letters * 100 - 1 wrong * 50 + 500 win + (30s grace - 10s) * 10
+    assert game_stats["total_score"] == 600 - 50 + 500 + 200
+    assert game_stats["score_time_taken"] == 200
+    assert game_stats["score_wrong_letters"] == 50
+    assert (game_stats["win_bool"], game_stats["guessed_word"], game_stats["word_difficulty"]) == (True, "banana", "Easy")
+    assert "YOU Won!" in summary
+
+def test_calc_score_of_a_slow_loss():
+    game_stats, summary = calc_score("ann", True, ["x", "y", "z"], list("_a_a_a"), "banana", 40.0, score_settings)
+    assert game_stats["total_score"] == 300 - 150 - 100
+    assert game_stats["win_bool"] == False
+    assert "YOU Lost!" in summary
+
+def test_calc_score_at_the_grace_period():
+    game_stats, _ = calc_score("ann", False, [], list("banana"), "banana", 30.0, score_settings)
+    assert game_stats["score_time_taken"] == 0
+
+def test_game_score_uses_the_recorded_time():
+    game, clock = new_game()
+    clock.now += 10.0
+    for letter in "ban":
+        game.guess(letter)
+    assert game.to_record() == calc_score("ann", False, [], list("banana"), "banana", 10.0, score_settings, "", "Easy")[0]
+    assert game.score(99.0)[0]["time_taken"] == 99.0
+
+def test_difficulty_helpers():
+    assert get_wrong_max(8, difficulty_word_length) == 9
+    assert get_wrong_max(10, difficulty_word_length) == 9
+    assert get_wrong_max(15, difficulty_word_length) == 6
+    assert get_word_difficulty(15, difficulty_word_length) == "Hard"
@@ -0,0 +1,59 @@
+"""
+Tests for drawing words from the word hardness index.
+"""
+import os # for file paths
+import random # for seeded draws
+import pytest # test runner
+np = pytest.importorskip("numpy") # writing an index needs numpy
+from hangman_hardness import HardnessIndex, get_dictionary_hash, write_hardness_index # word hardness index
+from hangman_words import WordPoolExhaustedError # raised when every word of a tier has been played
+
+def make_words(count):
+    """
+    Makes count different a-z words.
+    """
+    return ["w" + "".join(chr(97 + int(digit)) for digit in f"{number:05d}") for number in range(count)]
+
+@pytest.fixture
+def index_path(tmp_path):
+    words = make_words(300)
+    file_path = os.path.join(str(tmp_path), "hardness_index.bin")
+    write_hardness_index(file_path, words, np.arange(len(words), dtype=float), get_dictionary_hash(words))
+    return file_path
+
+def draw_all(index, player_name, used, rng):
+    """
+    Draws and plays words from the first of 3 tiers until every word has been played.
+    """
+    drawn = []
+    while True:
+        try:
+            word = index.draw(0, 3, is_used=used.__contains__, rng=rng, player_name=player_name)
+        except WordPoolExhaustedError:
+            return drawn
+        used.add(word)
+        drawn.append(word)
+
+def test_every_word_of_a_tier_is_drawn_once(index_path):
+    index = HardnessIndex(index_path)
+    start, end = index.tier_range(0, 3)
+    drawn = draw_all(index, "ann", set(), random.Random(1))
+    assert sorted(drawn) == sorted(index.word(number) for number in range(start, end))
+    index.close()
+
+def test_searched_draws_are_not_in_hardness_order(index_path):
+    index = HardnessIndex(index_path)
+    start, end = index.tier_range(0, 3)
+    hardness_order = [index.word(number) for number in range(start, end)]
+    used = set(hardness_order[:-20]) # the tier is mostly played, so random draws miss
+    ann_words = draw_all(index, "ann", set(used), random.Random(1))
+    bob_words = draw_all(index, "bob", set(used), random.Random(2))
+    assert sorted(ann_words) == sorted(bob_words) == hardness_order[-20:]
+    assert ann_words != hardness_order[-20:]
+    assert ann_words != bob_words
+    index.close()
+
+def test_index_from_another_dictionary_is_rejected(index_path):
+    with pytest.raises(ValueError):
+        HardnessIndex(index_path, get_dictionary_hash(make_words(301)))
+    HardnessIndex(index_path, get_dictionary_hash(make_words(300) + ["w" + "a" * 5])).close() # repeats count once
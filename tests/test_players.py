@@ -0,0 +1,64 @@
+"""
+Tests for the player stats aggregates and rebuilding them from the game log.
+"""
+from hangman_players import add_game_to_player_stats, get_player_averages, new_player_stats, rebuild_player_stats # player stats aggregates
+from hangman_storage import JsonStorage # json storage backend
+
+def make_game(player_name, total_score, win=True, word_difficulty="Easy", time_taken=10.0):
+    """
+    Makes a game statistics entry.
+    """
+    return {
+        "player_name":player_name,
+        "win_bool":win,
+        "total_score":total_score,
+        "game_time":"01/01/25-12:00:00",
+        "hangman_word":"word",
+        "guessed_word":"",
+        "word_difficulty":word_difficulty,
+        "score_wrong_letters":0,
+        "total_wrong_letters":0,
+        "time_taken":time_taken,
+        "score_time_taken":0
+    }
+
+def test_aggregates_and_averages():
+    player_stats = new_player_stats("ann", "")
+    for game_stats in (make_game("ann", -50, win=False), make_game("ann", 300, time_taken=20.0), make_game("ann", 100, word_difficulty="Hard")):
+        add_game_to_player_stats(player_stats, game_stats)
+
+    assert (player_stats["total_games"], player_stats["total_wins"], player_stats["total_score"]) == (3, 2, 350)
+    assert player_stats["highest_score"] == 300
+    assert player_stats["difficulties"]["Easy"]["highest_score"] == 300
+    assert player_stats["difficulties"]["Hard"]["games"] == 1
+    averages = get_player_averages(player_stats)
+    assert averages["win_ratio"] == 66.67
+    assert averages["average_time"] == 13.33
+    assert averages["difficulties"]["Normal"]["average_score"] == 0
+
+def test_first_game_sets_a_negative_highest_score():
+    player_stats = new_player_stats("ann", "")
+    add_game_to_player_stats(player_stats, make_game("ann", -50, win=False))
+    assert player_stats["highest_score"] == -50
+
+def test_rebuild_matches_the_incremental_aggregates(tmp_path):
+    storage = JsonStorage(str(tmp_path))
+    storage.add_players([new_player_stats("ann", "hash"), new_player_stats("bob", "")])
+    storage.record_games([make_game("ann", 300), make_game("bob", -20, win=False), make_game("ann", 50, word_difficulty="Normal")])
+    incremental = {player_stats["player_name"]: player_stats for player_stats in storage.iter_players()}
+    storage.add_players([new_player_stats("ann", "hash")]) # drifted stats
+
+    assert rebuild_player_stats(storage)[:2] == (2, 3)
+    assert {player_stats["player_name"]: player_stats for player_stats in storage.iter_players()} == incremental
+    assert storage.get_player("ann")["player_password"] == "hash"
+    storage.close()
+
+def test_rebuild_leaves_out_names_with_no_player_record(tmp_path):
+    storage = JsonStorage(str(tmp_path))
+    storage.add_players([new_player_stats("ann", "hash")])
+    storage.add_games([make_game("ann", 300), make_game("eve", 900)]) # eve was never given a profile
+
+    players, games, unknown_players = rebuild_player_stats(storage)
+    assert (players, games, unknown_players) == (1, 1, {"eve"})
+    assert storage.get_player("eve") is None
+    storage.close()
@@ -0,0 +1,71 @@
+"""
+Tests for drawing the board and redrawing only the changes.
+"""
+import io # for a stream to render into
+from hangman_engine import HangmanGame # game rules
+from hangman_render import (ScreenRenderer, clear_below_sequence, clear_line_sequence, clear_screen_sequence,
+                            get_common_prefix_length, get_game_lines, move_cursor_sequence) # terminal rendering
+
+score_settings = {
+    "correct_letters_multiplier": 100,
+    "wrong_letter_multiplier": 50,
+    "win_multiplier": 500,
+    "grace_period_multiplier": 5,
+    "time_points_multiplier": 10
+}
+
+def new_renderer(ansi=True):
+    stream = io.StringIO()
+    return ScreenRenderer(stream, ansi=ansi), stream
+
+def test_common_prefix_length():
+    assert get_common_prefix_length("You have 5 tries", "You have 4 tries") == 9
+    assert get_common_prefix_length("abc", "abc") == 3
+    assert get_common_prefix_length("abc", "abcdef") == 3
+    assert get_common_prefix_length("", "abc") == 0
+    assert get_common_prefix_length("xbc", "abc") == 0
+
+def test_game_lines_show_the_board():
+    game = HangmanGame("banana", 3, score_settings, clock=lambda: 0.0)
+    game.guess("a")
+    game.guess("z")
+    lines = get_game_lines(game, "Hint: b")
+    assert lines[0] == "Hint: b"
+    assert "Wrong letters so far: z" in lines
+    assert "You have 2 tries left." in lines
+    assert "Current Hangman: _ a _ a _ a" in lines
+    assert not any("banana" in line for line in lines)
+    assert get_game_lines(game, show_word=True)[-1].endswith("banana")
+
+def test_plain_stream_prints_every_line():
+    renderer, stream = new_renderer(ansi=False)
+    renderer.clear()
+    renderer.render(["one", "two"])
+    renderer.render(["one", "three"])
+    assert stream.getvalue() == "one\ntwo\none\nthree\n"
+
+def test_first_screen_clears_and_draws_every_line():
+    renderer, stream = new_renderer()
+    renderer.render(["one", "two"])
+    assert stream.getvalue() == (clear_screen_sequence + move_cursor_sequence(0) + "one" + clear_line_sequence
+                                 + move_cursor_sequence(1) + "two" + clear_line_sequence + move_cursor_sequence(2) + clear_below_sequence)
+    assert renderer.bytes_written == len(stream.getvalue().encode())
+
+def test_only_the_changed_end_of_a_line_is_redrawn():
+    renderer, stream = new_renderer()
+    renderer.render(["title", "You have 5 tries left."])
+    stream.seek(0)
+    stream.truncate()
+    renderer.render(["title", "You have 4 tries left."])
+    assert stream.getvalue() == move_cursor_sequence(1, 9) + "4 tries left." + clear_line_sequence + move_cursor_sequence(2) + clear_below_sequence
+
+def test_shorter_screen_clears_the_lines_below():
+    renderer, stream = new_renderer()
+    renderer.render(["one", "two", "three"])
+    stream.seek(0)
+    stream.truncate()
+    renderer.render(["one"])
+    assert stream.getvalue() == move_cursor_sequence(1) + clear_below_sequence
+    renderer.clear()
+    renderer.render(["one"]) # everything is redrawn after a clear
+    assert stream.getvalue().endswith(move_cursor_sequence(0) + "one" + clear_line_sequence + move_cursor_sequence(1) + clear_below_sequence)
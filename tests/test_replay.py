@@ -0,0 +1,112 @@
+"""
+Tests for recording games to the guess event file and replaying them.
+"""
+import os # for file paths
+import zlib # for rebuilding a record checksum
+from hangman_engine import HangmanGame # game rules
+from hangman_replay import (GuessEventLog, encode_game_record, find_record_chunks, init_worker, iter_game_records, record_checksum, record_marker,
+                            replay_chunk, replay_file) # guess event records
+
+score_settings = {
+    "correct_letters_multiplier": 100,
+    "wrong_letter_multiplier": 50,
+    "win_multiplier": 500,
+    "grace_period_multiplier": 5,
+    "time_points_multiplier": 10
+}
+
+class FakeClock:
+    """
+    A game clock that moves on a second every time it is read.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+def play_record(player_name, hangman_word, letters):
+    """
+    Plays a game with the given guesses and encodes it as a guess event record.
+    """
+    game = HangmanGame(hangman_word, 5, score_settings, player_name, "Easy", clock=FakeClock())
+    for letter in letters:
+        game.guess(letter)
+    return encode_game_record(game, game.to_record())
+
+def write_records(file_path, records):
+    event_log = GuessEventLog(file_path)
+    for record in records:
+        event_log.append(record)
+    event_log.close()
+
+def read_players(file_path):
+    with open(file_path, mode='rb') as file:
+        buffer = file.read()
+    return [record["player_name"] for record in iter_game_records(buffer)]
+
+def test_records_round_trip(tmp_path):
+    file_path = os.path.join(str(tmp_path), "events.bin")
+    write_records(file_path, [play_record("ann", "cat", "cat"), play_record("bob", "dog", "xyzqv")])
+
+    with open(file_path, mode='rb') as file:
+        records = list(iter_game_records(file.read()))
+    assert [(record["player_name"], record["hangman_word"]) for record in records] == [("ann", "cat"), ("bob", "dog")]
+    assert [letter for letter, _, _ in records[0]["guesses"]] == ["c", "a", "t"]
+    assert all(right for _, right, _ in records[0]["guesses"])
+    assert records[0]["elapsed_ms"] == 3000
+    assert records[1]["total_score"] < 0
+
+def test_records_appended_after_a_torn_tail_read_back(tmp_path):
+    file_path = os.path.join(str(tmp_path), "events.bin")
+    torn_record = play_record("ann", "cat", "ca")
+    write_records(file_path, [play_record("ann", "cat", "cat")])
+    with open(file_path, mode='ab') as file:
+        file.write(torn_record[:len(torn_record) // 2]) # crash part way through a write
+    write_records(file_path, [play_record("bob", "dog", "dog"), play_record("cid", "hat", "hat")])
+
+    assert read_players(file_path) == ["ann", "bob", "cid"]
+    with open(file_path, mode='rb') as file:
+        chunks, torn_bytes = find_record_chunks(file.read(), games_per_chunk=2)
+    assert [records for _, _, records in chunks] == [2, 1]
+    assert torn_bytes == len(torn_record) // 2
+
+def test_damaged_record_in_the_middle_is_skipped(tmp_path):
+    file_path = os.path.join(str(tmp_path), "events.bin")
+    records = [play_record("ann", "cat", "cat"), play_record("bob", "dog", "dog"), play_record("cid", "hat", "hat")]
+    damaged = bytearray(records[1])
+    damaged[len(record_marker) + 3] ^= 0xff # the crc no longer matches
+    write_records(file_path, [records[0], bytes(damaged), records[2]])
+
+    assert read_players(file_path) == ["ann", "cid"]
+    totals, torn_bytes = replay_file(file_path, score_settings, workers=1)
+    assert totals["games"] == 2
+    assert torn_bytes == len(damaged)
+
+def test_replay_counts_records_it_cannot_decode(tmp_path):
+    file_path = os.path.join(str(tmp_path), "events.bin")
+    other_version = bytearray(play_record("bob", "dog", "dog"))
+    body_start = len(record_marker) + 1
+    other_version[body_start] = 99 # a record version this reader doesn't know, with a matching crc
+    other_version[-record_checksum.size:] = record_checksum.pack(zlib.crc32(bytes(other_version[body_start:-record_checksum.size])))
+    write_records(file_path, [play_record("ann", "cat", "cat"), bytes(other_version)])
+
+    with open(file_path, mode='rb') as file:
+        chunks, torn_bytes = find_record_chunks(file.read())
+    assert torn_bytes == 0
+    init_worker(file_path, score_settings)
+    totals = replay_chunk(chunks[0])
+    assert totals["games"] == 1
+    assert totals["damaged_records"] == 1
+
+def test_replay_scores_games_as_recorded(tmp_path):
+    file_path = os.path.join(str(tmp_path), "events.bin")
+    write_records(file_path, [play_record("ann", "cat", "cat"), play_record("bob", "dog", "xyzqv")])
+
+    totals, torn_bytes = replay_file(file_path, score_settings, workers=1)
+    assert torn_bytes == 0
+    assert totals["games"] == 2
+    assert totals["changed_scores"] == 0
+    assert totals["rule_mismatches"] == 0
+    assert totals["difficulties"]["Easy"]["wins"] == 1
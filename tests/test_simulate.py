@@ -0,0 +1,113 @@
+"""
+Tests for the guessing strategies and the batch simulation.
+"""
+import random # for seeded strategies
+from collections import Counter # for score histograms
+import pytest # test runner
+import hangman_simulate # numpy, switched off by a test
+from hangman_engine import HangmanGame, PLAYING, WON # game rules
+from hangman_simulate import init_worker, run_simulation, score_percentile, simulate_chunk, strategies # batch simulation
+
+score_settings = {
+    "correct_letters_multiplier": 100,
+    "wrong_letter_multiplier": 50,
+    "win_multiplier": 500,
+    "grace_period_multiplier": 5,
+    "time_points_multiplier": 10
+}
+difficulty_word_length = {("1", "Easy"): 4, ("2", "Normal"): 5, ("3", "Hard"): 6}
+words_by_length = {
+    4: ["bake", "cake", "lake", "lamp", "camp", "jazz", "quiz"],
+    5: ["apple", "grape", "lemon", "mango"],
+    6: ["banana", "cherry", "orange"]
+}
+
+def make_settings(strategy, seed=1):
+    return {
+        "strategy": strategy,
+        "seed": seed,
+        "seconds_per_guess": 2.0,
+        "difficulty_word_length": difficulty_word_length,
+        "score_settings": score_settings
+    }
+
+def play(strategy, hangman_word, wrong_max=26):
+    """
+    Plays one game with a strategy, returning the guesses made.
+    """
+    game = HangmanGame(hangman_word, wrong_max, score_settings)
+    strategy.new_game(game)
+    guesses = []
+    while game.status == PLAYING:
+        guesses.append(strategy.next_guess(game))
+        game.guess(guesses[-1])
+    return game, guesses
+
+@pytest.fixture
+def worker():
+    """
+    Sets the worker globals as the process pool would, and clears them after.
+    """
+    def set_settings(strategy, seed=1):
+        init_worker(words_by_length, make_settings(strategy, seed))
+    yield set_settings
+    init_worker(None, None)
+
+#=======================================
+# Strategies
+#=======================================
+def test_random_strategy_guesses_every_letter_once():
+    strategy = strategies["random"](words_by_length, random.Random(1))
+    game, guesses = play(strategy, "jazz")
+    assert game.status == WON
+    assert len(guesses) == len(set(guesses))
+
+def test_frequency_strategy_follows_the_letter_order():
+    strategy = strategies["frequency"](words_by_length, random.Random(1))
+    _, guesses = play(strategy, "lake")
+    assert "".join(guesses) == "etaoinshrdlcumwfgypbvk"
+
+@pytest.mark.parametrize("without_numpy", [False, True])
+def test_optimal_strategy_narrows_the_candidates(monkeypatch, without_numpy):
+    if without_numpy:
+        monkeypatch.setattr(hangman_simulate, "np", None)
+    elif hangman_simulate.np is None:
+        pytest.skip("numpy is not installed")
+    strategy = strategies["optimal"](words_by_length, random.Random(1))
+    assert (strategy.solver is None) == without_numpy
+    game, guesses = play(strategy, "quiz")
+    assert game.status == WON
+    assert guesses[0] == "a" # in 5 of the 7 words
+    assert len(game.wrong_letters) <= 2
+
+#=======================================
+# Simulation
+#=======================================
+def test_same_seed_gives_the_same_chunk(worker):
+    worker("random", seed=7)
+    first = simulate_chunk((4, 0, 50))
+    assert simulate_chunk((4, 0, 50)) == first
+    assert simulate_chunk((4, 1, 50)) != first # each chunk has its own seed
+    word_length, games, wins, guesses, scores = first
+    assert (word_length, games) == (4, 50)
+    assert 0 <= wins <= 50
+    assert sum(scores.values()) == 50
+
+def test_score_percentile():
+    scores = Counter({-100: 1, 0: 3, 200: 5, 900: 1})
+    assert score_percentile(scores, 10, 0) == -100
+    assert score_percentile(scores, 10, 10) == -100
+    assert score_percentile(scores, 10, 40) == 0
+    assert score_percentile(scores, 10, 50) == 200
+    assert score_percentile(scores, 10, 100) == 900
+
+def test_run_simulation_summarises_each_difficulty():
+    summaries = run_simulation(words_by_length, difficulty_word_length, score_settings, 20, strategy="frequency", seed=3, workers=1)
+    assert [(summary["word_difficulty"], summary["word_length"], summary["games"]) for summary in summaries] == [("Easy", 4, 20), ("Normal", 5, 20), ("Hard", 6, 20)]
+    for summary in summaries:
+        assert summary["min_score"] <= summary["p10_score"] <= summary["median_score"] <= summary["p90_score"] <= summary["max_score"]
+    assert run_simulation(words_by_length, difficulty_word_length, score_settings, 20, strategy="frequency", seed=3, workers=2) == summaries
+
+def test_run_simulation_needs_words_of_each_length():
+    with pytest.raises(ValueError):
+        run_simulation({4: words_by_length[4], 5: words_by_length[5]}, difficulty_word_length, score_settings, 1, workers=1)
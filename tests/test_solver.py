@@ -0,0 +1,69 @@
+"""
+Tests for narrowing the candidate words and suggesting letters in the hint solver.
+"""
+import pytest # test runner
+pytest.importorskip("numpy") # the solver needs numpy
+from hangman_solver import HangmanSolver # vectorized hint engine
+
+words_by_length = {
+    4: ["bake", "cake", "lake", "lamp", "camp", "bean", "abba"],
+    5: ["apple", "ample"]
+}
+
+@pytest.fixture
+def solver():
+    return HangmanSolver(words_by_length)
+
+#=======================================
+# Candidates
+#=======================================
+def test_nothing_guessed_matches_every_word(solver):
+    assert solver.candidates(list("____"), []) == words_by_length[4]
+
+def test_revealed_letters_must_be_in_place(solver):
+    assert solver.candidates(list("_ake"), []) == ["bake", "cake", "lake"]
+    assert solver.candidates(list("_a__"), ["k"]) == ["lamp", "camp"]
+
+def test_revealed_letters_are_not_in_hidden_places(solver):
+    # "abba" has a second 'a' that would have been shown
+    assert solver.candidates(list("a___"), []) == []
+    assert solver.candidates(list("a__a"), []) == ["abba"]
+
+def test_wrong_letters_rule_words_out(solver):
+    assert solver.candidates(list("____"), ["a"]) == []
+    assert solver.candidates(list("____"), ["k", "n"]) == ["lamp", "camp", "abba"]
+
+def test_unknown_length_has_no_candidates(solver):
+    assert solver.candidates(list("___"), []) == []
+    assert solver.letter_probabilities(list("___"), []) == {}
+
+#=======================================
+# Suggestions
+#=======================================
+def test_letter_probabilities_leave_out_guessed_letters(solver):
+    probabilities = solver.letter_probabilities(list("_a__"), ["k"])
+    assert {letter: chance for letter, chance in probabilities.items() if chance} == {"c": 0.5, "l": 0.5, "m": 1.0, "p": 1.0}
+    assert "a" not in probabilities and "k" not in probabilities
+    assert probabilities["z"] == 0.0
+
+def test_probabilities_match_counting_the_candidates(solver):
+    # most words match, so the ruled out words are taken away from the totals
+    probabilities = solver.letter_probabilities(list("____"), ["n"])
+    candidates = solver.candidates(list("____"), ["n"])
+    assert probabilities["a"] == 1.0
+    assert probabilities["k"] == sum("k" in word for word in candidates) / len(candidates)
+
+def test_suggest_picks_the_most_likely_letter(solver):
+    assert solver.suggest(list("_ake"), []) == "l" # ties go to the more common letter
+    assert solver.suggest(list("_a__"), ["k"]) == "m"
+    assert solver.suggest(list("_pple"), []) == "a"
+
+def test_suggest_falls_back_to_letter_frequency(solver):
+    assert solver.suggest(list("zzz"), []) == "e"
+    assert solver.suggest(list("____"), ["a"]) == "e" # no word matches
+
+def test_add_words_replaces_a_length(solver):
+    solver.add_words(5, ["grape"])
+    assert solver.candidates(list("_____"), []) == ["grape"]
+    solver.add_words(40, ["a" * 40]) # too long for the position masks
+    assert 40 not in solver.tables
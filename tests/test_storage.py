@@ -0,0 +1,105 @@
+"""
+Tests for the json and sqlite storage backends and migrating between them.
+"""
+import pytest # test runner
+from hangman_players import new_player_stats # player stats
+from hangman_storage import JsonStorage, SqliteStorage, migrate_storage # storage backends
+
+def make_game(player_name, total_score, hangman_word="word"):
+    """
+    Makes a game statistics entry.
+    """
+    return {
+        "player_name":player_name,
+        "win_bool":total_score > 0,
+        "total_score":total_score,
+        "game_time":"01/01/25-12:00:00",
+        "hangman_word":hangman_word,
+        "guessed_word":"",
+        "word_difficulty":"Easy",
+        "score_wrong_letters":0,
+        "total_wrong_letters":0,
+        "time_taken":10.0,
+        "score_time_taken":0
+    }
+
+def open_test_storage(backend, data_dir):
+    if backend == "json":
+        return JsonStorage(str(data_dir / "json"))
+    return SqliteStorage(str(data_dir / "hangman.db"))
+
+@pytest.fixture(params=["json", "sqlite"])
+def storage(request, tmp_path):
+    storage = open_test_storage(request.param, tmp_path)
+    yield storage
+    storage.close()
+
+@pytest.fixture
+def json_and_sqlite(tmp_path):
+    source, target = JsonStorage(str(tmp_path / "json")), SqliteStorage(str(tmp_path / "hangman.db"))
+    yield source, target
+    source.close()
+    target.close()
+
+#=======================================
+# Backends
+#=======================================
+def test_players_round_trip(storage):
+    storage.add_players([new_player_stats("ann", "hash"), new_player_stats("bob", "")])
+    assert storage.get_player("ann")["player_password"] == "hash"
+    assert storage.get_player("cid") is None
+    assert sorted(player_stats["player_name"] for player_stats in storage.iter_players()) == ["ann", "bob"]
+
+    storage.set_player_password("bob", "new hash")
+    assert storage.get_player("bob")["player_password"] == "new hash"
+
+def test_recorded_games_update_players_and_used_words(storage):
+    storage.add_players([new_player_stats("ann", "")])
+    storage.record_games([make_game("ann", 300, "apple"), make_game("ann", -50, "pear")])
+
+    assert [game_stats["hangman_word"] for game_stats in storage.iter_games()] == ["apple", "pear"]
+    player_stats = storage.get_player("ann")
+    assert player_stats["total_games"] == 2
+    assert player_stats["total_score"] == 250
+    assert storage.word_used("ann", "apple")
+    assert not storage.word_used("bob", "apple")
+    assert [game_stats["total_score"] for game_stats in storage.top_games(1)] == [300]
+
+def test_games_after_a_log_offset(storage):
+    storage.add_players([new_player_stats("ann", "")])
+    storage.record_games([make_game("ann", 100, "apple")])
+    log_offset = storage.get_log_offset()
+    storage.record_games([make_game("ann", 200, "pear")])
+    assert [game_stats["hangman_word"] for game_stats, _ in storage.iter_games_after(log_offset)] == ["pear"]
+
+#=======================================
+# Migration
+#=======================================
+def test_migrate_copies_every_player_and_game(json_and_sqlite):
+    source, target = json_and_sqlite
+    source.add_players([new_player_stats("ann", ""), new_player_stats("bob", "")])
+    source.record_games([make_game("ann", 300, "apple"), make_game("bob", 100, "pear")])
+
+    assert migrate_storage(source, target, batch_size=1) == (2, 2)
+    assert [game_stats["hangman_word"] for game_stats in target.iter_games()] == ["apple", "pear"]
+    assert target.get_player("ann")["total_score"] == 300
+
+def test_migrate_into_a_storage_in_use_is_refused(json_and_sqlite):
+    source, target = json_and_sqlite
+    source.add_players([new_player_stats("ann", "")])
+    source.record_games([make_game("ann", 300, "apple")])
+    migrate_storage(source, target)
+
+    with pytest.raises(ValueError):
+        migrate_storage(source, target)
+    assert len(list(target.iter_games())) == 1
+
+def test_migrate_append_skips_games_the_target_has(json_and_sqlite):
+    source, target = json_and_sqlite
+    source.add_players([new_player_stats("ann", "")])
+    source.record_games([make_game("ann", 300, "apple")])
+    migrate_storage(source, target)
+    source.record_games([make_game("ann", 100, "pear")])
+
+    assert migrate_storage(source, target, append=True) == (1, 1)
+    assert [game_stats["hangman_word"] for game_stats in target.iter_games()] == ["apple", "pear"]